@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict
+from datetime import date, datetime
+import asyncio
+import json
 import pandas as pd
 
-from ...schemas.request import TransactionData, PortfolioAnalysisRequest
-from ...schemas.response import ComprehensiveReportResponse
+from ...schemas.request import TransactionData, PortfolioAnalysisRequest, BatchAnalysisRequest
+from ...schemas.response import ComprehensiveReportResponse, BatchAnalysisResponse
 from ...core.coaching_orchestrator import CoachingOrchestrator
+from ...core.transaction_columns import TransactionColumns
+from ...core.transaction_store import transaction_store
+from ...core.behavior_state import behavior_state_store
+from ...core.report_cache import report_cache
 from ...utils.demo_data import generate_demo_transactions
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
@@ -12,18 +21,33 @@ router = APIRouter(prefix="/analysis", tags=["analysis"])
 # 전역 오케스트레이터 인스턴스
 orchestrator = CoachingOrchestrator()
 
+def _load_transactions(user_id: str):
+    """저장된 거래 이력, 리포트 캐시용 이력 버전, 데모 여부 (이력이 없으면 데모용 거래 데이터 생성)
+
+    저장소는 추가 전용이라 읽은 사용자 행 수가 곧 이력 버전이 된다.
+    데모 거래는 (사용자, 날짜)로 고정되므로 날짜가 버전이다.
+    """
+    transactions = transaction_store.read_user(user_id)
+    if len(transactions) == 0:
+        return generate_demo_transactions(user_id), _demo_version(), True
+    return transactions, f"store:{len(transactions)}", False
+
+def _demo_version() -> str:
+    return f"demo:{date.today().isoformat()}"
+
 @router.post("/comprehensive", response_model=ComprehensiveReportResponse)
 async def analyze_comprehensive(request: PortfolioAnalysisRequest):
     """종합 투자 행동 분석"""
     try:
-        # 데모용 거래 데이터 생성
-        transactions = generate_demo_transactions(request.user_id)
+        transactions, version, demo = _load_transactions(request.user_id)
         
         # 종합 분석 실행
         report = await orchestrator.generate_comprehensive_report(
             request.user_id,
             transactions,
-            include_rebalancing=request.include_rebalancing
+            include_rebalancing=request.include_rebalancing,
+            version=version,
+            demo=demo
         )
         
         return ComprehensiveReportResponse(**report)
@@ -31,6 +55,104 @@ async def analyze_comprehensive(request: PortfolioAnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/comprehensive/stream")
+async def stream_comprehensive(request: PortfolioAnalysisRequest,
+                               format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """종합 투자 행동 분석 스트리밍 (항목이 완성되는 대로 NDJSON 또는 SSE로 전송)"""
+    try:
+        transactions, version, demo = _load_transactions(request.user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for section, data in orchestrator.stream_comprehensive_report(
+                request.user_id, transactions, include_rebalancing=request.include_rebalancing,
+                version=version, demo=demo
+            ):
+                yield _format_event(format, section, data)
+            yield _format_event(format, 'complete', None)
+        except Exception as e:
+            # 응답 상태 코드는 이미 전송되었으므로 오류도 이벤트로 알림
+            yield _format_event(format, 'error', {'detail': str(e)})
+    
+    media_type = 'text/event-stream' if format == 'sse' else 'application/x-ndjson'
+    return StreamingResponse(events(), media_type=media_type, headers={'Cache-Control': 'no-cache'})
+
+def _format_event(format: str, section: str, data) -> str:
+    """NDJSON: {"section", "data"} 한 줄, SSE: event는 항목 이름, data는 내용"""
+    data = jsonable_encoder(data)
+    if format == 'sse':
+        return f"event: {section}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+    return json.dumps({'section': section, 'data': data}, ensure_ascii=False, default=str) + "\n"
+
+@router.post("/transactions")
+async def ingest_transactions(request: TransactionData):
+    """거래 내역 저장 (거래 저장소에 세그먼트로 추가하고 행동 상태를 증분 갱신)"""
+    try:
+        records = [{**record, 'user_id': request.user_id} for record in request.transactions]
+        columns = TransactionColumns.from_records(records)
+        await asyncio.to_thread(transaction_store.append, columns)
+        # 새 거래만 반영한 행동 지표 (이력 전체 재계산 없음)
+        state = await behavior_state_store.apply(
+            request.user_id, columns, lambda: transaction_store.read_user(request.user_id),
+            prices=orchestrator.market_data
+        )
+        # 마지막 평가 이후 바뀐 지표를 읽는 룰만 재평가
+        behavior = state.to_behavior()
+        actions = await orchestrator.rule_engine.evaluate_changed(behavior)
+        # 새 거래가 들어온 사용자의 캐시된 리포트 무효화
+        report_cache.invalidate(request.user_id)
+        
+        return {
+            'status': 'success',
+            'user_id': request.user_id,
+            'stored_count': len(columns),
+            'behavior': behavior.to_dict(),
+            'coaching_actions': jsonable_encoder(actions)
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch", response_model=BatchAnalysisResponse)
+async def analyze_batch(request: BatchAnalysisRequest):
+    """다수 사용자 일괄 행동 분석"""
+    try:
+        if request.transactions:
+            transactions = TransactionColumns.from_records(request.transactions)
+        elif request.user_ids:
+            # 데모용 거래 데이터 생성
+            transactions = TransactionColumns.from_frame(pd.concat(
+                [generate_demo_transactions(user_id) for user_id in request.user_ids],
+                ignore_index=True
+            ))
+        else:
+            transactions = TransactionColumns.empty()
+        
+        # 묶음 전체 종목의 종가를 한 번에 조회해 전체 사용자 한 번에 분석 (FOMO 판정 포함)
+        analyzer = orchestrator.behavior_analyzer
+        market_data = await orchestrator.market_data(transactions)
+        behaviors = await analyzer.analyze_many(transactions, market_data,
+                                                covariance=orchestrator.covariance_cache.latest())
+        hits = orchestrator.rule_engine.evaluate_rules_batch(behaviors)
+        
+        results = []
+        for i, behavior in enumerate(behaviors):
+            result = behavior.to_dict()
+            result['investor_types'] = [t.value for t in analyzer.classify_investor_type(behavior)]
+            result['triggered_rules'] = hits.rules_at(i)
+            results.append(result)
+        
+        return BatchAnalysisResponse(
+            analysis_date=datetime.now().isoformat(),
+            user_count=len(results),
+            results=results
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/demo/{user_id}")
 async def get_demo_analysis(user_id: str):
     """데모 분석 결과 조회"""
@@ -38,7 +160,7 @@ async def get_demo_analysis(user_id: str):
         # 데모 데이터로 분석 실행
         transactions = generate_demo_transactions(user_id)
         report = await orchestrator.generate_comprehensive_report(
-            user_id, transactions, include_rebalancing=True
+            user_id, transactions, include_rebalancing=True, version=_demo_version(), demo=True
         )
         
         return report
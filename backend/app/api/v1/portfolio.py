@@ -5,11 +5,13 @@ import pandas as pd
 from ...schemas.request import RebalancingExecuteRequest
 from ...schemas.response import RebalancingPlanResponse
 from ...core.rebalancing_engine import RebalancingEngine
+from ...core.plan_store import plan_store
+from ...integrations.mstock import order_executor
 from ...utils.demo_data import get_demo_portfolio, get_demo_behavior
 
 router = APIRouter(prefix="/portfolio", tags=["portfolio"])
 
-rebalancing_engine = RebalancingEngine()
+rebalancing_engine = RebalancingEngine(plan_store)
 
 @router.get("/current/{user_id}")
 async def get_current_portfolio(user_id: str):
@@ -27,18 +29,54 @@ async def get_current_portfolio(user_id: str):
 
 @router.post("/rebalance")
 async def create_rebalancing_plan(request: RebalancingExecuteRequest):
-    """리밸런싱 계획 생성"""
+    """리밸런싱 계획 생성 (plan_id가 있으면 사용자가 본 저장된 계획을 그대로 사용)
+
+    execute_immediately이면 계획을 증권사 주문으로 실행해(매도 후 매수) 결과를 execution에 담는다.
+    실행은 요청 사용자가 소유한 저장된 계획(plan_id)만 가능하며, 데모 데이터로 만든 계획은 실행하지 않는다.
+    계획은 한 번만 실행되고, 같은 계획의 재실행 요청(재시도, 중복 클릭)은 주문을 보내지 않고
+    409와 함께 이전 실행 결과를 돌려준다.
+    """
     try:
-        # 데모용 포트폴리오와 행동 데이터
-        portfolio_list = get_demo_portfolio(request.user_id)
-        portfolio_df = pd.DataFrame(portfolio_list)
-        behavior = get_demo_behavior(request.user_id)
+        if request.execute_immediately and not request.plan_id:
+            raise HTTPException(status_code=400, detail="주문을 실행하려면 확인한 계획의 plan_id가 필요합니다")
         
-        plan = await rebalancing_engine.generate_rebalancing_plan(
-            portfolio_df, behavior
-        )
+        if request.plan_id:
+            # 다른 사용자의 계획은 없는 계획과 같이 취급
+            plan = plan_store.get(request.plan_id, request.user_id)
+            if plan is None:
+                raise HTTPException(status_code=404, detail="리밸런싱 계획이 없거나 만료되었습니다")
+        else:
+            # 데모용 포트폴리오와 행동 데이터
+            portfolio_list = get_demo_portfolio(request.user_id)
+            portfolio_df = pd.DataFrame(portfolio_list)
+            behavior = get_demo_behavior(request.user_id)
+            
+            plan = await rebalancing_engine.generate_rebalancing_plan(
+                portfolio_df, behavior, user_id=request.user_id, demo=True
+            )
         
+        if request.execute_immediately:
+            if plan.get('demo'):
+                raise HTTPException(status_code=400, detail="데모 데이터로 만든 계획은 실행할 수 없습니다")
+            # 주문을 보내기 전에 잠금 안에서 실행을 선점해 같은 계획이 두 번 실행되지 않게 한다
+            plan, previous = plan_store.claim_execution(request.plan_id, request.user_id)
+            if plan is None:
+                raise HTTPException(status_code=404, detail="리밸런싱 계획이 없거나 만료되었습니다")
+            if previous is not None:
+                raise HTTPException(status_code=409, detail={
+                    'message': "이미 실행한 리밸런싱 계획입니다", 'execution': previous
+                })
+            try:
+                execution = (await order_executor.execute_plan(plan, request.user_id)).to_dict()
+            except Exception as e:
+                # 일부 주문이 나갔을 수 있으므로 선점은 풀지 않고 실패를 실행 결과로 남긴다
+                plan_store.record_execution(request.plan_id, {'status': 'failed', 'error': str(e)})
+                raise
+            plan_store.record_execution(request.plan_id, execution)
+            return RebalancingPlanResponse(**plan, execution=execution)
         return RebalancingPlanResponse(**plan)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -9,6 +9,88 @@ class Config:
     KRX_API_KEY = os.getenv("KRX_API_KEY", "E7E66EAC74E4449AA6A429176F96F0F37D5EDD57")
     DART_API_KEY = os.getenv("DART_API_KEY", "e45fa610cea4a8e8a6eebd9e05e3580daa071f82")
     HYPERCLOVAX_API_KEY = os.getenv("HYPERCLOVAX_API_KEY", "demo_key")
+    BOK_API_KEY = os.getenv("BOK_API_KEY", "sample")
+    M_STOCK_API_KEY = os.getenv("M_STOCK_API_KEY", "demo_key")
+    
+    # HyperCLOVA X 연결 (API 주소가 비어 있으면 데모 응답, 동시 요청/초당 요청 수는 공급자 한도에 맞춤)
+    HYPERCLOVAX_API_URL = os.getenv("HYPERCLOVAX_API_URL", "")
+    HYPERCLOVAX_MODEL = os.getenv("HYPERCLOVAX_MODEL", "HCX-003")
+    HYPERCLOVAX_MAX_CONCURRENCY = int(os.getenv("HYPERCLOVAX_MAX_CONCURRENCY", "8"))
+    HYPERCLOVAX_RATE_PER_SECOND = float(os.getenv("HYPERCLOVAX_RATE_PER_SECOND", "5"))
+    HYPERCLOVAX_BURST = float(os.getenv("HYPERCLOVAX_BURST", "10"))
+    HYPERCLOVAX_MAX_RETRIES = int(os.getenv("HYPERCLOVAX_MAX_RETRIES", "3"))
+    HYPERCLOVAX_TIMEOUT = float(os.getenv("HYPERCLOVAX_TIMEOUT", "10"))
+    
+    # LLM Response Cache (경로가 비어 있으면 메모리에만 보관, 디스크 항목 상한 0이면 상한 없음)
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "100000"))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./data/llm_cache.sqlite3")
+    
+    # Analysis (0이면 프로세스 풀 없이 요청 처리 프로세스에서 실행)
+    ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    
+    # Transaction Store (세그먼트 수가 상한을 넘으면 자동 병합, 0이면 자동 병합 안 함)
+    TRANSACTION_STORE_DIR = os.getenv("TRANSACTION_STORE_DIR", "./data/transactions")
+    TRANSACTION_STORE_MAX_SEGMENTS = int(os.getenv("TRANSACTION_STORE_MAX_SEGMENTS", "16"))
+    
+    # Behavior State (거래 추가 시 증분 갱신하는 사용자별 행동 상태, 경로가 비어 있으면 메모리에만 보관)
+    BEHAVIOR_STATE_PATH = os.getenv("BEHAVIOR_STATE_PATH", "./data/behavior_state.sqlite3")
+    
+    # Covariance Cache (shrinkage: Ledoit-Wolf 축소 추정, ewma: 지수가중 추정)
+    COVARIANCE_CACHE_DIR = os.getenv("COVARIANCE_CACHE_DIR", "./data/covariance")
+    COVARIANCE_METHOD = os.getenv("COVARIANCE_METHOD", "shrinkage")
+    COVARIANCE_HALFLIFE = float(os.getenv("COVARIANCE_HALFLIFE", "60"))
+    # 공분산 갱신 대상 종목(쉼표 구분)과 종가 조회 기간, 갱신 확인 주기 (거래일당 한 번만 계산)
+    COVARIANCE_UNIVERSE = [
+        ticker.strip()
+        for ticker in os.getenv("COVARIANCE_UNIVERSE", "A005930,A035720,A000660,A051910,A105560").split(",")
+        if ticker.strip()
+    ]
+    COVARIANCE_LOOKBACK_DAYS = int(os.getenv("COVARIANCE_LOOKBACK_DAYS", "365"))
+    COVARIANCE_REFRESH_SECONDS = float(os.getenv("COVARIANCE_REFRESH_SECONDS", "3600"))
+    
+    # Rebalancing Plan Store (경로가 비어 있으면 메모리에만 보관)
+    PLAN_STORE_MAX_ENTRIES = int(os.getenv("PLAN_STORE_MAX_ENTRIES", "1000"))
+    PLAN_STORE_TTL_SECONDS = float(os.getenv("PLAN_STORE_TTL_SECONDS", "3600"))
+    PLAN_STORE_PATH = os.getenv("PLAN_STORE_PATH", "")
+    
+    # Report Cache (최대 바이트는 JSON 직렬화 크기 기준, 0이면 상한 없음)
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "2000"))
+    REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "600"))
+    REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    
+    # Rule Engine (증분 재평가 기준으로 마지막 평가를 보관할 최대 사용자 수)
+    RULE_STATE_MAX_USERS = int(os.getenv("RULE_STATE_MAX_USERS", "10000"))
+    
+    # Report Stage Timeouts (초, 초과 시 해당 단계는 대체값으로 채움)
+    BEHAVIOR_STAGE_TIMEOUT = float(os.getenv("BEHAVIOR_STAGE_TIMEOUT", "30"))
+    LLM_STAGE_TIMEOUT = float(os.getenv("LLM_STAGE_TIMEOUT", "3"))
+    KRX_STAGE_TIMEOUT = float(os.getenv("KRX_STAGE_TIMEOUT", "2"))
+    REBALANCING_STAGE_TIMEOUT = float(os.getenv("REBALANCING_STAGE_TIMEOUT", "5"))
+    GAMIFICATION_STAGE_TIMEOUT = float(os.getenv("GAMIFICATION_STAGE_TIMEOUT", "1"))
+    
+    # OHLCV Store (일봉 조회 백엔드: demo 또는 pykrx)
+    OHLCV_STORE_PATH = os.getenv("OHLCV_STORE_PATH", "./data/ohlcv.sqlite3")
+    OHLCV_FETCHER = os.getenv("OHLCV_FETCHER", "demo")
+    KRX_FETCH_CONCURRENCY = int(os.getenv("KRX_FETCH_CONCURRENCY", "8"))
+    
+    # BOK Macro Series (조회 백엔드: demo 또는 ecos)
+    BOK_CACHE_DIR = os.getenv("BOK_CACHE_DIR", "./data/bok")
+    BOK_FETCHER = os.getenv("BOK_FETCHER", "demo")
+    
+    # M-STOCK Orders (API 주소가 비어 있으면 모의 증권사, 동시 주문/초당 주문 수는 증권사 한도에 맞춤,
+    # 접수된 주문은 FILL_TIMEOUT초까지 POLL_SECONDS초마다 체결 상태 조회)
+    M_STOCK_API_URL = os.getenv("M_STOCK_API_URL", "")
+    M_STOCK_MAX_PARALLEL = int(os.getenv("M_STOCK_MAX_PARALLEL", "16"))
+    M_STOCK_RATE_PER_SECOND = float(os.getenv("M_STOCK_RATE_PER_SECOND", "20"))
+    M_STOCK_BURST = float(os.getenv("M_STOCK_BURST", "40"))
+    M_STOCK_FILL_TIMEOUT = float(os.getenv("M_STOCK_FILL_TIMEOUT", "30"))
+    M_STOCK_FILL_POLL_SECONDS = float(os.getenv("M_STOCK_FILL_POLL_SECONDS", "0.5"))
+    
+    # Reference Data (전 사용자 공통 통계 스냅샷, 갱신 주기가 지나면 백그라운드 갱신)
+    REFERENCE_DATA_DIR = os.getenv("REFERENCE_DATA_DIR", "./data/reference")
+    REFERENCE_DATA_REFRESH_SECONDS = float(os.getenv("REFERENCE_DATA_REFRESH_SECONDS", "3600"))
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./investment_coach.db")
@@ -23,6 +105,7 @@ class Constants:
     # 미래에셋증권 연동 (데모용)
     MSTOCK_COMMISSION_RATE = 0.08  # 기본 수수료율 0.08%
     MSTOCK_DISCOUNT_RATE = 0.04    # 리밸런싱 실행 시 할인율 0.04%
+    SECURITIES_TAX_RATE = 0.23     # 증권거래세 0.23% (매도 시)
     
     # 행동 분석 임계값
     BEHAVIOR_THRESHOLDS = {
@@ -32,6 +115,7 @@ class Constants:
         'sector_concentration': 0.3, # 30% 이상
         'loss_delay': 0.3,         # 30% 이상
         'fomo_threshold': 0.05,    # 5% 급등 후 매수
+        'fomo_lookback': 5,        # 급등 판단 기간 (직전 5거래일)
         'min_cash_ratio': 0.1      # 최소 현금 비중 10%
     }
     
@@ -0,0 +1,45 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from ..config import Config
+
+class AnalysisExecutor:
+    """CPU 집약 분석 작업 실행기
+
+    start()로 프로세스 풀을 띄운 경우 작업을 워커 프로세스에서 실행해 이벤트 루프를
+    막지 않는다. 풀이 없으면(작업자 수 0, 테스트 등) 현재 프로세스에서 바로 실행한다.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = Config.ANALYSIS_WORKERS if max_workers is None else max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        """프로세스 풀 시작"""
+        if self._pool is None and self.max_workers > 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+    def shutdown(self):
+        """프로세스 풀 종료"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """작업 실행 (func와 인자는 pickle 가능한 모듈 수준 객체여야 한다)"""
+        if self._pool is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, func, *args)
+
+# 앱 수명주기에 맞춰 시작/종료되는 공유 실행기
+analysis_executor = AnalysisExecutor()
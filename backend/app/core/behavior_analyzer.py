@@ -1,11 +1,17 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import pandas as pd
 import numpy as np
 from enum import Enum
 
 from ..config import Constants
+from .lot_matcher import LotMatches, match_fifo
+from . import risk_engine
+from .risk_engine import safe_divide
+from .analysis_executor import AnalysisExecutor, analysis_executor
+from .covariance_cache import CovarianceMatrix
+from .transaction_columns import PriceColumns, SymbolTable, TransactionColumns, as_columns
 
 @dataclass
 class InvestmentBehavior:
@@ -24,6 +30,7 @@ class InvestmentBehavior:
     avg_trade_size: float
     max_drawdown: float
     cash_ratio: float
+    expected_volatility: Optional[float] = None  # 공유 공분산 행렬 기준 보유 종목 예상 변동성 (%)
 
     def to_dict(self) -> Dict:
         data = {
@@ -40,7 +47,8 @@ class InvestmentBehavior:
             'total_trades': self.total_trades,
             'avg_trade_size': self.avg_trade_size,
             'max_drawdown': self.max_drawdown,
-            'cash_ratio': self.cash_ratio
+            'cash_ratio': self.cash_ratio,
+            'expected_volatility': self.expected_volatility
         }
         return data
 
@@ -54,44 +62,172 @@ class InvestorType(Enum):
     CONSERVATIVE = "보수형"
     AGGRESSIVE = "공격형"
 
+def _as_prices(market_data, stock_table: SymbolTable) -> Optional[PriceColumns]:
+    """시세 입력(DataFrame 또는 PriceColumns)을 컬럼형으로 변환 (없으면 None)"""
+    if market_data is None or len(market_data) == 0:
+        return None
+    if isinstance(market_data, PriceColumns):
+        return market_data
+    return PriceColumns.from_frame(market_data, stock_table)
+
+def _match_lots(columns: TransactionColumns, user_codes: np.ndarray) -> LotMatches:
+    """(사용자, 종목) 단위 FIFO 로트 매칭"""
+    n_stocks = max(len(columns.stock_table), 1)
+    codes = np.asarray(user_codes, dtype=np.int64) * n_stocks + columns.stock_codes
+    return match_fifo(codes, columns.days, columns.is_buy, columns.shares, columns.prices)
+
+def _prior_returns(event_codes: np.ndarray, event_days: np.ndarray,
+                   prices: PriceColumns, lookback: int) -> np.ndarray:
+    """이벤트 직전 거래일까지의 N거래일 수익률 (as-of 조인)
+    
+    가격을 (종목, 날짜) 키로 정렬한 뒤 이벤트 키를 searchsorted로 찾아,
+    이벤트 당일을 제외한 가장 최근 가격 행에 붙인다. 정렬 외에는 선형 연산이며
+    이전 가격이 없거나 N거래일 이력이 부족한 이벤트는 NaN을 돌려준다.
+    """
+    n_prices = len(prices)
+    if n_prices == 0:
+        return np.full(len(event_codes), np.nan)
+    
+    price_code = prices.stock_codes.astype(np.int64)
+    event_code = np.asarray(event_codes, dtype=np.int64)
+    
+    # (종목, 날짜) 복합 키
+    day_base = min(prices.days.min(), event_days.min(initial=prices.days.min()))
+    span = max(prices.days.max(), event_days.max(initial=prices.days.max())) - day_base + 1
+    price_key = price_code * span + (prices.days - day_base)
+    event_key = event_code * span + (event_days - day_base)
+    
+    order = np.argsort(price_key, kind='stable')
+    price_key = price_key[order]
+    price_code = price_code[order]
+    close = prices.closes[order]
+    
+    # 종목 내 N행 전 종가 대비 수익률
+    ret = np.full(n_prices, np.nan)
+    if n_prices > lookback:
+        same_stock = price_code[lookback:] == price_code[:-lookback]
+        ret[lookback:] = np.where(same_stock, close[lookback:] / close[:-lookback] - 1, np.nan)
+    
+    # 이벤트 당일 이전의 가장 최근 가격 행
+    pos = np.searchsorted(price_key, event_key, side='left') - 1
+    valid = pos >= 0
+    pos = np.maximum(pos, 0)
+    valid &= price_code[pos] == event_code
+    return np.where(valid, ret[pos], np.nan)
+
 class BehaviorAnalyzer:
-    """투자 행동 패턴 분석기"""
+    """투자 행동 패턴 분석기
     
-    def __init__(self):
+    거래 내역은 DataFrame 또는 TransactionColumns로 받으며, 내부 계산은 모두
+    컬럼형 정수 코드 배열 위에서 이루어진다.
+    """
+    
+    def __init__(self, executor: Optional[AnalysisExecutor] = None):
         self.thresholds = Constants.BEHAVIOR_THRESHOLDS
+        self.executor = executor or analysis_executor
+    
+    async def analyze_behavior(self, transactions: Union[pd.DataFrame, TransactionColumns], 
+                             market_data: Optional[Union[pd.DataFrame, PriceColumns]] = None,
+                             covariance: Optional[CovarianceMatrix] = None) -> InvestmentBehavior:
+        """거래 데이터로부터 행동 패턴 분석
+
+        market_data: 일별 종가 (없으면 체결가 사용)
+        covariance: 공유 공분산 행렬 (있으면 보유 종목 예상 변동성 계산)
+        """
+        columns = as_columns(transactions)
+        user_id = columns.users[columns.user_codes[0]] if len(columns) > 0 else 'demo_user'
+        user_codes = np.zeros(len(columns), dtype=np.int64)
+        # 분석 프로세스로는 묶음이 참조하는 심볼만 보냄
+        columns, prices = columns.compacted(_as_prices(market_data, columns.stock_table))
+        
+        # 기본 메트릭, 행동경제학 편향, 포트폴리오 리스크를 분석 실행기에서 계산
+        metrics = await self.executor.run(
+            compute_behavior_metrics, columns, prices, user_codes, 1
+        )
+        expected = self._expected_volatility(metrics, covariance, columns.stock_table, 1)
+        return self._build_behaviors(metrics, [user_id], expected)[0]
     
-    async def analyze_behavior(self, transactions: pd.DataFrame, 
-                             market_data: Optional[pd.DataFrame] = None) -> InvestmentBehavior:
-        """거래 데이터로부터 행동 패턴 분석"""
-        user_id = transactions['user_id'].iloc[0] if len(transactions) > 0 else 'demo_user'
-        
-        # 기본 메트릭 계산
-        metrics = await self._calculate_basic_metrics(transactions)
-        
-        # 행동경제학 기반 추가 분석
-        behavioral_metrics = await self._analyze_behavioral_biases(transactions, market_data)
-        
-        # 포트폴리오 리스크 분석
-        risk_metrics = await self._analyze_portfolio_risk(transactions)
-        
-        return InvestmentBehavior(
-            user_id=user_id,
-            analysis_date=datetime.now(),
-            avg_holding_period=metrics['avg_holding_period'],
-            turnover_rate=metrics['turnover_rate'],
-            win_loss_ratio=metrics['win_loss_ratio'],
-            win_rate=metrics['win_rate'],
-            loss_delay_rate=behavioral_metrics['loss_delay_rate'],
-            fomo_purchase_count=behavioral_metrics['fomo_count'],
-            portfolio_volatility=risk_metrics['volatility'],
-            sector_concentration=risk_metrics['sector_concentration'],
-            total_trades=metrics['total_trades'],
-            avg_trade_size=metrics['avg_trade_size'],
-            max_drawdown=risk_metrics['max_drawdown'],
-            cash_ratio=risk_metrics['cash_ratio']
+    async def analyze_many(self, transactions: Union[pd.DataFrame, TransactionColumns], 
+                           market_data: Optional[Union[pd.DataFrame, PriceColumns]] = None,
+                           covariance: Optional[CovarianceMatrix] = None) -> List[InvestmentBehavior]:
+        """여러 사용자의 거래 데이터를 한 번의 그룹 연산으로 분석
+        
+        transactions는 여러 사용자 거래를 담은 DataFrame(user_id 컬럼 포함) 또는
+        TransactionColumns이며, 결과는 users 목록(user_id 최초 등장) 순서를 따른다.
+        """
+        columns = as_columns(transactions)
+        if len(columns) == 0:
+            return []
+        
+        columns, prices = columns.compacted(_as_prices(market_data, columns.stock_table))
+        metrics = await self.executor.run(
+            compute_behavior_metrics, columns, prices, columns.user_codes, len(columns.users)
         )
+        expected = self._expected_volatility(metrics, covariance, columns.stock_table, len(columns.users))
+        return self._build_behaviors(metrics, columns.users, expected)
+    
+    def _metrics_by_user(self, columns: TransactionColumns, prices: Optional[PriceColumns],
+                         user_codes: np.ndarray, n_users: int) -> Dict:
+        """사용자별 전체 지표 계산 (로트 매칭 결과를 단계 간 공유)"""
+        lots = _match_lots(columns, user_codes)
+        
+        metrics = self._basic_metrics_by_user(columns, user_codes, n_users, lots)
+        behavioral_metrics = self._behavioral_biases_by_user(columns, prices, user_codes, n_users, lots)
+        risk_metrics = self._portfolio_risk_by_user(columns, user_codes, n_users, prices)
+        return {**metrics, **behavioral_metrics, **risk_metrics}
+    
+    def _expected_volatility(self, metrics: Dict, covariance: Optional[CovarianceMatrix],
+                             stock_table: SymbolTable, n_users: int) -> Optional[np.ndarray]:
+        """사용자별 보유 종목 예상 연환산 변동성 (%, 현금 비중 반영)
+
+        공분산 행렬은 메모리 맵이라 분석 실행기로 넘기지 않고 이 프로세스에서
+        (사용자 × 종목) 비중 행렬 하나로 모든 사용자의 w'Σw를 한 번에 계산한다.
+        행렬에 없는 종목은 공분산 0으로 본다.
+        """
+        if covariance is None:
+            return None
+        users = metrics['position_user']
+        values = metrics['position_value']
+        positions = covariance.positions([stock_table.symbols[code] for code in metrics['position_stock'].tolist()])
+        invested = np.bincount(users, weights=values, minlength=n_users)
+        weights = safe_divide(values, invested[users]) * (1 - metrics['cash_ratio'][users])
+        
+        found = (positions >= 0) & (values > 0)
+        columns, local = np.unique(positions[found], return_inverse=True)
+        weight_matrix = np.zeros((n_users, len(columns)))
+        np.add.at(weight_matrix, (users[found], local), weights[found])
+        sub = np.asarray(covariance.covariance)[np.ix_(columns, columns)]
+        variance = np.einsum('ij,jk,ik->i', weight_matrix, sub, weight_matrix)
+        return np.sqrt(np.maximum(variance, 0.0)) * 100
     
-    async def _calculate_basic_metrics(self, transactions: pd.DataFrame) -> Dict:
+    def _build_behaviors(self, metrics: Dict, user_ids: List[str],
+                         expected_volatility: Optional[np.ndarray] = None) -> List[InvestmentBehavior]:
+        """사용자별 지표 배열로 InvestmentBehavior 목록 생성"""
+        analysis_date = datetime.now()
+        return [
+            InvestmentBehavior(
+                user_id=user_id,
+                analysis_date=analysis_date,
+                avg_holding_period=metrics['avg_holding_period'][i].item(),
+                turnover_rate=metrics['turnover_rate'][i].item(),
+                win_loss_ratio=metrics['win_loss_ratio'][i].item(),
+                win_rate=metrics['win_rate'][i].item(),
+                loss_delay_rate=metrics['loss_delay_rate'][i].item(),
+                fomo_purchase_count=metrics['fomo_count'][i].item(),
+                portfolio_volatility=metrics['volatility'][i].item(),
+                sector_concentration=metrics['sector_concentration'][i],
+                total_trades=metrics['total_trades'][i].item(),
+                avg_trade_size=metrics['avg_trade_size'][i].item(),
+                max_drawdown=metrics['max_drawdown'][i].item(),
+                cash_ratio=metrics['cash_ratio'][i].item(),
+                expected_volatility=(
+                    expected_volatility[i].item() if expected_volatility is not None else None
+                )
+            )
+            for i, user_id in enumerate(user_ids)
+        ]
+    
+    async def _calculate_basic_metrics(self, transactions: Union[pd.DataFrame, TransactionColumns]) -> Dict:
         """기본 투자 지표 계산"""
         if len(transactions) == 0:
             return {
@@ -103,64 +239,248 @@ class BehaviorAnalyzer:
                 'avg_trade_size': 0
             }
         
-        # 평균 보유기간 계산 (데모용 간단 계산)
-        avg_holding = np.random.uniform(3, 15)  # 3-15일 사이 랜덤
+        columns = as_columns(transactions)
+        user_codes = np.zeros(len(columns), dtype=np.int64)
+        metrics = self._basic_metrics_by_user(columns, user_codes, 1)
+        return {key: values[0].item() for key, values in metrics.items()}
+    
+    def _basic_metrics_by_user(self, columns: TransactionColumns, user_codes: np.ndarray,
+                               n_users: int, lots: Optional[LotMatches] = None) -> Dict[str, np.ndarray]:
+        """사용자별 기본 투자 지표 계산 (user_codes: 0..n_users-1 사용자 코드)"""
+        n = len(columns)
+        if n == 0:
+            zeros = np.zeros(n_users)
+            return {
+                'avg_holding_period': zeros,
+                'turnover_rate': zeros,
+                'win_loss_ratio': zeros,
+                'win_rate': zeros,
+                'total_trades': np.zeros(n_users, dtype=np.int64),
+                'avg_trade_size': zeros
+            }
+        if lots is None:
+            lots = _match_lots(columns, user_codes)
+        
+        # 평균 보유기간: 청산 수량 가중 평균 보유일수
+        lot_users = user_codes[lots.sell_index]
+        matched_qty = np.bincount(lot_users, weights=lots.quantity, minlength=n_users)
+        held_qty_days = np.bincount(lot_users, weights=lots.holding_days * lots.quantity,
+                                    minlength=n_users)
+        avg_holding = safe_divide(held_qty_days, matched_qty)
+        
+        # 매도 거래 단위 실현 손익 / 매입 원가
+        realized = np.bincount(lots.sell_index, weights=lots.pnl, minlength=n)
+        matched_cost = np.bincount(lots.sell_index, weights=lots.cost, minlength=n)
+        closed = matched_cost > 0
+        is_gain = closed & (realized > 0)
+        is_loss = closed & (realized < 0)
+        
+        closed_count = np.bincount(user_codes, weights=closed, minlength=n_users)
+        gain_count = np.bincount(user_codes, weights=is_gain, minlength=n_users)
+        loss_count = np.bincount(user_codes, weights=is_loss, minlength=n_users)
+        gain_sum = np.bincount(user_codes, weights=np.where(is_gain, realized, 0.0), minlength=n_users)
+        loss_sum = np.bincount(user_codes, weights=np.where(is_loss, -realized, 0.0), minlength=n_users)
         
-        # 회전율 계산
-        turnover_rate = np.random.uniform(20, 80)  # 20-80% 사이
+        # 승률 (%)
+        win_rate = safe_divide(gain_count, closed_count) * 100
         
-        # 승률 계산
-        win_rate = np.random.uniform(35, 65)  # 35-65% 사이
+        # 익절/손절 비율: 평균 이익 / 평균 손실 (손실 거래가 없으면 0)
+        win_loss_ratio = safe_divide(
+            safe_divide(gain_sum, gain_count),
+            safe_divide(loss_sum, loss_count)
+        )
+        
+        # 월 회전율 (%): 월평균 거래대금의 절반 / 평균 보유 원가
+        turnover_rate = self._turnover_by_user(columns, user_codes, n_users, matched_cost)
         
-        # 익절/손절 비율
-        win_loss_ratio = np.random.uniform(0.5, 2.0)
+        trade_count = np.bincount(user_codes, minlength=n_users)
+        value_sum = np.bincount(user_codes, weights=columns.values, minlength=n_users)
         
         return {
             'avg_holding_period': avg_holding,
             'turnover_rate': turnover_rate,
             'win_loss_ratio': win_loss_ratio,
             'win_rate': win_rate,
-            'total_trades': len(transactions),
-            'avg_trade_size': transactions['value'].mean() if 'value' in transactions else 1000000
+            'total_trades': trade_count,
+            'avg_trade_size': safe_divide(value_sum, trade_count)
         }
     
-    async def _analyze_behavioral_biases(self, transactions: pd.DataFrame, 
+    def _turnover_by_user(self, columns: TransactionColumns, user_codes: np.ndarray,
+                          n_users: int, matched_cost: np.ndarray) -> np.ndarray:
+        """사용자별 보유 원가 대비 월 회전율 계산"""
+        amounts = columns.shares * columns.prices
+        
+        # 사용자 > 날짜 순으로 정렬 후 거래 시점별 보유 원가를 누적
+        # (매수는 +거래대금, 매도는 -매칭된 원가)
+        order = np.lexsort((columns.days, user_codes))
+        users = user_codes[order]
+        sorted_days = columns.days[order]
+        flow = np.where(columns.is_buy, amounts, -matched_cost)[order]
+        starts = np.searchsorted(users, np.arange(n_users))
+        ends = np.maximum(np.r_[starts[1:], len(users)] - 1, starts)
+        present = starts < len(users)
+        starts = np.minimum(starts, len(users) - 1)
+        ends = np.minimum(ends, len(users) - 1)
+        
+        book = np.cumsum(flow)
+        book -= (book[starts] - flow[starts])[users]
+        avg_book = safe_divide(np.bincount(users, weights=book, minlength=n_users),
+                                np.bincount(users, minlength=n_users))
+        
+        months = np.maximum((sorted_days[ends] - sorted_days[starts]) / 30, 1.0)
+        traded = np.bincount(user_codes, weights=amounts, minlength=n_users)
+        return np.where(present, safe_divide(traded / 2 / months, avg_book) * 100, 0.0)
+    
+    async def _analyze_behavioral_biases(self, transactions: Union[pd.DataFrame, TransactionColumns], 
                                        market_data: Optional[pd.DataFrame]) -> Dict:
         """행동경제학적 편향 분석"""
-        # FOMO 패턴 (데모용)
-        fomo_count = np.random.randint(3, 20)
+        columns = as_columns(transactions)
+        user_codes = np.zeros(len(columns), dtype=np.int64)
+        metrics = self._behavioral_biases_by_user(
+            columns, _as_prices(market_data, columns.stock_table), user_codes, 1
+        )
+        return {key: values[0].item() for key, values in metrics.items()}
+    
+    def _behavioral_biases_by_user(self, columns: TransactionColumns,
+                                   prices: Optional[PriceColumns],
+                                   user_codes: np.ndarray, n_users: int,
+                                   lots: Optional[LotMatches] = None) -> Dict[str, np.ndarray]:
+        """사용자별 행동경제학적 편향 분석
+        
+        시세가 없으면 거래 체결가로 만든 일별 가격을 쓴다.
+        """
+        if lots is None:
+            lots = _match_lots(columns, user_codes)
         
-        # 손실 확정 지연
-        loss_delay_rate = np.random.uniform(0.1, 0.5)
+        # FOMO 패턴: 직전 N거래일 상승률이 임계값을 넘은 뒤의 매수
+        fomo_count = np.zeros(n_users, dtype=np.int64)
+        if len(columns) > 0:
+            if prices is None:
+                prices = PriceColumns.from_transactions(columns)
+            prior_return = _prior_returns(
+                columns.stock_codes, columns.days, prices, self.thresholds['fomo_lookback']
+            )
+            is_fomo = columns.is_buy & (prior_return > self.thresholds['fomo_threshold'])
+            fomo_count = np.bincount(user_codes[is_fomo], minlength=n_users)
+        
+        # 손실 확정 지연: 손실 로트가 이익 로트보다 얼마나 더 오래 보유되었는지
+        # (1 - 이익 로트 평균 보유일 / 손실 로트 평균 보유일, 0 이상)
+        lot_users = user_codes[lots.sell_index]
+        weighted_days = lots.holding_days * lots.quantity
+        is_win = lots.pnl > 0
+        is_loss = lots.pnl < 0
+        win_hold = safe_divide(
+            np.bincount(lot_users, weights=np.where(is_win, weighted_days, 0.0), minlength=n_users),
+            np.bincount(lot_users, weights=np.where(is_win, lots.quantity, 0.0), minlength=n_users)
+        )
+        loss_hold = safe_divide(
+            np.bincount(lot_users, weights=np.where(is_loss, weighted_days, 0.0), minlength=n_users),
+            np.bincount(lot_users, weights=np.where(is_loss, lots.quantity, 0.0), minlength=n_users)
+        )
+        loss_delay_rate = np.maximum(1 - safe_divide(win_hold, loss_hold), 0.0)
+        loss_delay_rate[(win_hold == 0) | (loss_hold == 0)] = 0.0
         
         return {
             'fomo_count': fomo_count,
-            'loss_delay_rate': loss_delay_rate,
-            'herding_score': np.random.uniform(0, 1),
-            'overconfidence_score': np.random.uniform(0, 1)
+            'loss_delay_rate': loss_delay_rate
         }
     
-    async def _analyze_portfolio_risk(self, transactions: pd.DataFrame) -> Dict:
+    async def _analyze_portfolio_risk(self, transactions: Union[pd.DataFrame, TransactionColumns],
+                                      market_data: Optional[pd.DataFrame] = None) -> Dict:
         """포트폴리오 리스크 분석"""
-        # 섹터 집중도 (데모용)
-        sectors = ['IT', '금융', '바이오', '소비재', '산업재']
-        sector_weights = np.random.dirichlet(np.ones(len(sectors)))
-        sector_concentration = {sector: weight for sector, weight in zip(sectors, sector_weights)}
+        columns = as_columns(transactions)
+        user_codes = np.zeros(len(columns), dtype=np.int64)
+        metrics = self._portfolio_risk_by_user(
+            columns, user_codes, 1, _as_prices(market_data, columns.stock_table)
+        )
+        return {
+            'volatility': metrics['volatility'][0].item(),
+            'sector_concentration': metrics['sector_concentration'][0],
+            'max_drawdown': metrics['max_drawdown'][0].item(),
+            'cash_ratio': metrics['cash_ratio'][0].item()
+        }
+    
+    def _portfolio_risk_by_user(self, columns: TransactionColumns, user_codes: np.ndarray,
+                                n_users: int, prices: Optional[PriceColumns] = None) -> Dict:
+        """사용자별 포트폴리오 리스크 분석
+        
+        거래 내역으로 (일 × 종목) 보유 수량 행렬을 만들고 종가 행렬과 곱해 평가금액
+        시계열을 구한 뒤 변동성, MDD, 현금 비중, 섹터 집중도를 계산한다.
+        시세에 없는 종목/일자는 거래 체결가로 보완한다.
+        """
+        sector_concentration = [{} for _ in range(n_users)]
+        if len(columns) == 0:
+            return {
+                'volatility': np.zeros(n_users),
+                'sector_concentration': sector_concentration,
+                'max_drawdown': np.zeros(n_users),
+                'cash_ratio': np.zeros(n_users),
+                'position_user': np.zeros(0, dtype=np.int64),
+                'position_stock': np.zeros(0, dtype=np.int64),
+                'position_value': np.zeros(0)
+            }
+        
+        daily = PriceColumns.from_transactions(columns)
+        if prices is not None:
+            daily = prices.merged_over(daily)
+        
+        # 이 묶음에 등장하는 종목만 0..n-1로 재색인하고 전체 거래일 달력 구성
+        n_trades = len(columns)
+        stocks, stock_index = np.unique(
+            np.concatenate([columns.stock_codes, daily.stock_codes]), return_inverse=True
+        )
+        trade_stock = stock_index[:n_trades]
+        price_stock = stock_index[n_trades:]
+        calendar = np.unique(np.concatenate([daily.days, columns.days]))
+        close_matrix = risk_engine.price_matrix(
+            price_stock, daily.days, daily.closes, len(stocks), calendar
+        )
         
-        # 변동성
-        volatility = np.random.uniform(8, 25)
+        n_sectors = max(len(columns.sector_table), 1)
+        stock_sector = np.zeros(len(stocks), dtype=np.int64)
+        stock_sector[trade_stock] = columns.sector_codes
         
-        # MDD
-        max_drawdown = np.random.uniform(5, 30)
+        amounts = columns.shares * columns.prices
+        signed_shares = np.where(columns.is_buy, columns.shares, -columns.shares)
+        cash_flows = np.where(columns.is_buy, -amounts, amounts)
+        trade_rows = np.searchsorted(calendar, columns.days)
         
-        # 현금 비중
-        cash_ratio = np.random.uniform(0.05, 0.3)
+        # (사용자, 종목) 쌍마다 한 열을 두고 전체 사용자를 한 번에 계산
+        # 열은 사용자 순으로 정렬되어 사용자별 평가금액은 열 구간 합이 된다
+        user_codes = np.asarray(user_codes, dtype=np.int64)
+        pairs, pair_index = np.unique(user_codes * len(stocks) + trade_stock, return_inverse=True)
+        pair_user = pairs // len(stocks)
+        pair_stock = pairs % len(stocks)
+        first_rows = np.full(n_users, len(calendar))
+        np.minimum.at(first_rows, user_codes, trade_rows)
+        
+        holdings = risk_engine.holdings_matrix(
+            trade_rows, pair_index, signed_shares, len(calendar), len(pairs)
+        )
+        cash = risk_engine.cash_matrix(trade_rows, user_codes, cash_flows, len(calendar), n_users)
+        risk = risk_engine.analyze_risk_grouped(
+            holdings, close_matrix[:, pair_stock], pair_user, cash, first_rows
+        )
+        
+        # 사용자 × 섹터 평가금액 → 비중
+        sector_values = np.bincount(
+            pair_user * n_sectors + stock_sector[pair_stock], weights=risk.position_values,
+            minlength=n_users * n_sectors
+        ).reshape(n_users, n_sectors)
+        weights = safe_divide(sector_values, sector_values.sum(axis=1, keepdims=True))
+        held_users, held_sectors = np.nonzero(weights > 0)
+        for user, sector in zip(held_users.tolist(), held_sectors.tolist()):
+            sector_concentration[user][columns.sector_table.symbols[sector]] = float(weights[user, sector])
         
         return {
-            'volatility': volatility,
+            'volatility': risk.volatility,
             'sector_concentration': sector_concentration,
-            'max_drawdown': max_drawdown,
-            'cash_ratio': cash_ratio
+            'max_drawdown': risk.max_drawdown,
+            'cash_ratio': risk.cash_ratio,
+            # (사용자, 종목) 열별 마지막 날 평가금액 (공분산 기반 예상 변동성 계산용)
+            'position_user': pair_user,
+            'position_stock': stocks[pair_stock],
+            'position_value': risk.position_values
         }
     
     def classify_investor_type(self, behavior: InvestmentBehavior) -> List[InvestorType]:
@@ -183,3 +503,8 @@ class BehaviorAnalyzer:
             types.append(InvestorType.BALANCED)
         
         return types
+
+def compute_behavior_metrics(columns: TransactionColumns, prices: Optional[PriceColumns],
+                             user_codes: np.ndarray, n_users: int) -> Dict:
+    """분석 실행기 작업 함수: 컬럼형 거래/시세에서 사용자별 지표 배열 계산"""
+    return BehaviorAnalyzer()._metrics_by_user(columns, prices, user_codes, n_users)
@@ -0,0 +1,406 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+import numpy as np
+import pandas as pd
+
+from ..config import Config, Constants
+from .analysis_executor import AnalysisExecutor, analysis_executor
+from .behavior_analyzer import InvestmentBehavior, _prior_returns
+from .transaction_columns import PriceColumns, TransactionColumns
+
+# 거래 묶음(또는 전체 이력)의 종목 종가를 불러오는 함수 (없으면 None)
+PricesLoader = Callable[[TransactionColumns], Awaitable[Optional[PriceColumns]]]
+
+_FORMAT_VERSION = 1
+
+# 직렬화 대상 스칼라 필드 (정수 필드는 복원 시 int로 되돌린다)
+_SCALAR_FIELDS = (
+    'trade_count', 'value_sum', 'traded_value',
+    'book', 'book_sum', 'max_book', 'first_day', 'last_day',
+    'matched_qty', 'held_qty_days', 'win_qty', 'win_hold_days', 'loss_qty', 'loss_hold_days',
+    'closed_count', 'gain_count', 'loss_count', 'gain_sum', 'loss_sum',
+    'realized_pnl', 'pnl_peak', 'max_drawdown_amount', 'fomo_count'
+)
+_INT_FIELDS = frozenset({
+    'trade_count', 'first_day', 'last_day', 'closed_count', 'gain_count', 'loss_count', 'fomo_count'
+})
+_HEADER = struct.Struct('<B' + 'd' * len(_SCALAR_FIELDS))
+
+def _epoch_day(date) -> int:
+    return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64))
+
+class BehaviorState:
+    """사용자별 증분 행동 상태
+
+    거래가 한 건 추가될 때마다 분할상환 O(1)로 갱신되는 누적기.
+    미청산 로트(FIFO 큐), 실현 손익 합계, 거래 건수, 회전율 계산용 누적 합계,
+    실현 손익 기준 최고점을 보관하며 언제든 InvestmentBehavior를 만들 수 있다.
+    거래는 날짜순으로 추가된다고 가정하며, 매도 시점마다 남은 로트가 충분하면 기본 지표는
+    BehaviorAnalyzer(match_fifo)의 전체 재계산 결과와 같다.
+
+    거래 내역 이전 보유분 매도는 두 방식 모두 원가를 알 수 없어 손익 집계에서 빼지만,
+    어떤 물량을 기초 보유분으로 보는지가 다르다. match_fifo는 전체 이력에서 부족분을
+    미리 계산해 기초 로트를 가장 먼저 소진하고(기초 보유분이 가장 오래된 로트),
+    증분 상태는 미래 거래를 모르므로 알려진 로트를 먼저 소진하고 남은 수량만 기초
+    보유분으로 본다. 매도가 보유 수량을 넘은 뒤 같은 종목을 다시 사고파는 이력에서는
+    청산 로트의 짝과 보유일수가 달라질 수 있다.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.open_lots: Dict[str, Deque[List[float]]] = {}
+        self.sectors: Dict[str, str] = {}
+
+        # 거래 건수 / 거래대금
+        self.trade_count = 0
+        self.value_sum = 0.0
+        self.traded_value = 0.0
+
+        # 회전율 계산 구간 (거래 시점별 보유 원가 합계, 첫/마지막 거래일)
+        self.book = 0.0
+        self.book_sum = 0.0
+        self.max_book = 0.0
+        self.first_day = 0
+        self.last_day = 0
+
+        # 청산 로트 (수량 가중 보유일수, 승/패 보유일수)
+        self.matched_qty = 0.0
+        self.held_qty_days = 0.0
+        self.win_qty = 0.0
+        self.win_hold_days = 0.0
+        self.loss_qty = 0.0
+        self.loss_hold_days = 0.0
+
+        # 매도 거래 단위 실현 손익
+        self.closed_count = 0
+        self.gain_count = 0
+        self.loss_count = 0
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+
+        # 실현 손익 누적 곡선의 최고점과 최대 낙폭
+        self.realized_pnl = 0.0
+        self.pnl_peak = 0.0
+        self.max_drawdown_amount = 0.0
+
+        self.fomo_count = 0
+
+    @classmethod
+    def from_transactions(cls, user_id: str, transactions: pd.DataFrame) -> 'BehaviorState':
+        """거래 DataFrame을 날짜순으로 재생해 상태 생성"""
+        state = cls(user_id)
+        state.apply_frame(transactions)
+        return state
+
+    def apply_frame(self, transactions: pd.DataFrame):
+        """거래 DataFrame을 날짜순으로 반영 (prior_return 컬럼이 있으면 FOMO 매수 판정에 사용)"""
+        ordered = transactions.sort_values('date', kind='stable')
+        for row in ordered.itertuples(index=False):
+            prior_return = getattr(row, 'prior_return', None)
+            self.apply_trade(
+                stock_code=row.stock_code,
+                date=row.date,
+                side=row.type,
+                shares=row.shares,
+                price=row.price,
+                sector=getattr(row, 'sector', None),
+                value=getattr(row, 'value', None),
+                prior_return=None if prior_return is None or np.isnan(prior_return) else prior_return
+            )
+
+    def apply_columns(self, columns: TransactionColumns, prices: Optional[PriceColumns] = None):
+        """컬럼형 거래 묶음 반영 (시세가 있으면 매수 직전 N거래일 상승률로 FOMO 매수 판정)"""
+        frame = columns.to_frame()
+        if prices is not None and len(prices) > 0:
+            frame['prior_return'] = _prior_returns(
+                columns.stock_codes, columns.days, prices, Constants.BEHAVIOR_THRESHOLDS['fomo_lookback']
+            )
+        self.apply_frame(frame)
+
+    def apply_trade(self, stock_code: str, date, side: str, shares: float, price: float,
+                    sector: Optional[str] = None, value: Optional[float] = None,
+                    prior_return: Optional[float] = None):
+        """거래 한 건 반영
+
+        Args:
+            prior_return: 매수 직전 N일 주가 상승률 (FOMO 매수 판정용, 선택)
+        """
+        day = _epoch_day(date)
+        shares = float(shares)
+        price = float(price)
+        amount = shares * price
+
+        if self.trade_count == 0:
+            self.first_day = day
+        self.last_day = max(self.last_day, day)
+        self.trade_count += 1
+        self.value_sum += amount if value is None else float(value)
+        self.traded_value += amount
+        if sector is not None:
+            self.sectors[stock_code] = sector
+
+        lots = self.open_lots.setdefault(stock_code, deque())
+        if side == 'buy':
+            if shares > 0:
+                lots.append([shares, price, day])
+            self.book += amount
+            if (prior_return is not None
+                    and prior_return > Constants.BEHAVIOR_THRESHOLDS['fomo_threshold']):
+                self.fomo_count += 1
+        else:
+            self._close_lots(lots, shares, price, day)
+            if not lots:
+                del self.open_lots[stock_code]
+
+        self.book_sum += self.book
+        self.max_book = max(self.max_book, self.book)
+
+    def _close_lots(self, lots: Deque[List[float]], shares: float, price: float, day: int):
+        """매도 수량을 가장 오래된 로트부터 소진"""
+        remaining = shares
+        pnl = 0.0
+        cost = 0.0
+        while remaining > 0 and lots:
+            lot = lots[0]
+            qty = min(remaining, lot[0])
+            lot_pnl = qty * (price - lot[1])
+            held = day - lot[2]
+
+            pnl += lot_pnl
+            cost += qty * lot[1]
+            self.matched_qty += qty
+            self.held_qty_days += qty * held
+            if lot_pnl > 0:
+                self.win_qty += qty
+                self.win_hold_days += qty * held
+            elif lot_pnl < 0:
+                self.loss_qty += qty
+                self.loss_hold_days += qty * held
+
+            lot[0] -= qty
+            remaining -= qty
+            if lot[0] <= 0:
+                lots.popleft()
+
+        # 남은 수량은 거래 내역 이전 보유분 매도로 보고 손익에서 제외 (전부 그렇다면 기록 없음)
+        if cost <= 0:
+            return
+
+        self.book -= cost
+        self.closed_count += 1
+        if pnl > 0:
+            self.gain_count += 1
+            self.gain_sum += pnl
+        elif pnl < 0:
+            self.loss_count += 1
+            self.loss_sum -= pnl
+
+        self.realized_pnl += pnl
+        self.pnl_peak = max(self.pnl_peak, self.realized_pnl)
+        self.max_drawdown_amount = max(self.max_drawdown_amount, self.pnl_peak - self.realized_pnl)
+
+    def to_behavior(self, analysis_date: Optional[datetime] = None) -> InvestmentBehavior:
+        """현재 상태로 InvestmentBehavior 생성
+
+        가격 시계열이 필요한 변동성과 현금 비중은 0으로 두고, 최대 낙폭은
+        실현 손익 곡선의 낙폭을 최대 보유 원가 대비 비율(%)로 나타낸다.
+        """
+        avg_book = self.book_sum / self.trade_count if self.trade_count else 0.0
+        months = max((self.last_day - self.first_day) / 30, 1.0)
+        avg_gain = self.gain_sum / self.gain_count if self.gain_count else 0.0
+        avg_loss = self.loss_sum / self.loss_count if self.loss_count else 0.0
+        win_hold = self.win_hold_days / self.win_qty if self.win_qty else 0.0
+        loss_hold = self.loss_hold_days / self.loss_qty if self.loss_qty else 0.0
+
+        return InvestmentBehavior(
+            user_id=self.user_id,
+            analysis_date=analysis_date or datetime.now(),
+            avg_holding_period=self.held_qty_days / self.matched_qty if self.matched_qty else 0.0,
+            turnover_rate=self.traded_value / 2 / months / avg_book * 100 if avg_book > 0 else 0.0,
+            win_loss_ratio=avg_gain / avg_loss if avg_loss > 0 else 0.0,
+            win_rate=self.gain_count / self.closed_count * 100 if self.closed_count else 0.0,
+            loss_delay_rate=max(1 - win_hold / loss_hold, 0.0) if win_hold > 0 and loss_hold > 0 else 0.0,
+            fomo_purchase_count=self.fomo_count,
+            portfolio_volatility=0.0,
+            sector_concentration=self._sector_concentration(),
+            total_trades=self.trade_count,
+            avg_trade_size=self.value_sum / self.trade_count if self.trade_count else 0.0,
+            max_drawdown=self.max_drawdown_amount / self.max_book * 100 if self.max_book > 0 else 0.0,
+            cash_ratio=0.0
+        )
+
+    def _sector_concentration(self) -> Dict[str, float]:
+        """미청산 로트 원가 기준 섹터 비중"""
+        sector_cost: Dict[str, float] = {}
+        for stock_code, lots in self.open_lots.items():
+            sector = self.sectors.get(stock_code, '기타')
+            sector_cost[sector] = sector_cost.get(sector, 0.0) + sum(q * p for q, p, _ in lots)
+        total = sum(sector_cost.values())
+        if total <= 0:
+            return {}
+        return {sector: cost / total for sector, cost in sector_cost.items()}
+
+    def to_bytes(self) -> bytes:
+        """영속화를 위한 압축 바이트 직렬화"""
+        header = _HEADER.pack(_FORMAT_VERSION, *(getattr(self, name) for name in _SCALAR_FIELDS))
+
+        codes = list(self.open_lots)
+        lot_counts = np.array([len(self.open_lots[c]) for c in codes], dtype=np.int32)
+        lots = np.array(
+            [lot for c in codes for lot in self.open_lots[c]], dtype=np.float64
+        ).reshape(-1, 3)
+        meta = json.dumps(
+            {'user_id': self.user_id, 'codes': codes, 'sectors': self.sectors},
+            ensure_ascii=False
+        ).encode('utf-8')
+
+        payload = b''.join([
+            header,
+            struct.pack('<II', len(meta), len(codes)),
+            meta,
+            lot_counts.tobytes(),
+            lots.tobytes()
+        ])
+        return zlib.compress(payload)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'BehaviorState':
+        """to_bytes 결과로부터 상태 복원"""
+        payload = zlib.decompress(blob)
+        fields = _HEADER.unpack_from(payload)
+        if fields[0] != _FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 상태 버전입니다: {fields[0]}")
+
+        pos = _HEADER.size
+        meta_len, n_codes = struct.unpack_from('<II', payload, pos)
+        pos += 8
+        meta = json.loads(payload[pos:pos + meta_len].decode('utf-8'))
+        pos += meta_len
+        lot_counts = np.frombuffer(payload, dtype=np.int32, count=n_codes, offset=pos)
+        pos += lot_counts.nbytes
+        lots = np.frombuffer(payload, dtype=np.float64, offset=pos).reshape(-1, 3)
+
+        state = cls(meta['user_id'])
+        state.sectors = meta['sectors']
+        for name, value in zip(_SCALAR_FIELDS, fields[1:]):
+            setattr(state, name, int(value) if name in _INT_FIELDS else value)
+
+        start = 0
+        for code, count in zip(meta['codes'], lot_counts):
+            state.open_lots[code] = deque(
+                [float(q), float(p), int(d)] for q, p, d in lots[start:start + count]
+            )
+            start += count
+        return state
+
+def rebuild_state(user_id: str, columns: TransactionColumns,
+                  prices: Optional[PriceColumns]) -> BehaviorState:
+    """분석 실행기 작업 함수: 전체 이력을 재생해 상태 생성"""
+    state = BehaviorState(user_id)
+    state.apply_columns(columns, prices)
+    return state
+
+class BehaviorStateStore:
+    """사용자별 BehaviorState 저장소
+
+    상태는 to_bytes 압축 바이트로 보관한다(경로가 있으면 SQLite, 없으면 메모리).
+    apply는 새 거래 묶음만 상태에 반영하므로 거래 한 건 추가 후의 재분석이 이력 길이와
+    무관하다. 상태가 없거나 이미 반영한 날짜보다 이른 거래가 들어오면(날짜순 가정이 깨짐)
+    history로 받은 전체 이력에서 분석 실행기로 상태를 다시 만든다.
+    """
+
+    def __init__(self, path: Optional[str] = None, executor: Optional[AnalysisExecutor] = None):
+        self.path = Config.BEHAVIOR_STATE_PATH if path is None else path
+        self.executor = executor or analysis_executor
+        self._memory: Dict[str, bytes] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # 사용자별 읽기-반영-저장 잠금 (기다리는 요청이 없으면 지운다)
+        self._user_locks: Dict[str, List] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS states (user_id TEXT PRIMARY KEY, blob BLOB NOT NULL) WITHOUT ROWID"
+            )
+        return self._db
+
+    def get(self, user_id: str) -> Optional[BehaviorState]:
+        with self._lock:
+            if not self.path:
+                blob = self._memory.get(user_id)
+            else:
+                row = self._connect().execute(
+                    "SELECT blob FROM states WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                blob = row[0] if row else None
+        return None if blob is None else BehaviorState.from_bytes(blob)
+
+    def put(self, state: BehaviorState):
+        blob = state.to_bytes()
+        with self._lock:
+            if not self.path:
+                self._memory[state.user_id] = blob
+                return
+            db = self._connect()
+            with db:
+                db.execute("INSERT OR REPLACE INTO states (user_id, blob) VALUES (?, ?)",
+                           (state.user_id, blob))
+
+    @asynccontextmanager
+    async def _user_lock(self, user_id: str) -> AsyncIterator[None]:
+        entry = self._user_locks.get(user_id)
+        if entry is None:
+            entry = self._user_locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._user_locks[user_id]
+
+    async def apply(self, user_id: str, columns: TransactionColumns,
+                    history: Callable[[], TransactionColumns],
+                    prices: Optional[PricesLoader] = None) -> BehaviorState:
+        """새 거래 묶음을 반영한 상태 저장 후 반환
+
+        같은 사용자의 읽기-반영-저장은 한 번에 하나씩 실행해 동시에 들어온 묶음이 서로를
+        덮어쓰지 않게 한다. history는 새 묶음까지 포함한 사용자 전체 이력을 돌려주는 함수로,
+        상태를 다시 만들어야 할 때만 호출된다. prices는 반영할 거래의 종가를 불러오는 함수로,
+        없거나 None을 돌려주면 그 거래들은 FOMO 매수로 세지 않는다.
+        """
+        async with self._user_lock(user_id):
+            state = self.get(user_id)
+            if state is None or (len(columns) > 0 and int(columns.days.min()) < state.last_day):
+                full = history()
+                market = await prices(full) if prices is not None else None
+                state = await self.executor.run(rebuild_state, user_id, full, market)
+            else:
+                market = await prices(columns) if prices is not None else None
+                state.apply_columns(columns, market)
+            self.put(state)
+            return state
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+# 앱 전역 행동 상태 저장소
+behavior_state_store = BehaviorStateStore()
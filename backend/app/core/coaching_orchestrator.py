@@ -1,69 +1,136 @@
+import asyncio
+import logging
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
 from .behavior_analyzer import BehaviorAnalyzer
+from .transaction_columns import PriceColumns, TransactionColumns, as_columns
 from .rule_engine import RuleEngine
 from .rebalancing_engine import RebalancingEngine
+from .covariance_cache import CovarianceMatrix, covariance_cache
+from .plan_store import plan_store
+from .report_cache import report_cache
 from .gamification_engine import GamificationEngine
+from .stage_graph import Stage, StageResults, iter_stages
+from ..config import Config
 from ..integrations.hyperclovax import HyperClovaXClient
-from ..integrations.krx_data import KRXDataClient
+from ..integrations.krx_data import krx_client
 from ..models.behavior import InvestmentBehavior  # 추가
 
+logger = logging.getLogger(__name__)
+
+# 단계 제한 시간 초과 시 대체값
+FALLBACK_BEHAVIOR_SUMMARY = "지금은 AI 요약을 불러오지 못했어요. 아래 분석 지표와 코칭 카드를 먼저 확인해보세요."
+FALLBACK_LEVEL = {'current': None, 'next': None, 'progress': 0, 'total_points': 1500}
+FALLBACK_INVESTOR_STATS = {
+    'individual': {'avg_holding_period': None, 'monthly_turnover': None, 'win_rate': None, 'avg_return': None}
+}
+
+# 리포트 항목이 되는 단계와 응답 형식 변환
+REPORT_SECTIONS = {
+    'behavior_analysis': lambda section: section,
+    'investor_types': lambda types: [t.value for t in types],
+    'behavior_summary': lambda section: section,
+    'coaching_actions': lambda section: section,
+    'rebalancing_plan': lambda section: section,
+    'gamification': lambda section: section,
+    'market_comparison': lambda section: section,
+    'improvement_goals': lambda section: section
+}
+
 class CoachingOrchestrator:
     """AI 코칭 통합 관리"""
     
     def __init__(self):
         self.behavior_analyzer = BehaviorAnalyzer()
         self.rule_engine = RuleEngine()
-        self.rebalancing_engine = RebalancingEngine()
+        self.rebalancing_engine = RebalancingEngine(plan_store)
         self.gamification_engine = GamificationEngine()
         self.llm_client = HyperClovaXClient()
-        self.krx_client = KRXDataClient()
+        self.krx_client = krx_client
+        self.covariance_cache = covariance_cache
+        self.report_cache = report_cache
     
     async def generate_comprehensive_report(self, user_id: str, 
-                                          transactions: pd.DataFrame,
-                                          include_rebalancing: bool = True) -> Dict:
-        """종합 투자 진단 리포트 생성"""
-        # 1. 행동 패턴 분석
-        behavior = await self.behavior_analyzer.analyze_behavior(transactions)
-        
-        # 2. 투자자 성향 분류
-        investor_types = self.behavior_analyzer.classify_investor_type(behavior)
-        
-        # 3. 룰 엔진 평가
-        coaching_actions = await self.rule_engine.evaluate_rules(behavior)
-        
-        # 4. AI 메시지 생성
-        behavior_summary = await self.llm_client.generate_behavior_summary(behavior, investor_types)
+                                          transactions: Union[pd.DataFrame, TransactionColumns],
+                                          include_rebalancing: bool = True,
+                                          version: Optional[Hashable] = None,
+                                          demo: bool = False) -> Dict:
+        """종합 투자 진단 리포트 생성 (같은 사용자/거래 이력 버전이면 캐시된 리포트 재사용)"""
+        return {
+            key: value async for key, value in
+            self.stream_comprehensive_report(user_id, transactions, include_rebalancing, version, demo)
+        }
+    
+    async def stream_comprehensive_report(self, user_id: str,
+                                          transactions: Union[pd.DataFrame, TransactionColumns],
+                                          include_rebalancing: bool = True,
+                                          version: Optional[Hashable] = None,
+                                          demo: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """종합 리포트를 (항목 이름, 내용) 순서로 생성
+
+        각 항목은 해당 단계가 끝나는 즉시 나오므로 LLM 요약을 기다리지 않고 지표부터 보여줄 수 있다.
+        식별 정보(report_id, user_id, analysis_date)가 가장 먼저, degraded_stages가 가장 나중에 나온다.
+        version은 거래 이력 버전(예: 거래 저장소의 사용자 행 수)으로, 주어지면 리포트 캐시 키가 된다.
+        demo는 데모 거래 데이터 여부로, 데모 데이터로 만든 리밸런싱 계획은 실행할 수 없게 표시된다.
+        """
+        if version is not None:
+            cached = self.report_cache.get(user_id, version, include_rebalancing)
+            if cached is not None:
+                for key, value in cached.items():
+                    yield key, value
+                return
         
-        # 5. 리밸런싱 계획
-        rebalancing_plan = None
-        if include_rebalancing:
-            portfolio_df = self._get_current_portfolio(transactions)
-            rebalancing_plan = await self.rebalancing_engine.generate_rebalancing_plan(
-                portfolio_df, behavior
-            )
+        # 거래 내역은 한 번만 컬럼형으로 변환해 모든 단계가 공유
+        columns = as_columns(transactions)
         
-        # 6. 게이미피케이션
-        badges = await self.gamification_engine.check_achievements(behavior)
-        level_info = await self.gamification_engine.calculate_level(1500)  # 데모용 포인트
+        portfolio_df, demo_portfolio = self._get_current_portfolio(columns)
+        covariance = self.covariance_cache.latest()
+        report = {
+            'report_id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'analysis_date': datetime.now().isoformat()
+        }
+        for key, value in report.items():
+            yield key, value
         
-        # 7. KRX 통계 비교
-        investor_stats = await self.krx_client.get_investor_stats()
+        # 단계 의존 그래프로 실행: 서로 독립인 단계는 동시에 돌고, 외부 호출 단계가
+        # 제한 시간을 넘기면 대체값으로 채워 리포트 지연이 가장 느린 외부 호출에 묶이지 않게 한다
+        stages = StageResults(values={})
+        async for name, value, _ in iter_stages(
+            self._report_stages(
+                user_id, columns, portfolio_df, covariance, include_rebalancing, demo or demo_portfolio
+            ), stages
+        ):
+            if name in REPORT_SECTIONS:
+                report[name] = REPORT_SECTIONS[name](value)
+                yield name, report[name]
         
-        # 8. 개선 목표
-        improvement_goals = self._generate_improvement_goals(behavior, investor_stats)
+        report['next_review_date'] = (datetime.now() + timedelta(days=7)).isoformat()
+        report['degraded_stages'] = list(stages.degraded)
+        yield 'next_review_date', report['next_review_date']
+        yield 'degraded_stages', report['degraded_stages']
         
-        return {
-            'report_id': str(uuid.uuid4()),
-            'user_id': user_id,
-            'analysis_date': datetime.now().isoformat(),
-            'behavior_analysis': behavior.to_dict(),
-            'investor_types': [t.value for t in investor_types],
-            'behavior_summary': behavior_summary,
-            'coaching_actions': [
+        # 대체값이 섞인 리포트는 다음 요청에서 다시 계산하도록 캐시하지 않음
+        if version is not None and not stages.degraded:
+            self.report_cache.put(user_id, version, report, include_rebalancing)
+    
+    def _report_stages(self, user_id: str, columns: TransactionColumns, portfolio_df: pd.DataFrame,
+                       covariance: Optional[CovarianceMatrix], include_rebalancing: bool,
+                       demo: bool = False) -> List[Stage]:
+        """리포트 생성 단계 정의
+
+        이름이 REPORT_SECTIONS에 있는 단계의 결과가 리포트 항목이 된다.
+        행동 분석은 리포트의 근간이라 대체값 없이 실패를 그대로 올리고,
+        LLM/KRX/리밸런싱/게이미피케이션은 제한 시간 초과 시 대체값으로 채운다.
+        시세 조회가 늦으면 행동 분석은 체결가로 만든 일별 가격으로 진행한다.
+        """
+        async def coaching_actions(behavior, risk_context):
+            actions = await self.rule_engine.evaluate_rules(behavior, risk_context)
+            return [
                 {
                     'action_id': action.action_id,
                     'type': action.action_type,
@@ -73,33 +140,112 @@ class CoachingOrchestrator:
                     'recommendation': action.recommendation,
                     'expected_impact': action.expected_impact
                 }
-                for action in coaching_actions[:3]  # 상위 3개만
-            ],
-            'rebalancing_plan': rebalancing_plan,
-            'gamification': {
-                'new_badges': badges,
-                'level': level_info,
-                'points': 1500
-            },
-            'market_comparison': {
+                for action in actions[:3]  # 상위 3개만
+            ]
+        
+        async def rebalancing_plan(behavior):
+            if not include_rebalancing:
+                return None
+            return await self.rebalancing_engine.generate_rebalancing_plan(
+                portfolio_df, behavior, covariance=covariance, user_id=user_id, demo=demo
+            )
+        
+        async def gamification(behavior):
+            badges = await self.gamification_engine.check_achievements(behavior)
+            level_info = await self.gamification_engine.calculate_level(1500)  # 데모용 포인트
+            return {'new_badges': badges, 'level': level_info, 'points': 1500}
+        
+        def market_comparison(behavior, investor_stats):
+            return {
                 'your_metrics': {
                     'avg_holding_period': behavior.avg_holding_period,
                     'turnover_rate': behavior.turnover_rate,
                     'win_rate': behavior.win_rate
                 },
                 'market_average': investor_stats['individual']
-            },
-            'improvement_goals': improvement_goals,
-            'next_review_date': (datetime.now() + timedelta(days=7)).isoformat()
-        }
+            }
+        
+        return [
+            # 1. 행동 패턴 분석 (거래 종목 일별 종가로 FOMO/리스크 계산)
+            Stage('market_data', lambda: self._market_data(columns),
+                  timeout=Config.KRX_STAGE_TIMEOUT, fallback=None),
+            Stage('behavior', lambda market_data: self.behavior_analyzer.analyze_behavior(columns, market_data, covariance),
+                  ('market_data',), timeout=Config.BEHAVIOR_STAGE_TIMEOUT),
+            Stage('risk_context', lambda behavior: self._risk_context(portfolio_df, behavior, covariance),
+                  ('behavior',), fallback=dict),
+            Stage('behavior_analysis', lambda behavior, risk_context: {**behavior.to_dict(), **risk_context},
+                  ('behavior', 'risk_context')),
+            # 2. 투자자 성향 분류
+            Stage('investor_types', self.behavior_analyzer.classify_investor_type, ('behavior',)),
+            # 3. 룰 엔진 평가 (공분산 캐시가 있으면 보유 종목 예상 변동성 포함)
+            Stage('coaching_actions', coaching_actions, ('behavior', 'risk_context')),
+            # 4. AI 메시지 생성
+            Stage('behavior_summary', self.llm_client.generate_behavior_summary, ('behavior', 'investor_types'),
+                  timeout=Config.LLM_STAGE_TIMEOUT, fallback=FALLBACK_BEHAVIOR_SUMMARY),
+            # 5. 리밸런싱 계획
+            Stage('rebalancing_plan', rebalancing_plan, ('behavior',),
+                  timeout=Config.REBALANCING_STAGE_TIMEOUT, fallback=None),
+            # 6. 게이미피케이션
+            Stage('gamification', gamification, ('behavior',),
+                  timeout=Config.GAMIFICATION_STAGE_TIMEOUT,
+                  fallback=lambda: {'new_badges': [], 'level': FALLBACK_LEVEL, 'points': 1500}),
+            # 7. KRX 통계 비교 (행동 분석과 동시에 시작)
+            Stage('investor_stats', self.krx_client.get_investor_stats,
+                  timeout=Config.KRX_STAGE_TIMEOUT, fallback=lambda: FALLBACK_INVESTOR_STATS),
+            Stage('market_comparison', market_comparison, ('behavior', 'investor_stats')),
+            # 8. 개선 목표
+            Stage('improvement_goals', lambda behavior, investor_stats: self._generate_improvement_goals(behavior, investor_stats),
+                  ('behavior', 'investor_stats'))
+        ]
     
-    def _get_current_portfolio(self, transactions: pd.DataFrame) -> pd.DataFrame:
-        """현재 포트폴리오 추출 (데모용)"""
+    async def market_data(self, columns: TransactionColumns) -> Optional[PriceColumns]:
+        """리포트 단계 밖(거래 저장, 일괄 분석)에서 쓰는 거래 종목 종가 (제한 시간 초과/실패 시 None)"""
+        try:
+            return await asyncio.wait_for(self._market_data(columns), Config.KRX_STAGE_TIMEOUT)
+        except Exception as e:
+            logger.warning("시세 조회 실패, 시세 없이 진행: %r", e)
+            return None
+    
+    async def _market_data(self, columns: TransactionColumns) -> Optional[PriceColumns]:
+        """거래 종목의 첫 거래일 직전부터 오늘까지 일별 종가 (거래가 없으면 None)
+
+        FOMO 판정은 첫 매수 직전 N거래일 상승률도 필요하므로 주말/휴장일을 감안해
+        N거래일의 두 배에 일주일을 더한 만큼 앞에서부터 조회한다.
+        """
+        if len(columns) == 0:
+            return None
+        tickers = columns.stock_table.lookup(np.unique(columns.stock_codes)).tolist()
+        lookback = timedelta(days=self.behavior_analyzer.thresholds['fomo_lookback'] * 2 + 7)
+        start = np.datetime64(int(columns.days.min()), 'D').astype(date) - lookback
+        matrix = await self.krx_client.get_price_matrix(tickers, start, date.today())
+        return matrix.to_price_columns(columns.stock_table)
+    
+    def _get_current_portfolio(self, columns: TransactionColumns) -> Tuple[pd.DataFrame, bool]:
+        """현재 포트폴리오와 데모 여부 (거래 내역상 보유 종목이 없으면 데모 포트폴리오)"""
+        positions = columns.positions()
+        if len(positions) > 0:
+            return positions, False
         return pd.DataFrame([
-            {'stock_code': 'A005930', 'stock_name': '삼성전자', 'sector': 'IT', 'value': 3500000},
-            {'stock_code': 'A035720', 'stock_name': '카카오', 'sector': 'IT', 'value': 2500000},
-            {'stock_code': 'A000660', 'stock_name': 'SK하이닉스', 'sector': 'IT', 'value': 2000000}
-        ])
+            {'stock_code': 'A005930', 'stock_name': '삼성전자', 'sector': 'IT', 'shares': 50, 'current_price': 70000, 'value': 3500000},
+            {'stock_code': 'A035720', 'stock_name': '카카오', 'sector': 'IT', 'shares': 50, 'current_price': 50000, 'value': 2500000},
+            {'stock_code': 'A000660', 'stock_name': 'SK하이닉스', 'sector': 'IT', 'shares': 20, 'current_price': 100000, 'value': 2000000}
+        ]), True
+    
+    def _risk_context(self, portfolio: pd.DataFrame, behavior: InvestmentBehavior,
+                      covariance: Optional[CovarianceMatrix]) -> Dict:
+        """공분산 캐시 기반 보유 종목 예상 변동성 (%, 현금 비중 반영)
+
+        거래 내역상 보유 종목이 있으면 행동 분석에서 계산한 값을 쓰고,
+        데모 포트폴리오일 때만 여기서 계산한다.
+        """
+        if behavior.expected_volatility is not None and behavior.sector_concentration:
+            return {'expected_volatility': behavior.expected_volatility}
+        if covariance is None or len(portfolio) == 0:
+            return {}
+        values = portfolio['value'].to_numpy(dtype=float)
+        weights = values / values.sum() * (1 - behavior.cash_ratio) if values.sum() > 0 else values
+        volatility = covariance.portfolio_volatility(portfolio['stock_code'].tolist(), weights)
+        return {'expected_volatility': volatility * 100}
     
     def _generate_improvement_goals(self, behavior: InvestmentBehavior, market_stats: Dict) -> Dict:
         """개선 목표 생성"""
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from ..config import Config
+from .risk_engine import TRADING_DAYS_PER_YEAR
+
+logger = logging.getLogger(__name__)
+
+# 종가 불러오기 함수: (기준 거래일, 종가 행렬, 종목 목록), 불러올 시세가 없으면 None
+ClosesLoader = Callable[[], Awaitable[Optional[Tuple[date, np.ndarray, Sequence[str]]]]]
+
+def daily_returns(closes: np.ndarray) -> np.ndarray:
+    """(일 × 종목) 종가 행렬의 일간 수익률 (가격이 없는 날은 0)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    prev = closes[:-1]
+    returns = np.divide(closes[1:], prev, out=np.full(prev.shape, np.nan),
+                        where=np.isfinite(prev) & (prev > 0)) - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Ledoit-Wolf 축소 공분산 (축소 대상: 평균 분산 × 단위행렬)
+
+    표본 공분산의 추정 오차가 가장 작아지는 축소 강도를 닫힌 식으로 구한다.
+    Returns: (공분산, 축소 강도)
+    """
+    n_obs, n_assets = returns.shape
+    x = returns - returns.mean(axis=0)
+    sample = x.T @ x / n_obs
+    if n_obs < 2 or n_assets == 0:
+        return sample, 0.0
+
+    x2 = x ** 2
+    mu = np.trace(sample) / n_assets
+    delta_ = np.sum(sample ** 2)
+    beta_ = np.sum(x2.T @ x2) / n_obs ** 2
+    delta = (delta_ - 2 * mu * np.trace(sample) + n_assets * mu ** 2) / n_assets
+    beta = min((beta_ - delta_ / n_obs) / n_assets, delta)
+    shrinkage = beta / delta if delta > 0 else 0.0
+    shrinkage = float(min(max(shrinkage, 0.0), 1.0))
+
+    covariance = (1 - shrinkage) * sample
+    covariance.flat[::n_assets + 1] += shrinkage * mu
+    return covariance, shrinkage
+
+def ewma_covariance(returns: np.ndarray, halflife: float) -> np.ndarray:
+    """지수가중 공분산 (최근 관측일수록 큰 가중치, halflife 거래일마다 절반)"""
+    n_obs = len(returns)
+    decay = 0.5 ** (1.0 / halflife)
+    weights = decay ** np.arange(n_obs - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    x = returns - weights @ returns
+    return (x * weights[:, None]).T @ x
+
+def estimate_covariance(closes: np.ndarray, method: str = 'shrinkage',
+                        halflife: float = 60) -> np.ndarray:
+    """종가 행렬로 연환산 공분산 추정 (method: 'shrinkage' 또는 'ewma')"""
+    returns = daily_returns(closes)
+    if method == 'shrinkage':
+        covariance, _ = ledoit_wolf(returns)
+    elif method == 'ewma':
+        covariance = ewma_covariance(returns, halflife)
+    else:
+        raise ValueError(f"지원하지 않는 공분산 추정 방식입니다: {method}")
+    return covariance * TRADING_DAYS_PER_YEAR
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    vols = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    outer = np.outer(vols, vols)
+    correlation = np.divide(covariance, outer, out=np.zeros_like(covariance), where=outer > 0)
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+@dataclass
+class CovarianceMatrix:
+    """특정 거래일의 종목 공분산/상관계수 (연환산, 비율 단위)"""
+    as_of: str
+    tickers: List[str]
+    covariance: np.ndarray
+    correlation: np.ndarray
+    method: str = 'shrinkage'
+    index: Dict[str, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        if not self.index:
+            self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def positions(self, tickers: Sequence[str]) -> np.ndarray:
+        """종목 코드의 행렬 위치 (없는 종목은 -1)"""
+        return np.array([self.index.get(ticker, -1) for ticker in tickers], dtype=np.int64)
+
+    def submatrix(self, tickers: Sequence[str]) -> np.ndarray:
+        """지정 종목 순서의 공분산 (행렬에 없는 종목의 행/열은 0)"""
+        pos = self.positions(tickers)
+        found = pos >= 0
+        result = np.zeros((len(pos), len(pos)))
+        result[np.ix_(found, found)] = self.covariance[np.ix_(pos[found], pos[found])]
+        return result
+
+    def portfolio_volatility(self, tickers: Sequence[str], weights: np.ndarray) -> float:
+        """비중 벡터의 예상 연환산 변동성 (비율)"""
+        weights = np.asarray(weights, dtype=np.float64)
+        variance = weights @ self.submatrix(tickers) @ weights
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def correlated_pairs(self, tickers: Sequence[str], threshold: float) -> List[Tuple[str, str, float]]:
+        """상관계수가 threshold를 넘는 종목 쌍 (상관계수 내림차순)"""
+        pos = self.positions(tickers)
+        found = np.flatnonzero(pos >= 0)
+        sub = self.correlation[np.ix_(pos[found], pos[found])]
+        rows, cols = np.nonzero(np.triu(sub > threshold, k=1))
+        order = np.argsort(-sub[rows, cols], kind='stable')
+        return [
+            (tickers[found[i]], tickers[found[j]], float(sub[i, j]))
+            for i, j in zip(rows[order], cols[order])
+        ]
+
+class CovarianceCache:
+    """거래일 단위 공분산 캐시
+
+    거래일마다 한 번만 종가로 공분산/상관계수를 추정해 날짜별 디렉터리에
+    .npy로 저장하고, 이후에는 np.load의 메모리 맵으로 열어 모든 워커 프로세스가
+    같은 페이지 캐시를 복사 없이 공유한다.
+
+    디렉터리 구성:
+        20240115/covariance.npy, correlation.npy, meta.json (종목 목록, 추정 방식)
+    """
+
+    def __init__(self, root: Optional[str] = None, method: Optional[str] = None,
+                 halflife: Optional[float] = None):
+        self.root = root or Config.COVARIANCE_CACHE_DIR
+        self.method = method or Config.COVARIANCE_METHOD
+        self.halflife = halflife or Config.COVARIANCE_HALFLIFE
+        self._loaded: Dict[str, CovarianceMatrix] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(as_of: date) -> str:
+        return as_of.strftime('%Y%m%d')
+
+    def get(self, as_of: date) -> Optional[CovarianceMatrix]:
+        """해당 거래일의 행렬 (없으면 None)"""
+        key = self._key(as_of)
+        if key not in self._loaded:
+            path = os.path.join(self.root, key)
+            if not os.path.exists(os.path.join(path, 'meta.json')):
+                return None
+            self._loaded = {key: self._load(key)}
+        return self._loaded[key]
+
+    def latest(self) -> Optional[CovarianceMatrix]:
+        """가장 최근 거래일의 행렬 (없으면 None)"""
+        if not os.path.isdir(self.root):
+            return None
+        keys = sorted(
+            name for name in os.listdir(self.root)
+            if name.isdigit() and os.path.exists(os.path.join(self.root, name, 'meta.json'))
+        )
+        if not keys:
+            return None
+        if keys[-1] not in self._loaded:
+            self._loaded = {keys[-1]: self._load(keys[-1])}
+        return self._loaded[keys[-1]]
+
+    def refresh(self, as_of: date,
+                loader: Callable[[date], Tuple[np.ndarray, Sequence[str]]]) -> CovarianceMatrix:
+        """해당 거래일 행렬을 반환하고, 없으면 loader(as_of)의 (종가 행렬, 종목 목록)으로 계산해 저장"""
+        with self._lock:
+            cached = self.get(as_of)
+            if cached is not None:
+                return cached
+            closes, tickers = loader(as_of)
+            return self.build(as_of, closes, tickers)
+
+    async def refresh_latest(self, load_closes: ClosesLoader) -> Optional[CovarianceMatrix]:
+        """load_closes()의 기준 거래일 행렬이 없으면 계산해 저장 (추정은 스레드에서 실행)"""
+        loaded = await load_closes()
+        if loaded is None:
+            return None
+        as_of, closes, tickers = loaded
+        return await asyncio.to_thread(self.refresh, as_of, lambda _: (closes, tickers))
+
+    def start(self, load_closes: ClosesLoader, refresh_seconds: Optional[float] = None):
+        """앱 시작 시 호출: 바로 한 번, 이후 주기마다 최신 거래일 행렬을 갱신하는 작업 시작"""
+        if self._task is None or self._task.done():
+            interval = refresh_seconds if refresh_seconds is not None else Config.COVARIANCE_REFRESH_SECONDS
+            self._task = asyncio.create_task(self._refresh_loop(load_closes, interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self, load_closes: ClosesLoader, interval: float):
+        while True:
+            try:
+                await self.refresh_latest(load_closes)
+            except Exception as e:
+                logger.warning("공분산 행렬 갱신 실패, 기존 행렬 유지: %r", e)
+            await asyncio.sleep(max(interval, 1.0))
+
+    def build(self, as_of: date, closes: np.ndarray, tickers: Sequence[str]) -> CovarianceMatrix:
+        """종가 행렬로 행렬을 추정해 저장하고 메모리 맵으로 다시 열기"""
+        covariance = estimate_covariance(closes, self.method, self.halflife)
+        correlation = correlation_from_covariance(covariance)
+
+        key = self._key(as_of)
+        path = os.path.join(self.root, key)
+        tmp = path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, 'covariance.npy'), covariance)
+        np.save(os.path.join(tmp, 'correlation.npy'), correlation)
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'tickers': list(tickers), 'method': self.method}, f, ensure_ascii=False)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+        self._loaded = {key: self._load(key)}
+        return self._loaded[key]
+
+    def _load(self, key: str) -> CovarianceMatrix:
+        path = os.path.join(self.root, key)
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        return CovarianceMatrix(
+            as_of=key,
+            tickers=meta['tickers'],
+            covariance=np.load(os.path.join(path, 'covariance.npy'), mmap_mode='r'),
+            correlation=np.load(os.path.join(path, 'correlation.npy'), mmap_mode='r'),
+            method=meta['method']
+        )
+
+# 앱 전역 공분산 캐시
+covariance_cache = CovarianceCache()
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .rebalancing_engine import RebalancingEngine
+
+# 모델 목표 대비 허용 비중 이탈폭 (절대값)
+DEFAULT_DRIFT_TOLERANCE = 0.05
+
+@dataclass
+class DriftReport:
+    """계좌별 비중 이탈 / 한도 위반 현황 (계좌 순서는 입력과 같다)"""
+    max_drift: np.ndarray               # 종목별 |현재 - 목표| 비중의 최대값
+    total_drift: np.ndarray             # 목표 대비 편도 회전율 (sum |차이| / 2)
+    max_single_stock: np.ndarray        # 최대 단일 종목 비중
+    max_sector_concentration: np.ndarray
+    cash_ratio: np.ndarray
+    severity: np.ndarray                # 허용폭/한도 대비 초과분 중 최대값 (0이면 정상)
+
+    @property
+    def breaching(self) -> np.ndarray:
+        """허용폭 또는 한도를 벗어난 계좌 위치"""
+        return np.flatnonzero(self.severity > 0)
+
+def measure_drift(weights: np.ndarray, targets: np.ndarray, sector_codes: np.ndarray,
+                  tolerance: float, max_single_stock: float, max_sector_concentration: float,
+                  min_cash_ratio: float) -> DriftReport:
+    """(계좌 × 종목) 비중 행렬의 목표 이탈과 리스크 한도 위반을 한 번에 계산
+
+    섹터 비중은 (종목 × 섹터) 원-핫 행렬과의 곱으로 구하고, 비중 합계의 나머지를 현금으로 본다.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    sector_codes = np.asarray(sector_codes, dtype=np.int64)
+    n_instruments = weights.shape[1]
+    n_sectors = int(sector_codes.max()) + 1 if n_instruments else 1
+
+    drift = np.abs(weights - targets)
+    max_drift = drift.max(axis=1, initial=0.0)
+    total_drift = drift.sum(axis=1) / 2
+
+    one_hot = np.zeros((n_instruments, n_sectors))
+    one_hot[np.arange(n_instruments), sector_codes] = 1.0
+    sector_weights = weights @ one_hot
+    max_sector = sector_weights.max(axis=1, initial=0.0)
+    max_single = weights.max(axis=1, initial=0.0)
+    cash_ratio = 1.0 - weights.sum(axis=1)
+
+    severity = np.maximum.reduce([
+        max_drift - tolerance,
+        max_single - max_single_stock,
+        max_sector - max_sector_concentration,
+        min_cash_ratio - cash_ratio,
+        np.zeros(len(weights))
+    ])
+    return DriftReport(max_drift, total_drift, max_single, max_sector, cash_ratio, severity)
+
+class DriftScanner:
+    """모델 포트폴리오 계좌 전체의 비중 이탈 점검기
+
+    전체 계좌를 한 번의 NumPy 연산으로 점검하고, 허용폭이나 리스크 한도를
+    벗어난 계좌에 대해서만 리밸런싱 계획을 만든다.
+    """
+
+    def __init__(self, engine: Optional[RebalancingEngine] = None,
+                 tolerance: float = DEFAULT_DRIFT_TOLERANCE):
+        self.engine = engine or RebalancingEngine()
+        self.tolerance = tolerance
+
+    def measure(self, weights: np.ndarray, targets: np.ndarray, sector_codes: np.ndarray) -> DriftReport:
+        limits = self.engine.risk_limits
+        return measure_drift(
+            weights, targets, sector_codes, self.tolerance,
+            limits['max_single_stock'], limits['max_sector_concentration'], limits['min_cash_ratio']
+        )
+
+    async def scan(self, account_ids: Sequence[str], weights: np.ndarray, targets: np.ndarray,
+                   account_values: np.ndarray, prices: np.ndarray, stock_codes: Sequence[str],
+                   sectors: Sequence[str], stock_names: Optional[Sequence[str]] = None) -> List[Dict]:
+        """이탈 계좌의 리밸런싱 작업 목록 (심각도 높은 순)
+
+        Args:
+            weights: (계좌 × 종목) 현재 비중 (행 합계의 나머지는 현금)
+            targets: 종목별 모델 목표 비중
+            account_values: 계좌별 현금 포함 총 평가금액
+            prices: 종목별 현재가
+        """
+        sector_codes, _ = pd.factorize(pd.Series(sectors))
+        report = self.measure(weights, targets, sector_codes)
+        breaching = report.breaching
+        breaching = breaching[np.argsort(-report.severity[breaching], kind='stable')]
+
+        stock_codes = np.asarray(stock_codes, dtype=object)
+        sectors = np.asarray(sectors, dtype=object)
+        stock_names = stock_codes if stock_names is None else np.asarray(stock_names, dtype=object)
+        target_weights = dict(zip(stock_codes, targets))
+
+        work = []
+        for account in breaching:
+            # 보유 중이거나 모델에 포함된 종목만 계획 대상으로 잘라낸다
+            columns = np.flatnonzero((weights[account] > 0) | (targets > 0))
+            value = account_values[account]
+            portfolio = pd.DataFrame({
+                'stock_code': stock_codes[columns],
+                'stock_name': stock_names[columns],
+                'sector': sectors[columns],
+                'shares': np.round(weights[account, columns] * value / prices[columns]),
+                'current_price': prices[columns]
+            })
+            plan = await self.engine.generate_rebalancing_plan(
+                portfolio, target_weights=target_weights,
+                cash=value * report.cash_ratio[account], user_id=account_ids[account]
+            )
+            work.append({
+                'account_id': account_ids[account],
+                'severity': float(report.severity[account]),
+                'max_drift': float(report.max_drift[account]),
+                'max_sector_concentration': float(report.max_sector_concentration[account]),
+                'cash_ratio': float(report.cash_ratio[account]),
+                'expected_cost': float(sum(plan['estimated_cost'].values())),
+                'plan': plan
+            })
+        return work
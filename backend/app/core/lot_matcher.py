@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+@dataclass
+class LotMatches:
+    """FIFO 매칭 결과 (청산된 로트 조각 단위)
+
+    인덱스는 모두 입력 거래 배열의 원래 위치를 가리킨다.
+    """
+    buy_index: np.ndarray
+    sell_index: np.ndarray
+    quantity: np.ndarray
+    buy_price: np.ndarray
+    sell_price: np.ndarray
+    holding_days: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.quantity)
+
+    @property
+    def pnl(self) -> np.ndarray:
+        """로트별 실현 손익"""
+        return self.quantity * (self.sell_price - self.buy_price)
+
+    @property
+    def cost(self) -> np.ndarray:
+        """로트별 매입 원가"""
+        return self.quantity * self.buy_price
+
+def _empty_matches() -> LotMatches:
+    empty_int = np.empty(0, dtype=np.int64)
+    empty_float = np.empty(0, dtype=np.float64)
+    return LotMatches(empty_int, empty_int, empty_float, empty_float, empty_float, empty_int)
+
+def _code_date_order(codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """종목 > 날짜 순 안정 정렬 인덱스"""
+    already_by_date = len(days) < 2 or bool((days[1:] >= days[:-1]).all())
+    if already_by_date and np.issubdtype(codes.dtype, np.integer):
+        # 날짜순 입력이면 코드만 안정 정렬하면 된다 (16비트 코드는 기수 정렬)
+        if codes.min() >= 0 and codes.max() < 2 ** 16:
+            return np.argsort(codes.astype(np.uint16), kind='stable')
+        return np.argsort(codes, kind='stable')
+    return np.lexsort((days, codes))
+
+def match_fifo(codes: np.ndarray, dates: np.ndarray, is_buy: np.ndarray,
+               shares: np.ndarray, prices: np.ndarray) -> LotMatches:
+    """종목별 FIFO 매수/매도 로트 매칭
+
+    종목마다 누적 매수 수량과 누적 매도 수량을 하나의 수직선 위 구간으로 펼친 뒤,
+    두 구간 집합의 교집합을 searchsorted로 찾아 행 단위 루프 없이 매칭한다.
+    거래 내역 이전부터 보유하던 물량의 매도(누적 매도가 누적 매수를 넘는 부분)는
+    원가를 알 수 없으므로 가상의 기초 로트에 매칭하고 결과에서 제외한다.
+
+    Args:
+        codes: 종목 코드 (정수 카테고리 코드 권장)
+        dates: 거래일 (epoch day 정수 또는 datetime64)
+        is_buy: 매수 여부
+        shares: 거래 수량
+        prices: 체결 단가
+    """
+    n = len(codes)
+    if n == 0:
+        return _empty_matches()
+
+    codes = np.asarray(codes)
+    days = np.asarray(dates)
+    if np.issubdtype(days.dtype, np.datetime64):
+        days = days.astype('datetime64[D]').astype(np.int64)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    qty = np.asarray(shares, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+
+    # 종목 > 날짜 순 안정 정렬 (같은 날 거래는 입력 순서 유지)
+    order = _code_date_order(codes, days)
+    c = codes[order]
+    q = qty[order]
+    buy = is_buy[order]
+
+    group_start = np.empty(n, dtype=bool)
+    group_start[0] = True
+    np.not_equal(c[1:], c[:-1], out=group_start[1:])
+    starts = np.flatnonzero(group_start)
+    group = np.cumsum(group_start) - 1
+    ends = np.r_[starts[1:], n] - 1
+
+    # 종목 내 누적 수량 (전역 cumsum에서 그룹 시작 직전 값을 빼는 방식)
+    bq = np.where(buy, q, 0.0)
+    sq = np.where(buy, 0.0, q)
+    cum_buy = np.cumsum(bq)
+    cum_sell = np.cumsum(sq)
+    cum_buy -= (cum_buy[starts] - bq[starts])[group]
+    cum_sell -= (cum_sell[starts] - sq[starts])[group]
+
+    # 거래 내역 이전 보유분 = 누적 매도가 누적 매수를 초과한 최대치
+    deficit = np.maximum(np.maximum.reduceat(cum_sell - cum_buy, starts), 0.0)
+    total_buy = cum_buy[ends]
+    offset = np.r_[0.0, np.cumsum(deficit + total_buy)[:-1]]
+
+    # 매도는 [offset, offset + 누적매도), 매수는 기초 로트 뒤 [offset + deficit, ...)에 배치
+    buy_rows = np.flatnonzero(buy & (q > 0))
+    sell_rows = np.flatnonzero(~buy & (q > 0))
+    if len(buy_rows) == 0 or len(sell_rows) == 0:
+        return _empty_matches()
+
+    buy_end = (offset + deficit)[group[buy_rows]] + cum_buy[buy_rows]
+    buy_begin = buy_end - q[buy_rows]
+    sell_end = offset[group[sell_rows]] + cum_sell[sell_rows]
+    sell_begin = sell_end - q[sell_rows]
+
+    # 구간 경계점: 각 배열이 이미 정렬되어 있어 병합 정렬이 거의 선형으로 끝난다.
+    # 경계점 이하에서 끝난 매수/매도 개수가 곧 그 구간을 덮는 로트의 위치다.
+    bounds = np.concatenate([offset, offset + deficit, buy_end, sell_end])
+    kinds = np.repeat(np.array([0, 0, 1, 2], dtype=np.int8),
+                      [len(offset), len(offset), len(buy_end), len(sell_end)])
+    bound_order = np.argsort(bounds, kind='stable')
+    bounds = bounds[bound_order]
+    kinds = kinds[bound_order]
+    last = np.r_[bounds[1:] != bounds[:-1], True]
+    points = bounds[last]
+    seg_begin = points[:-1]
+    seg_len = np.diff(points)
+    b = np.cumsum(kinds == 1)[last][:-1]
+    s = np.cumsum(kinds == 2)[last][:-1]
+
+    valid = (b < len(buy_rows)) & (s < len(sell_rows))
+    b_clip = np.minimum(b, len(buy_rows) - 1)
+    s_clip = np.minimum(s, len(sell_rows) - 1)
+    valid &= (buy_begin[b_clip] <= seg_begin) & (sell_begin[s_clip] <= seg_begin)
+
+    buy_idx = order[buy_rows[b_clip[valid]]]
+    sell_idx = order[sell_rows[s_clip[valid]]]
+
+    return LotMatches(
+        buy_index=buy_idx,
+        sell_index=sell_idx,
+        quantity=seg_len[valid],
+        buy_price=prices[buy_idx],
+        sell_price=prices[sell_idx],
+        holding_days=days[sell_idx] - days[buy_idx]
+    )
+
+def match_fifo_frame(transactions: pd.DataFrame,
+                     user_codes: Optional[np.ndarray] = None) -> LotMatches:
+    """거래 DataFrame(stock_code, date, type, shares, price)에 대한 FIFO 매칭
+
+    user_codes가 주어지면 (사용자, 종목) 단위로 로트를 분리해 여러 사용자를 한 번에 매칭한다.
+    """
+    if len(transactions) == 0:
+        return _empty_matches()
+
+    codes, uniques = pd.factorize(transactions['stock_code'])
+    if user_codes is not None:
+        codes = np.asarray(user_codes, dtype=np.int64) * max(len(uniques), 1) + codes
+    dates = pd.to_datetime(transactions['date']).values
+    is_buy = (transactions['type'] == 'buy').to_numpy()
+    return match_fifo(
+        codes,
+        dates,
+        is_buy,
+        transactions['shares'].to_numpy(),
+        transactions['price'].to_numpy()
+    )
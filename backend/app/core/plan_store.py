@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from ..config import Config
+
+# 실행을 선점했지만 아직 결과가 기록되지 않은 계획의 실행 결과 자리표시
+EXECUTION_IN_PROGRESS = {'status': 'in_progress'}
+
+def plan_fingerprint(positions: pd.DataFrame, cash: float, constraints: Dict[str, Any],
+                     user_id: Optional[str] = None) -> str:
+    """(소유 사용자, 보유 종목, 현재가, 현금, 제약 조건) 입력의 내용 해시
+
+    종목 순서와 무관하도록 종목 코드로 정렬한 뒤 수량/가격 배열의 바이트와
+    제약 조건 JSON을 SHA-256으로 묶는다. 사용자 ID를 포함하므로 보유 내역이 같아도
+    사용자가 다르면 다른 계획이 된다.
+    """
+    ordered = positions.sort_values('stock_code', kind='stable')
+    digest = hashlib.sha256()
+    digest.update(json.dumps(user_id).encode('utf-8'))
+    digest.update('\x1f'.join(map(str, ordered['stock_code'])).encode('utf-8'))
+    digest.update('\x1f'.join(map(str, ordered['sector'])).encode('utf-8'))
+    digest.update(np.ascontiguousarray(ordered['shares'].to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(ordered['current_price'].to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.float64(cash).tobytes())
+    digest.update(json.dumps(constraints, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+@dataclass
+class _StoredPlan:
+    plan: Dict
+    content_hash: str
+    expires_at: float
+    user_id: Optional[str] = None
+    execution: Optional[Dict] = None      # 실행을 선점한 계획의 실행 결과 (선점 전이면 None)
+
+class PlanStore:
+    """리밸런싱 계획 저장소 (LRU + TTL)
+
+    plan_id와 입력 내용 해시 두 가지로 조회할 수 있어, 입력이 같은 반복 요청은
+    같은 계획을 돌려주고 실행 시에는 사용자가 본 계획을 그대로 꺼낼 수 있다.
+    계획마다 소유 사용자를 기록하고, 조회는 소유자가 같을 때만 계획을 돌려준다.
+    계획은 한 번만 실행할 수 있다. claim_execution이 잠금 안에서 실행을 선점하고,
+    선점된 계획은 다시 선점되지 않으며 내용 해시 조회에서도 빠진다(같은 입력이면 새 계획을 만든다).
+    path가 주어지면 저장/삭제 때마다 JSON 파일로 기록하고 시작 시 복원한다.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 path: Optional[str] = None):
+        self.max_entries = Config.PLAN_STORE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = Config.PLAN_STORE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.path = Config.PLAN_STORE_PATH if path is None else path
+        self._plans: 'OrderedDict[str, _StoredPlan]' = OrderedDict()
+        self._by_hash: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def put(self, plan: Dict, content_hash: str, user_id: Optional[str] = None) -> Dict:
+        """user_id 소유 계획 저장 (용량을 넘으면 가장 오래 쓰이지 않은 계획부터 제거)"""
+        with self._lock:
+            self._remove(plan['plan_id'])
+            previous = self._plans.get(self._by_hash.get(content_hash))
+            if previous is not None and previous.execution is not None:
+                # 실행된 계획은 실행 결과 조회를 위해 남기고 해시 연결만 새 계획으로 옮긴다
+                del self._by_hash[content_hash]
+            else:
+                self._remove(self._by_hash.get(content_hash))
+            self._plans[plan['plan_id']] = _StoredPlan(
+                plan, content_hash, time.time() + self.ttl_seconds, user_id
+            )
+            self._by_hash[content_hash] = plan['plan_id']
+            while len(self._plans) > self.max_entries:
+                self._remove(next(iter(self._plans)))
+            self._save()
+        return plan
+
+    def get(self, plan_id: str, user_id: Optional[str]) -> Optional[Dict]:
+        """user_id 소유 계획을 plan_id로 조회 (없거나 만료되었거나 소유자가 다르면 None)"""
+        with self._lock:
+            return self._get(plan_id, user_id)
+
+    def get_by_hash(self, content_hash: str, user_id: Optional[str]) -> Optional[Dict]:
+        """user_id 소유 계획을 입력 내용 해시로 조회 (없거나 만료되었거나 소유자가 다르면 None)"""
+        with self._lock:
+            plan_id = self._by_hash.get(content_hash)
+            stored = self._lookup(plan_id, user_id) if plan_id else None
+            return stored.plan if stored is not None and stored.execution is None else None
+
+    def claim_execution(self, plan_id: str, user_id: Optional[str]) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """user_id 소유 계획의 실행 선점 (계획, 이전 실행 결과)
+
+        처음 선점하면 (계획, None)을 돌려주고 계획을 실행 중으로 표시한다. 이미 선점된
+        계획이면 (계획, 이전 실행 결과 - 실행 중이면 EXECUTION_IN_PROGRESS)을 돌려주므로
+        호출자는 주문을 다시 보내지 않는다. 계획이 없으면 (None, None).
+        """
+        with self._lock:
+            stored = self._lookup(plan_id, user_id)
+            if stored is None:
+                return None, None
+            if stored.execution is not None:
+                return stored.plan, stored.execution
+            stored.execution = dict(EXECUTION_IN_PROGRESS)
+            self._save()
+            return stored.plan, None
+
+    def record_execution(self, plan_id: str, execution: Dict):
+        """선점한 계획의 실행 결과 기록 (재요청에 그대로 돌려준다)"""
+        with self._lock:
+            stored = self._plans.get(plan_id)
+            if stored is not None:
+                stored.execution = execution
+                self._save()
+
+    def _get(self, plan_id: str, user_id: Optional[str]) -> Optional[Dict]:
+        stored = self._lookup(plan_id, user_id)
+        return stored.plan if stored is not None else None
+
+    def _lookup(self, plan_id: str, user_id: Optional[str]) -> Optional[_StoredPlan]:
+        stored = self._plans.get(plan_id)
+        if stored is None or stored.user_id != user_id:
+            return None
+        if stored.expires_at <= time.time():
+            self._remove(plan_id)
+            self._save()
+            return None
+        self._plans.move_to_end(plan_id)
+        return stored
+
+    def _remove(self, plan_id: Optional[str]):
+        stored = self._plans.pop(plan_id, None) if plan_id else None
+        if stored is not None and self._by_hash.get(stored.content_hash) == plan_id:
+            del self._by_hash[stored.content_hash]
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump([
+                {'plan': s.plan, 'content_hash': s.content_hash, 'expires_at': s.expires_at,
+                 'user_id': s.user_id, 'execution': s.execution}
+                for s in self._plans.values()
+            ], f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            entries = json.load(f)
+        now = time.time()
+        for entry in entries:
+            if entry['expires_at'] > now:
+                plan_id = entry['plan']['plan_id']
+                self._plans[plan_id] = _StoredPlan(
+                    entry['plan'], entry['content_hash'], entry['expires_at'], entry.get('user_id'),
+                    entry.get('execution')
+                )
+                self._by_hash[entry['content_hash']] = plan_id
+
+# 앱 전역 리밸런싱 계획 저장소
+plan_store = PlanStore()
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
 import uuid
@@ -6,11 +6,21 @@ from datetime import datetime
 
 from ..core.behavior_analyzer import InvestmentBehavior
 from ..config import Constants
+from .covariance_cache import CovarianceMatrix
+from .plan_store import PlanStore, plan_fingerprint
+from .rebalancing_solver import (
+    REASON_CASH, REASON_SECTOR, REASON_SINGLE_STOCK, REASON_TARGET, REASON_VOLATILITY,
+    RebalanceSolution, solve_rebalance
+)
+
+CASH_CODE = 'cash'
 
 class RebalancingEngine:
     """포트폴리오 리밸런싱 엔진"""
     
-    def __init__(self):
+    def __init__(self, plan_store: Optional[PlanStore] = None):
+        # 계획 저장소 (있으면 입력이 같은 요청에 저장된 계획을 재사용)
+        self.plan_store = plan_store
         self.risk_limits = {
             'max_sector_concentration': 0.3,
             'max_single_stock': 0.1,
@@ -18,86 +28,229 @@ class RebalancingEngine:
             'min_cash_ratio': 0.1,
             'max_correlation': 0.7
         }
+        # 목표 비중과의 차이가 이 값 미만이면 거래하지 않음
+        self.no_trade_band = 0.005
+        self.commission_rate = Constants.MSTOCK_COMMISSION_RATE / 100
+        self.tax_rate = Constants.SECURITIES_TAX_RATE / 100
     
     async def generate_rebalancing_plan(self, portfolio: pd.DataFrame, 
-                                       behavior: InvestmentBehavior) -> Dict:
-        """리밸런싱 계획 생성"""
-        # 데모용 포트폴리오 분석
-        current_positions = self._analyze_current_portfolio(portfolio)
+                                       behavior: Optional[InvestmentBehavior] = None,
+                                       target_weights: Optional[Dict[str, float]] = None,
+                                       cash: Optional[float] = None,
+                                       covariance: Optional[CovarianceMatrix] = None,
+                                       user_id: Optional[str] = None,
+                                       demo: bool = False) -> Dict:
+        """리밸런싱 계획 생성
         
-        # 데모용 목표 포트폴리오
-        target_positions = {
-            'A005930': {'name': '삼성전자', 'sector': 'IT', 'target_weight': 0.15},
-            'A035720': {'name': '카카오', 'sector': 'IT', 'target_weight': 0.10},
-            'A051910': {'name': 'LG화학', 'sector': '화학', 'target_weight': 0.10},
-            'A105560': {'name': 'KB금융', 'sector': '금융', 'target_weight': 0.15},
-            'A207940': {'name': '삼성바이오로직스', 'sector': '바이오', 'target_weight': 0.10},
-            'cash': {'name': '현금', 'sector': '현금', 'target_weight': 0.15}
-        }
+        Args:
+            portfolio: 보유 종목 (stock_code, stock_name, sector, shares, current_price[, value]).
+                stock_code가 'cash'인 행은 현금으로 본다.
+            target_weights: 종목별 모델 목표 비중 (없으면 현재 비중에서 한도 초과분만 조정).
+                보유하지 않은 종목은 shares 0 행으로 portfolio에 포함해야 가격을 알 수 있다.
+            cash: 현금 잔고 (없으면 'cash' 행, 그것도 없으면 행동 분석의 현금 비중으로 추정하고
+                행동 분석도 없으면 0)
+            covariance: 공유 공분산 캐시 행렬 (있으면 target_volatility를 적용하고
+                거래 후 max_correlation 초과 종목 쌍을 보고)
+            user_id: 계획 소유 사용자 (계획 저장소는 같은 사용자에게만 계획을 돌려준다)
+            demo: 데모 데이터로 만든 계획 여부 (주문 실행 대상에서 제외)
+        """
+        positions, cash = self._normalize_portfolio(portfolio, behavior, cash)
+        content_hash = None
+        if self.plan_store is not None:
+            content_hash = plan_fingerprint(positions, cash, {
+                'risk_limits': self.risk_limits,
+                'no_trade_band': self.no_trade_band,
+                'target_weights': target_weights,
+                'covariance': covariance.as_of if covariance is not None else None,
+                'demo': demo
+            }, user_id)
+            cached = self.plan_store.get_by_hash(content_hash, user_id)
+            if cached is not None:
+                return cached
+        
+        sector_codes, _ = pd.factorize(positions['sector'])
+        model_weights = None
+        if target_weights:
+            model_weights = positions['stock_code'].map(target_weights).to_numpy(dtype=np.float64)
+        tickers = positions['stock_code'].tolist()
         
-        # 필요한 거래 계산
-        trades = self._calculate_required_trades(current_positions, target_positions)
+        solution = solve_rebalance(
+            shares=positions['shares'].to_numpy(),
+            prices=positions['current_price'].to_numpy(),
+            sector_codes=sector_codes,
+            cash=cash,
+            max_single_stock=self.risk_limits['max_single_stock'],
+            max_sector_concentration=self.risk_limits['max_sector_concentration'],
+            min_cash_ratio=self.risk_limits['min_cash_ratio'],
+            commission_rate=self.commission_rate,
+            tax_rate=self.tax_rate,
+            model_weights=model_weights,
+            no_trade_band=self.no_trade_band,
+            covariance=covariance.submatrix(tickers) if covariance is not None else None,
+            target_volatility=self.risk_limits['target_volatility']
+        )
+        trades = self._calculate_required_trades(positions, solution)
         
-        return {
+        plan = {
             'plan_id': str(uuid.uuid4()),
             'created_at': datetime.now().isoformat(),
-            'current_portfolio': current_positions,
-            'target_portfolio': target_positions,
+            'demo': demo,
+            'current_portfolio': self._analyze_current_portfolio(positions, cash, solution),
+            'target_portfolio': self._target_portfolio(positions, solution),
             'required_trades': trades,
-            'expected_results': {
-                'volatility_reduction': -15,
-                'sector_balance_improvement': 25,
-                'risk_score_improvement': -20
-            },
+            'expected_results': self._expected_results(positions, sector_codes, cash, solution, covariance),
             'estimated_cost': {
-                'commission': sum(t['trade_value'] for t in trades) * 0.0008,
-                'tax': sum(t['trade_value'] for t in trades if t['action'] == 'sell') * 0.0023
+                'commission': solution.commission,
+                'tax': solution.tax
             }
         }
+        if self.plan_store is not None:
+            self.plan_store.put(plan, content_hash, user_id)
+        return plan
+    
+    def _normalize_portfolio(self, portfolio: pd.DataFrame, behavior: Optional[InvestmentBehavior],
+                             cash: Optional[float]):
+        """보유 종목 표준화 (종목별 수량/현재가) 및 현금 분리"""
+        frame = portfolio.reset_index(drop=True)
+        is_cash = (frame['stock_code'] == CASH_CODE) if 'stock_code' in frame else np.zeros(len(frame), dtype=bool)
+        cash_rows = frame[is_cash]
+        frame = frame[~is_cash]
+        
+        value = frame['value'].astype(float) if 'value' in frame else None
+        shares = frame['shares'].astype(float) if 'shares' in frame else None
+        if 'current_price' in frame:
+            price = frame['current_price'].astype(float)
+        elif 'price' in frame:
+            price = frame['price'].astype(float)
+        elif value is not None and shares is not None:
+            price = value / shares.where(shares > 0)
+        else:
+            price = pd.Series(np.nan, index=frame.index)
+        if shares is None:
+            shares = (value / price).fillna(0) if value is not None else pd.Series(0.0, index=frame.index)
+        
+        positions = pd.DataFrame({
+            'stock_code': frame['stock_code'],
+            'stock_name': frame['stock_name'] if 'stock_name' in frame else frame['stock_code'],
+            'sector': frame['sector'].fillna('기타') if 'sector' in frame else '기타',
+            'shares': shares,
+            'current_price': price
+        }).reset_index(drop=True)
+        
+        if cash is None:
+            if len(cash_rows) > 0:
+                cash = float(cash_rows['value'].sum())
+            elif behavior is None:
+                cash = 0.0
+            else:
+                invested = float(np.nansum(positions['shares'] * positions['current_price']))
+                ratio = min(max(behavior.cash_ratio, 0.0), 0.99)
+                cash = invested * ratio / (1 - ratio)
+        return positions, float(cash)
     
-    def _analyze_current_portfolio(self, portfolio: pd.DataFrame) -> Dict:
-        """현재 포트폴리오 분석 (데모용)"""
-        # 데모 포트폴리오
-        return {
-            'A005930': {'name': '삼성전자', 'sector': 'IT', 'weight': 0.35, 'value': 3500000},
-            'A035720': {'name': '카카오', 'sector': 'IT', 'weight': 0.25, 'value': 2500000},
-            'A000660': {'name': 'SK하이닉스', 'sector': 'IT', 'weight': 0.20, 'value': 2000000},
-            'cash': {'name': '현금', 'sector': '현금', 'weight': 0.05, 'value': 500000}
+    def _analyze_current_portfolio(self, positions: pd.DataFrame, cash: float,
+                                   solution: RebalanceSolution) -> Dict:
+        """현재 포트폴리오 구성 (현금 포함 총액 대비 비중)"""
+        current = {
+            row.stock_code: {
+                'name': row.stock_name,
+                'sector': row.sector,
+                'weight': float(weight),
+                'value': float(row.shares * row.current_price)
+            }
+            for row, weight in zip(positions.itertuples(index=False), solution.current_weights)
         }
+        current[CASH_CODE] = {
+            'name': '현금', 'sector': '현금',
+            'weight': cash / solution.total_value if solution.total_value > 0 else 0.0,
+            'value': cash
+        }
+        return current
     
-    def _calculate_required_trades(self, current: Dict, target: Dict) -> List[Dict]:
-        """필요한 거래 계산"""
-        trades = []
-        total_value = sum(pos['value'] for pos in current.values())
-        
-        # 매도 거래
-        trades.append({
-            'stock_code': 'A000660',
-            'stock_name': 'SK하이닉스',
-            'action': 'sell',
-            'shares': 150,
-            'trade_value': 2000000,
-            'reason': 'IT 섹터 과다 집중 해소'
-        })
+    def _target_portfolio(self, positions: pd.DataFrame, solution: RebalanceSolution) -> Dict:
+        """정수 수량 기준 거래 후 목표 포트폴리오"""
+        total = solution.total_value
+        values = solution.target_shares * positions['current_price'].fillna(0).to_numpy()
+        target = {
+            row.stock_code: {
+                'name': row.stock_name,
+                'sector': row.sector,
+                'target_weight': float(value / total) if total > 0 else 0.0,
+                'shares': int(shares)
+            }
+            for row, value, shares in zip(positions.itertuples(index=False), values, solution.target_shares)
+            if shares > 0
+        }
+        target[CASH_CODE] = {
+            'name': '현금', 'sector': '현금',
+            'target_weight': solution.cash_after / total if total > 0 else 0.0
+        }
+        return target
+    
+    def _calculate_required_trades(self, positions: pd.DataFrame, solution: RebalanceSolution) -> List[Dict]:
+        """필요한 거래 목록 (매도 먼저, 거래대금 큰 순)"""
+        traded = np.flatnonzero(solution.trade_shares != 0)
+        order = np.lexsort((-solution.trade_values[traded], solution.trade_shares[traded] > 0))
         
-        # 매수 거래
-        trades.extend([
-            {
-                'stock_code': 'A105560',
-                'stock_name': 'KB금융',
-                'action': 'buy',
-                'shares': 200,
-                'trade_value': 1500000,
-                'reason': '금융 섹터 비중 확대'
-            },
+        codes = positions['stock_code'].to_numpy()
+        names = positions['stock_name'].to_numpy()
+        sectors = positions['sector'].to_numpy()
+        return [
             {
-                'stock_code': 'A207940',
-                'stock_name': '삼성바이오로직스',
-                'action': 'buy',
-                'shares': 2,
-                'trade_value': 1000000,
-                'reason': '바이오 섹터 신규 편입'
+                'stock_code': codes[i],
+                'stock_name': names[i],
+                'action': 'buy' if solution.trade_shares[i] > 0 else 'sell',
+                'shares': int(abs(solution.trade_shares[i])),
+                'trade_value': float(solution.trade_values[i]),
+                'reason': self._trade_reason(solution.reasons[i], sectors[i])
             }
-        ])
+            for i in traded[order]
+        ]
+    
+    def _trade_reason(self, reason: int, sector: str) -> str:
+        if reason == REASON_SINGLE_STOCK:
+            return f"단일 종목 비중 한도({self.risk_limits['max_single_stock']:.0%}) 초과 해소"
+        if reason == REASON_SECTOR:
+            return f"{sector} 섹터 과다 집중 해소"
+        if reason == REASON_CASH:
+            return f"최소 현금 비중({self.risk_limits['min_cash_ratio']:.0%}) 확보"
+        if reason == REASON_VOLATILITY:
+            return f"목표 변동성({self.risk_limits['target_volatility']:.0%}) 초과 해소"
+        if reason == REASON_TARGET:
+            return "목표 비중 조정"
+        return "비중 조정"
+    
+    def _expected_results(self, positions: pd.DataFrame, sector_codes: np.ndarray, cash: float,
+                          solution: RebalanceSolution,
+                          covariance: Optional[CovarianceMatrix] = None) -> Dict:
+        """거래 전후 리스크 한도 지표 비교"""
+        total = solution.total_value
+        prices = positions['current_price'].fillna(0).to_numpy()
+        tickers = positions['stock_code'].tolist()
         
-        return trades
+        def summary(weights: np.ndarray, cash_value: float) -> Dict:
+            sector_totals = np.bincount(sector_codes, weights=weights) if len(weights) else np.zeros(1)
+            result = {
+                'max_single_stock': float(weights.max()) if len(weights) else 0.0,
+                'max_sector_concentration': float(sector_totals.max()),
+                'cash_ratio': cash_value / total if total > 0 else 0.0
+            }
+            if covariance is not None:
+                result['volatility'] = covariance.portfolio_volatility(tickers, weights)
+            return result
+        
+        after = solution.target_shares * prices / total if total > 0 else solution.target_shares
+        results = {
+            'before': summary(solution.current_weights, cash),
+            'after': summary(after, solution.cash_after),
+            'turnover': float(solution.trade_values.sum() / total) if total > 0 else 0.0,
+            # 0보다 크면 최소 현금 비중을 맞추지 못한 금액
+            'cash_shortfall': solution.cash_shortfall
+        }
+        if covariance is not None:
+            held = [ticker for ticker, shares in zip(tickers, solution.target_shares) if shares > 0]
+            results['correlated_pairs'] = [
+                {'stock_codes': [a, b], 'correlation': corr}
+                for a, b, corr in covariance.correlated_pairs(held, self.risk_limits['max_correlation'])
+            ]
+        return results
@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+# 목표 비중 산출 사유 (reasons 배열 값)
+REASON_NONE = 0
+REASON_TARGET = 1           # 모델 목표 비중 추종
+REASON_SINGLE_STOCK = 2     # 단일 종목 한도 초과
+REASON_SECTOR = 3           # 섹터 집중 한도 초과
+REASON_CASH = 4             # 최소 현금 비중 확보
+REASON_VOLATILITY = 5       # 목표 변동성 초과
+
+@dataclass
+class RebalanceSolution:
+    """리밸런싱 해 (종목 순서는 입력과 같다)"""
+    total_value: float              # 현금 포함 총 평가금액
+    current_weights: np.ndarray
+    target_weights: np.ndarray      # 한도를 만족하는 목표 비중 (정수 수량 반올림 전)
+    target_shares: np.ndarray       # 정수 목표 수량
+    trade_shares: np.ndarray        # 정수 거래 수량 (+매수 / -매도)
+    trade_values: np.ndarray        # 거래대금 (절대값)
+    reasons: np.ndarray             # 종목별 REASON_* 코드
+    commission: float
+    tax: float
+    cash_after: float               # 거래 비용 반영 후 현금
+    cash_shortfall: float = 0.0     # 팔 수 있는 물량을 다 팔아도 최소 현금에 못 미치는 금액
+
+def _sector_scale(weights: np.ndarray, sector_codes: np.ndarray, n_sectors: int, cap: float) -> np.ndarray:
+    """섹터 합계가 cap을 넘는 섹터의 종목별 축소 배율"""
+    totals = np.bincount(sector_codes, weights=weights, minlength=n_sectors)
+    scale = np.divide(cap, totals, out=np.ones(n_sectors), where=totals > cap)
+    return scale[sector_codes]
+
+def solve_rebalance(shares: np.ndarray, prices: np.ndarray, sector_codes: np.ndarray, cash: float,
+                    max_single_stock: float, max_sector_concentration: float, min_cash_ratio: float,
+                    commission_rate: float, tax_rate: float,
+                    model_weights: Optional[np.ndarray] = None,
+                    no_trade_band: float = 0.0,
+                    covariance: Optional[np.ndarray] = None,
+                    target_volatility: Optional[float] = None) -> RebalanceSolution:
+    """리스크 한도를 만족하는 목표 비중과 정수 거래 수량 계산
+
+    기준 비중(모델 목표가 있으면 모델 비중, 없으면 현재 비중)에서 출발해
+    단일 종목 한도로 자르고, 한도를 넘는 섹터는 섹터 내 비례 축소, 주식 합계가
+    (1 - 최소 현금 비중)을 넘으면 전체를 비례 축소한다. 공분산이 주어지면 예상
+    변동성이 target_volatility를 넘을 때 같은 방식으로 축소한다. 각 단계는 비중을 줄이기만
+    하므로 앞 단계의 한도가 유지되고, 한도 안에 있는 종목은 건드리지 않아 매도에
+    따른 수수료/세금이 필요한 만큼만 발생한다. 줄어든 비중은 현금으로 남긴다.
+
+    no_trade_band 이내의 비중 변화는 거래하지 않되, 그로 인해 한도가 깨지는
+    섹터/현금 제약에서는 목표 비중을 그대로 쓴다. 목표 수량은 내림으로 정수화해
+    한도를 넘지 않게 하고, 비용 반영 후 현금이 최소 비중에 못 미치면 매수를 줄이고,
+    매수를 모두 없애도 부족하면 평가금액이 큰 보유 종목부터 더 매도한다. 그래도 부족한
+    금액(거래 가능한 보유 종목이 없는 경우 등)은 cash_shortfall로 알린다.
+
+    Args:
+        shares, prices, sector_codes: 종목별 보유 수량 / 현재가 / 0..n-1 섹터 코드
+        model_weights: 종목별 모델 목표 비중 (NaN이면 현재 비중 유지)
+        covariance: 종목 순서의 연환산 공분산 행렬 (target_volatility와 함께 사용)
+    """
+    shares = np.asarray(shares, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    sector_codes = np.asarray(sector_codes, dtype=np.int64)
+    n = len(shares)
+    n_sectors = int(sector_codes.max()) + 1 if n else 0
+    tradable = np.isfinite(prices) & (prices > 0)
+    values = np.where(tradable, shares * prices, 0.0)
+    total = float(values.sum() + cash)
+
+    if n == 0 or total <= 0:
+        zeros = np.zeros(n)
+        return RebalanceSolution(total, zeros, zeros, shares.copy(), zeros, zeros,
+                                 np.zeros(n, dtype=np.int64), 0.0, 0.0, float(cash))
+
+    current = values / total
+    reasons = np.zeros(n, dtype=np.int64)
+
+    # 1. 기준 비중
+    desired = current.copy()
+    if model_weights is not None:
+        model_weights = np.asarray(model_weights, dtype=np.float64)
+        follow = np.isfinite(model_weights) & tradable
+        desired[follow] = model_weights[follow]
+        reasons[follow & (np.abs(desired - current) > 0)] = REASON_TARGET
+
+    # 2. 단일 종목 한도
+    over_single = desired > max_single_stock
+    desired = np.minimum(desired, max_single_stock)
+    reasons[over_single] = REASON_SINGLE_STOCK
+
+    # 3. 섹터 한도 (섹터 내 비례 축소)
+    scale = _sector_scale(desired, sector_codes, n_sectors, max_sector_concentration)
+    desired *= scale
+    reasons[(scale < 1) & (desired > 0) & ~over_single] = REASON_SECTOR
+
+    # 4. 최소 현금 비중 (주식 전체 비례 축소)
+    invest_cap = 1.0 - min_cash_ratio
+    invested = desired.sum()
+    if invested > invest_cap:
+        desired *= invest_cap / invested
+        reasons[(reasons == REASON_NONE) & (desired > 0)] = REASON_CASH
+
+    # 5. 목표 변동성 (변동성은 비중에 1차 동차이므로 비례 축소로 정확히 맞춘다)
+    if covariance is not None and target_volatility is not None:
+        volatility = np.sqrt(max(desired @ covariance @ desired, 0.0))
+        if volatility > target_volatility:
+            desired *= target_volatility / volatility
+            reasons[(reasons == REASON_NONE) & (desired > 0)] = REASON_VOLATILITY
+    desired[~tradable] = current[~tradable]
+
+    # 6. 무거래 구간: 작은 변화는 현재 비중 유지 (한도가 깨지면 되돌림)
+    target = desired
+    if no_trade_band > 0:
+        keep = (np.abs(desired - current) < no_trade_band) & (current <= max_single_stock)
+        banded = np.where(keep, current, desired)
+        breached = np.bincount(sector_codes, weights=banded, minlength=n_sectors) > max_sector_concentration
+        keep &= ~breached[sector_codes]
+        banded = np.where(keep, current, desired)
+        within_volatility = (
+            covariance is None or target_volatility is None
+            or banded @ covariance @ banded <= max(target_volatility ** 2, desired @ covariance @ desired)
+        )
+        if banded.sum() <= max(invest_cap, desired.sum()) and within_volatility:
+            target = banded
+    keep = (target == current) | ~tradable
+    reasons[keep] = REASON_NONE
+
+    # 7. 정수 수량 (내림) 및 거래
+    safe_prices = np.where(tradable, prices, 1.0)
+    target_shares = np.where(keep, shares, np.floor(target * total / safe_prices + 1e-9))
+    trade = target_shares - shares
+
+    def costs(trade: np.ndarray):
+        sell_value = float(np.sum(np.where(trade < 0, -trade * safe_prices, 0.0)))
+        buy_value = float(np.sum(np.where(trade > 0, trade * safe_prices, 0.0)))
+        commission = (sell_value + buy_value) * commission_rate
+        tax = sell_value * tax_rate
+        return buy_value, commission, tax, float(cash + sell_value - buy_value - commission - tax)
+
+    buy_value, commission, tax, cash_after = costs(trade)
+
+    # 8. 비용 반영 후 현금 부족분만큼 매수 축소
+    shortfall = min_cash_ratio * total - cash_after
+    if shortfall > 0 and buy_value > 0:
+        factor = max(1.0 - shortfall / buy_value, 0.0)
+        buys = trade > 0
+        trade[buys] = np.floor(trade[buys] * factor)
+        target_shares = shares + trade
+        buy_value, commission, tax, cash_after = costs(trade)
+
+    # 9. 매수를 없애도 부족하면 평가금액이 큰 종목부터 추가 매도 (거래 건수 최소화,
+    #    큰 종목을 줄이므로 단일 종목/섹터 한도도 유지된다). 수량은 순매도 대금 기준 올림
+    shortfall = min_cash_ratio * total - cash_after
+    sellable = tradable & (target_shares > 0)
+    unit = safe_prices * (1.0 - commission_rate - tax_rate)
+    if shortfall > 1e-9 and sellable.any() and unit.max() > 0:
+        order = np.argsort(-np.where(sellable, target_shares * safe_prices, 0.0), kind='stable')
+        available = np.where(sellable, target_shares * unit, 0.0)[order]
+        need = np.maximum(shortfall - (np.cumsum(available) - available), 0.0)
+        sold = np.minimum(np.ceil(need / np.maximum(unit[order], 1e-12) - 1e-9), target_shares[order])
+        extra = np.zeros(n)
+        extra[order] = np.where(sellable[order], sold, 0.0)
+        trade -= extra
+        target_shares = shares + trade
+        reasons[(extra > 0) & (reasons == REASON_NONE)] = REASON_CASH
+        buy_value, commission, tax, cash_after = costs(trade)
+
+    return RebalanceSolution(
+        total_value=total,
+        current_weights=current,
+        target_weights=target,
+        target_shares=target_shares,
+        trade_shares=trade,
+        trade_values=np.abs(trade) * safe_prices,
+        reasons=np.where(trade != 0, reasons, REASON_NONE),
+        commission=commission,
+        tax=tax,
+        cash_after=cash_after,
+        cash_shortfall=max(min_cash_ratio * total - cash_after, 0.0)
+    )
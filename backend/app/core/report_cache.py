@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from ..config import Config
+
+@dataclass
+class _CachedReport:
+    report: Dict
+    nbytes: int
+    expires_at: float
+
+class ReportCache:
+    """종합 리포트 캐시 (LRU + TTL + 메모리 상한)
+
+    (사용자 ID, 거래 이력 버전, 옵션)을 키로 리포트를 보관해 같은 입력의 반복 조회는
+    재계산 없이 돌려주고, 새 거래가 들어오면 해당 사용자 항목을 모두 무효화한다.
+    버전은 거래 저장소의 사용자 행 수처럼 이력이 바뀔 때만 바뀌는 값으로, 거래 내용을
+    해시하지 않아 조회 비용이 이력 크기와 무관하다.
+    리포트 크기는 JSON 직렬화 바이트로 어림한다.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        self.max_entries = Config.REPORT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = Config.REPORT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = Config.REPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._reports: 'OrderedDict[Tuple, _CachedReport]' = OrderedDict()
+        self._by_user: Dict[str, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._reports)
+
+    def get(self, user_id: str, version: Hashable, variant: Hashable = None) -> Optional[Dict]:
+        """캐시된 리포트 조회 (없거나 만료되었으면 None)"""
+        key = (user_id, version, variant)
+        with self._lock:
+            cached = self._reports.get(key)
+            if cached is not None and cached.expires_at <= time.time():
+                self._remove(key)
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._reports.move_to_end(key)
+            self.hits += 1
+            return cached.report
+
+    def put(self, user_id: str, version: Hashable, report: Dict, variant: Hashable = None) -> Dict:
+        """리포트 저장 (항목 수/메모리 상한을 넘으면 가장 오래 쓰이지 않은 항목부터 제거)"""
+        key = (user_id, version, variant)
+        nbytes = len(json.dumps(report, ensure_ascii=False, default=str).encode('utf-8'))
+        if self.max_bytes and nbytes > self.max_bytes:
+            return report
+        with self._lock:
+            self._remove(key)
+            self._reports[key] = _CachedReport(report, nbytes, time.time() + self.ttl_seconds)
+            self._by_user.setdefault(user_id, set()).add(key)
+            self.nbytes += nbytes
+            while self._reports and (len(self._reports) > self.max_entries or
+                                     (self.max_bytes and self.nbytes > self.max_bytes)):
+                self._remove(next(iter(self._reports)))
+        return report
+
+    def invalidate(self, user_id: str) -> int:
+        """사용자의 캐시 항목 모두 제거 (제거한 항목 수 반환)"""
+        with self._lock:
+            keys = list(self._by_user.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> Dict:
+        return {'entries': len(self._reports), 'bytes': self.nbytes, 'hits': self.hits, 'misses': self.misses}
+
+    def _remove(self, key: Tuple):
+        cached = self._reports.pop(key, None)
+        if cached is None:
+            return
+        self.nbytes -= cached.nbytes
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+# 앱 전역 리포트 캐시
+report_cache = ReportCache()
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+def price_matrix(price_codes: np.ndarray, price_days: np.ndarray, closes: np.ndarray,
+                 n_tickers: int, calendar: np.ndarray) -> np.ndarray:
+    """(일 × 종목) 종가 행렬 구성
+
+    가격이 없는 날은 직전 종가로, 첫 가격 이전은 첫 종가로 채운다.
+    price_codes는 0..n_tickers-1 종목 코드, calendar는 정렬된 일자 배열.
+    """
+    prices = np.full((len(calendar), n_tickers), np.nan)
+    rows = np.searchsorted(calendar, price_days)
+    prices[rows, price_codes] = closes
+    return pd.DataFrame(prices).ffill().bfill().to_numpy()
+
+def holdings_matrix(day_index: np.ndarray, ticker_index: np.ndarray, signed_shares: np.ndarray,
+                    n_days: int, n_tickers: int) -> np.ndarray:
+    """(일 × 종목) 보유 수량 행렬
+
+    거래 내역 이전 보유분(누적 수량이 음수로 내려간 만큼)은 기초 보유로 더해
+    보유 수량이 음수가 되지 않게 한다.
+    """
+    holdings = np.zeros((n_days, n_tickers))
+    np.add.at(holdings, (day_index, ticker_index), signed_shares)
+    np.cumsum(holdings, axis=0, out=holdings)
+    holdings -= np.minimum(holdings.min(axis=0), 0.0)
+    return holdings
+
+@dataclass
+class GroupRisk:
+    """사용자(그룹)별 리스크 결과 배열"""
+    volatility: np.ndarray            # 연환산 변동성 (%)
+    max_drawdown: np.ndarray          # 최대 낙폭 (%)
+    cash_ratio: np.ndarray            # 마지막 날 현금 비중
+    position_values: np.ndarray       # 마지막 날 열(보유 종목)별 평가금액
+
+def cash_matrix(day_index: np.ndarray, group_index: np.ndarray, cash_flows: np.ndarray,
+                n_days: int, n_groups: int) -> np.ndarray:
+    """(일 × 그룹) 현금 잔고
+
+    입출금 내역이 없으므로 그룹마다 현금이 음수가 되지 않는 최소 초기 자본을 가정한다.
+    """
+    cash = np.zeros((n_days, n_groups))
+    np.add.at(cash, (day_index, group_index), cash_flows)
+    np.cumsum(cash, axis=0, out=cash)
+    cash -= np.minimum(cash.min(axis=0), 0.0)
+    return cash
+
+def analyze_risk_grouped(holdings: np.ndarray, prices: np.ndarray, column_groups: np.ndarray,
+                         cash: np.ndarray, first_rows: np.ndarray) -> GroupRisk:
+    """여러 그룹의 리스크를 한 번에 계산
+
+    holdings/prices는 (일 × 열) 행렬이고 열마다 속한 그룹이 column_groups(오름차순)로 주어진다.
+    그룹의 평가금액은 열 구간 합(reduceat)으로 구하고, 수익률은 그룹의 첫 거래일(first_rows)
+    이후 구간만 마스크로 골라 일별 수익률의 표본 표준편차(연환산)와 최고점 대비 낙폭으로 계산한다.
+    """
+    n_days, n_groups = cash.shape
+    position_values = holdings * prices
+    equity = cash.copy()
+    present, starts = np.unique(column_groups, return_index=True)
+    if len(present):
+        equity[:, present] += np.add.reduceat(position_values, starts, axis=1)
+
+    prev = equity[:-1]
+    returns = np.divide(np.diff(equity, axis=0), prev, out=np.zeros_like(prev), where=prev > 0)
+    in_range = np.arange(n_days - 1)[:, None] >= first_rows[None, :]
+    count = in_range.sum(axis=0)
+    mean = safe_divide(np.where(in_range, returns, 0.0).sum(axis=0), count)
+    squares = np.where(in_range, (returns - mean) ** 2, 0.0).sum(axis=0)
+    volatility = np.sqrt(safe_divide(squares, count - 1) * TRADING_DAYS_PER_YEAR) * 100
+
+    # 첫 거래일 이전 행(기초 보유/초기 자본만 있는 구간)은 낙폭 계산에서 제외
+    started = np.where(np.arange(n_days)[:, None] >= first_rows[None, :], equity, 0.0)
+    peak = np.maximum.accumulate(started, axis=0)
+    drawdown = np.divide(peak - started, peak, out=np.zeros_like(started), where=peak > 0)
+    last_equity = equity[-1] if n_days else np.zeros(n_groups)
+
+    return GroupRisk(
+        volatility=volatility,
+        max_drawdown=drawdown.max(axis=0) * 100 if n_days else np.zeros(n_groups),
+        cash_ratio=safe_divide(cash[-1] if n_days else np.zeros(n_groups), last_equity),
+        position_values=position_values[-1] if n_days else np.zeros(holdings.shape[1])
+    )
+
+def safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """분모가 0 이하인 항목은 0으로 채우는 나눗셈"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator),
+                     where=np.asarray(denominator) > 0)
@@ -1,26 +1,99 @@
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field as dataclass_field
+from typing import Any, Iterable, List, Dict, Optional, Set, Tuple, Union
 from datetime import datetime
+import operator
 import uuid
+import numpy as np
+import pandas as pd
 
 from ..core.behavior_analyzer import InvestmentBehavior
 from ..schemas.response import CoachingAction
-from ..config import Constants
+from ..config import Config, Constants
+
+@dataclass
+class RuleHitMatrix:
+    """(사용자 × 룰) 희소 적중 행렬 (COO 형식)
+    
+    user_index/rule_index 쌍이 적중 항목이며 사용자 순으로 정렬되어 있다.
+    """
+    user_ids: List[str]
+    rule_ids: List[str]
+    user_index: np.ndarray
+    rule_index: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.user_index)
+    
+    def rules_for(self, user_id: str) -> List[str]:
+        """사용자에게 적중한 룰 ID 목록"""
+        return self.rules_at(self.user_ids.index(user_id))
+    
+    def rules_at(self, user: int) -> List[str]:
+        """user_ids 위치 기준 적중 룰 ID 목록"""
+        start, end = np.searchsorted(self.user_index, [user, user + 1])
+        return [self.rule_ids[r] for r in self.rule_index[start:end]]
+    
+    def hit_counts(self) -> Dict[str, int]:
+        """룰별 적중 사용자 수"""
+        counts = np.bincount(self.rule_index, minlength=len(self.rule_ids))
+        return dict(zip(self.rule_ids, counts.tolist()))
+    
+    def to_dense(self) -> np.ndarray:
+        """bool (사용자 × 룰) 행렬로 변환"""
+        dense = np.zeros((len(self.user_ids), len(self.rule_ids)), dtype=bool)
+        dense[self.user_index, self.rule_index] = True
+        return dense
+
+@dataclass
+class UserRuleState:
+    """사용자별 마지막 룰 평가 (증분 재평가의 기준)"""
+    behavior: InvestmentBehavior
+    history: Dict[str, bool] = dataclass_field(default_factory=dict)     # 룰 ID -> 적중 여부
+    context: Dict[str, Any] = dataclass_field(default_factory=dict)      # 평가에 쓰인 user_context
+
+# 선언형 룰 조건에서 쓸 수 있는 비교 연산자 (스칼라/배열 모두 동작)
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# 룰 조건: (InvestmentBehavior 필드, 연산자, 임계값)
+Condition = Tuple[str, str, Any]
+
+def _behavior_frame(behaviors: Union[pd.DataFrame, List[InvestmentBehavior]]) -> pd.DataFrame:
+    """InvestmentBehavior 목록을 행 단위 DataFrame으로 변환"""
+    if isinstance(behaviors, pd.DataFrame):
+        return behaviors.reset_index(drop=True)
+    return pd.DataFrame([vars(behavior) for behavior in behaviors])
 
 class RuleEngine:
     """정책 기반 룰 엔진"""
     
-    def __init__(self):
-        self.rules = self._initialize_rules()
-        self.rule_history = {}
+    def __init__(self, rules: Optional[List[Dict]] = None, max_users: Optional[int] = None):
+        self.rules = self._compile_rules(rules if rules is not None else self._initialize_rules())
+        # 필드 -> 해당 필드를 읽는 룰 위치 목록
+        self.field_index = self._build_field_index(self.rules)
+        # 사용자 -> 마지막 평가 (최근 평가 순, max_users를 넘으면 가장 오래된 사용자부터 제거)
+        self.max_users = Config.RULE_STATE_MAX_USERS if max_users is None else max_users
+        self.user_states: 'OrderedDict[str, UserRuleState]' = OrderedDict()
     
     def _initialize_rules(self) -> List[Dict]:
-        """룰 정의"""
+        """룰 정의
+        
+        conditions는 모두 만족해야 적중하는 (필드, 연산자, 임계값) 목록이며, 필드는
+        InvestmentBehavior 필드 또는 evaluate_rules에 넘기는 user_context 키다.
+        """
         return [
             {
                 'id': 'R-001',
                 'name': '과도한 회전율 경고',
                 'priority': 'high',
-                'condition': lambda b: b.turnover_rate > 60,
+                'conditions': [('turnover_rate', '>', 60)],
                 'action_type': 'warning',
                 'recommendation': {
                     'cash_ratio': 0.2,
@@ -37,7 +110,7 @@ class RuleEngine:
                 'id': 'R-002',
                 'name': '단타 패턴 개선',
                 'priority': 'high',
-                'condition': lambda b: b.avg_holding_period < 7,
+                'conditions': [('avg_holding_period', '<', 7)],
                 'action_type': 'goal_setting',
                 'recommendation': {
                     'min_holding_days': 7,
@@ -55,7 +128,7 @@ class RuleEngine:
                 'id': 'R-003',
                 'name': 'FOMO 매수 억제',
                 'priority': 'medium',
-                'condition': lambda b: b.fomo_purchase_count > 10,
+                'conditions': [('fomo_purchase_count', '>', 10)],
                 'action_type': 'habit_correction',
                 'recommendation': {
                     'cooling_period': 24,
@@ -67,24 +140,130 @@ class RuleEngine:
                     'entry_price_improvement': 3
                 },
                 'mstock_executable': False
+            },
+            {
+                'id': 'R-004',
+                'name': '포트폴리오 변동성 과다',
+                'priority': 'medium',
+                # 공분산 캐시로 계산한 보유 종목 예상 변동성 (user_context 필드, %)
+                'conditions': [('expected_volatility', '>', Constants.TARGET_KPI['portfolio_volatility'])],
+                'action_type': 'rebalancing',
+                'recommendation': {
+                    'target_volatility': Constants.TARGET_KPI['portfolio_volatility'] / 100,
+                    'diversify': True
+                },
+                'message_template': "보유 종목의 예상 변동성이 {expected_volatility:.1f}%로 목표보다 높습니다.",
+                'expected_impact': {
+                    'volatility_reduction': -20
+                },
+                'mstock_executable': True
             }
         ]
     
+    @staticmethod
+    def _compile_rules(rules: List[Dict]) -> List[Dict]:
+        """조건의 연산자를 함수로 바꾸고 룰이 읽는 필드 목록을 기록"""
+        compiled = []
+        for rule in rules:
+            conditions = []
+            for field, op, threshold in rule['conditions']:
+                if op not in OPERATORS:
+                    raise ValueError(f"지원하지 않는 연산자입니다: {rule['id']} {op}")
+                conditions.append((field, OPERATORS[op], threshold))
+            compiled.append({
+                **rule,
+                'compiled_conditions': conditions,
+                'fields': frozenset(field for field, _, _ in conditions)
+            })
+        return compiled
+    
+    @staticmethod
+    def _build_field_index(rules: List[Dict]) -> Dict[str, List[int]]:
+        index: Dict[str, List[int]] = {}
+        for position, rule in enumerate(rules):
+            for field in sorted(rule['fields']):
+                index.setdefault(field, []).append(position)
+        return index
+    
+    @staticmethod
+    def _matches(rule: Dict, behavior: Any, context: Dict[str, Any]) -> bool:
+        """모든 조건 만족 여부 (값이 없는 필드의 조건은 불충족)"""
+        for field, op, threshold in rule['compiled_conditions']:
+            value = getattr(behavior, field, None)
+            if value is None:
+                value = context.get(field)
+            if value is None or not op(value, threshold):
+                return False
+        return True
+    
     async def evaluate_rules(self, behavior: InvestmentBehavior, 
                            user_context: Optional[Dict] = None) -> List[CoachingAction]:
-        """행동 패턴에 대한 룰 평가"""
-        triggered_actions = []
-        
+        """행동 패턴에 대한 룰 평가 (사용자별 평가 결과를 user_states에 기록)"""
+        state = UserRuleState(behavior, context=dict(user_context or {}))
         for rule in self.rules:
-            if rule['condition'](behavior):
-                action = await self._create_coaching_action(rule, behavior)
-                triggered_actions.append(action)
+            state.history[rule['id']] = self._matches(rule, behavior, state.context)
+        self._remember(behavior.user_id, state)
+        
+        return await self._active_actions(state)
+    
+    async def evaluate_changed(self, behavior: InvestmentBehavior,
+                               changed_fields: Optional[Iterable[str]] = None,
+                               user_context: Optional[Dict] = None) -> List[CoachingAction]:
+        """변경된 필드를 읽는 룰만 재평가하고 현재 적중 룰의 코칭 액션 반환
+        
+        changed_fields를 생략하면 마지막으로 평가한 행동 패턴과 비교해 구한다. 이전 평가
+        기록이 없는 사용자는 전체 룰을 평가한다. user_context는 이전 컨텍스트에 덮어쓰며,
+        바뀐 컨텍스트 키도 changed_fields에 포함해야 한다.
+        """
+        state = self.user_states.get(behavior.user_id)
+        if state is None:
+            return await self.evaluate_rules(behavior, user_context)
+        
+        if changed_fields is None:
+            changed_fields = self.changed_fields(state.behavior, behavior)
+        state.behavior = behavior
+        state.context.update(user_context or {})
+        for position in self.rules_for_fields(changed_fields):
+            rule = self.rules[position]
+            state.history[rule['id']] = self._matches(rule, behavior, state.context)
+        self._remember(behavior.user_id, state)
         
-        return triggered_actions
+        return await self._active_actions(state)
+    
+    def _remember(self, user_id: str, state: UserRuleState):
+        """사용자 평가 기록 갱신 (상한을 넘으면 가장 오래 평가하지 않은 사용자부터 제거)"""
+        self.user_states[user_id] = state
+        self.user_states.move_to_end(user_id)
+        while len(self.user_states) > self.max_users:
+            self.user_states.popitem(last=False)
+    
+    def rules_for_fields(self, fields: Iterable[str]) -> List[int]:
+        """필드 중 하나라도 읽는 룰 위치 목록 (룰 정의 순)"""
+        positions: Set[int] = set()
+        for field in fields:
+            positions.update(self.field_index.get(field, ()))
+        return sorted(positions)
+    
+    @staticmethod
+    def changed_fields(previous: InvestmentBehavior, current: InvestmentBehavior) -> List[str]:
+        """두 행동 패턴 사이에 값이 바뀐 필드 목록"""
+        return [
+            field for field, value in vars(current).items()
+            if field not in ('user_id', 'analysis_date') and getattr(previous, field, None) != value
+        ]
     
-    async def _create_coaching_action(self, rule: Dict, behavior: InvestmentBehavior) -> CoachingAction:
+    async def _active_actions(self, state: UserRuleState) -> List[CoachingAction]:
+        """평가 기록에서 적중 상태인 룰의 코칭 액션 생성 (룰 정의 순)"""
+        return [
+            await self._create_coaching_action(rule, state.behavior, state.context)
+            for rule in self.rules if state.history.get(rule['id'])
+        ]
+    
+    async def _create_coaching_action(self, rule: Dict, behavior: InvestmentBehavior,
+                                      user_context: Optional[Dict] = None) -> CoachingAction:
         """룰로부터 코칭 액션 생성"""
         message_params = {
+            **(user_context or {}),
             'rate': behavior.turnover_rate,
             'days': behavior.avg_holding_period,
             'count': behavior.fomo_purchase_count
@@ -102,3 +281,55 @@ class RuleEngine:
             expected_impact=rule['expected_impact'],
             mstock_executable=rule['mstock_executable']
         )
+    
+    def evaluate_rules_batch(self, behaviors: Union[pd.DataFrame, List[InvestmentBehavior]]) -> RuleHitMatrix:
+        """여러 사용자의 행동 패턴을 한 번에 평가
+        
+        룰 조건을 InvestmentBehavior 필드명 컬럼 배열에 적용해
+        조건마다 전체 사용자에 대한 벡터 비교 한 번으로 판정하고, 결과는 희소 적중
+        행렬로 돌려준다. 코칭 액션은 build_actions로 필요한 사용자만 만든다.
+        """
+        frame = _behavior_frame(behaviors)
+        n_users = len(frame)
+        user_ids = frame['user_id'].astype(str).tolist() if n_users else []
+        
+        # 룰이 읽는 필드만 한 번씩 배열로 꺼내 모든 룰이 공유 (없는 컬럼/None 값은 불충족)
+        columns = {
+            field: frame[field].to_numpy(dtype=np.float64, na_value=np.nan) if field in frame
+            else np.full(n_users, np.nan)
+            for field in self.field_index
+        }
+        hits = np.zeros((n_users, len(self.rules)), dtype=bool)
+        for j, rule in enumerate(self.rules):
+            hit = np.ones(n_users, dtype=bool)
+            for field, op, threshold in rule['compiled_conditions']:
+                hit &= op(columns[field], threshold) & ~pd.isna(columns[field])
+            hits[:, j] = hit
+        
+        user_index, rule_index = np.nonzero(hits)
+        return RuleHitMatrix(
+            user_ids=user_ids,
+            rule_ids=[rule['id'] for rule in self.rules],
+            user_index=user_index,
+            rule_index=rule_index
+        )
+    
+    async def build_actions(self, hits: RuleHitMatrix,
+                            behaviors: Union[pd.DataFrame, List[InvestmentBehavior]],
+                            user_ids: Optional[List[str]] = None) -> Dict[str, List[CoachingAction]]:
+        """적중 행렬에서 지정한 사용자(기본값: 전체 적중 사용자)의 코칭 액션 생성"""
+        frame = _behavior_frame(behaviors)
+        rules = {rule['id']: rule for rule in self.rules}
+        positions = {user_id: i for i, user_id in enumerate(hits.user_ids)}
+        if user_ids is None:
+            user_ids = [hits.user_ids[i] for i in np.unique(hits.user_index)]
+        
+        actions = {}
+        for user_id in user_ids:
+            user = positions[user_id]
+            row = frame.iloc[user]
+            actions[user_id] = [
+                await self._create_coaching_action(rules[rule_id], row, row.to_dict())
+                for rule_id in hits.rules_at(user)
+            ]
+        return actions
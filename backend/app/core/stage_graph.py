@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_NO_FALLBACK = object()
+
+@dataclass
+class Stage:
+    """리포트 생성 단계
+
+    func는 선행 단계 결과를 단계 이름 키워드 인자로 받는다(동기/비동기 모두 가능).
+    timeout을 넘기거나 예외가 나면 fallback(호출 가능하면 호출 결과)으로 대체하며,
+    fallback이 없으면 예외를 그대로 올려 전체 실행을 중단한다.
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fallback: Any = _NO_FALLBACK
+
+@dataclass
+class StageResults:
+    """단계별 결과와 대체값 사용 단계, 소요 시간(초)"""
+    values: Dict[str, Any]
+    degraded: List[str] = field(default_factory=list)
+    durations: Dict[str, float] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+async def run_stages(stages: List[Stage]) -> StageResults:
+    """단계 의존 그래프 실행
+
+    선행 단계가 끝난 단계부터 바로 시작하므로 서로 독립인 단계는 동시에 실행된다.
+    """
+    results = StageResults(values={})
+    async for _ in iter_stages(stages, results):
+        pass
+    return results
+
+async def iter_stages(stages: List[Stage],
+                      results: Optional[StageResults] = None) -> AsyncIterator[Tuple[str, Any, bool]]:
+    """단계 의존 그래프를 실행하며 끝나는 순서대로 (단계 이름, 결과, 대체값 사용 여부) 반환
+
+    results가 주어지면 단계별 결과/소요 시간을 함께 기록한다.
+    소비하는 쪽이 중간에 멈추면(스트리밍 연결 종료 등) 남은 단계는 취소된다.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [dep for dep in stage.depends_on if dep not in by_name]
+        if unknown:
+            raise ValueError(f"알 수 없는 선행 단계입니다: {stage.name} -> {unknown}")
+
+    results = StageResults(values={}) if results is None else results
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage) -> Any:
+        inputs = {dep: await tasks[dep] for dep in stage.depends_on}
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(_call(stage.func, inputs), stage.timeout)
+        except Exception as e:
+            if stage.fallback is _NO_FALLBACK:
+                raise
+            logger.warning("단계 %s 대체값 사용: %r", stage.name, e)
+            value = stage.fallback() if callable(stage.fallback) else stage.fallback
+            results.degraded.append(stage.name)
+        results.durations[stage.name] = time.perf_counter() - started
+        results.values[stage.name] = value
+        return value
+
+    # 선행 단계 작업이 먼저 만들어지도록 위상 정렬 순서로 생성
+    for stage in _topological_order(stages, by_name):
+        tasks[stage.name] = asyncio.create_task(run(stage))
+    names = {task: name for name, task in tasks.items()}
+    pending = set(tasks.values())
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: list(tasks).index(names[t])):
+                name = names[task]
+                value = task.result()
+                yield name, value, name in results.degraded
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+async def _call(func: Callable[..., Any], inputs: Dict[str, Any]) -> Any:
+    value = func(**inputs)
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+def _topological_order(stages: List[Stage], by_name: Dict[str, Stage]) -> List[Stage]:
+    order: List[Stage] = []
+    state: Dict[str, int] = {}     # 1: 방문 중, 2: 완료
+
+    def visit(stage: Stage):
+        if state.get(stage.name) == 2:
+            return
+        if state.get(stage.name) == 1:
+            raise ValueError(f"단계 의존성에 순환이 있습니다: {stage.name}")
+        state[stage.name] = 1
+        for dep in stage.depends_on:
+            visit(by_name[dep])
+        state[stage.name] = 2
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
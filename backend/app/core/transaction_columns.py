@@ -0,0 +1,269 @@
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+MISSING_SECTOR = '기타'
+
+class SymbolTable:
+    """문자열 심볼 <-> 정수 카테고리 코드 테이블
+
+    테이블은 거래 묶음(요청)마다 따로 두고, 같은 테이블을 쓰는 묶음/시세끼리만 코드가 통한다.
+    거래 저장소는 저장소 전체 테이블을 쓴다. 코드는 한 번 부여되면 바뀌지 않는다(추가만 가능).
+    """
+
+    def __init__(self, symbols: Optional[Iterable[str]] = None):
+        self.symbols: List[str] = []
+        self.labels: Dict[int, str] = {}
+        self._codes: Dict[str, int] = {}
+        for symbol in symbols or []:
+            self._intern_one(symbol)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _intern_one(self, symbol: str) -> int:
+        code = self._codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            self._codes[symbol] = code
+            self.symbols.append(symbol)
+        return code
+
+    def intern(self, values: Iterable, labels: Optional[Iterable] = None) -> np.ndarray:
+        """값 배열을 코드 배열로 변환 (새 심볼은 테이블에 추가)
+
+        Python 루프는 고유값 수만큼만 돈다. labels(예: 종목명)가 주어지면 코드별 표시명으로 기록한다.
+        """
+        uniques_codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        mapping = np.array([self._intern_one(str(u)) for u in uniques], dtype=np.int32)
+        codes = mapping[uniques_codes] if len(mapping) else np.zeros(len(uniques_codes), dtype=np.int32)
+
+        if labels is not None:
+            labels = pd.Series(labels, dtype=object).to_numpy()
+            first = np.unique(uniques_codes, return_index=True)[1]
+            for code, label in zip(codes[first], labels[first]):
+                if label is not None and label == label:
+                    self.labels[int(code)] = str(label)
+        return codes
+
+    def code(self, symbol: str) -> Optional[int]:
+        return self._codes.get(symbol)
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """코드 배열을 심볼 배열(object)로 변환"""
+        return np.asarray(self.symbols, dtype=object)[np.asarray(codes)]
+
+    def label(self, code: int) -> str:
+        return self.labels.get(int(code), self.symbols[int(code)])
+
+    def subset(self, codes: np.ndarray) -> 'SymbolTable':
+        """codes의 심볼만 그 순서대로 담은 새 테이블 (표시명 포함)"""
+        codes = np.asarray(codes).tolist()
+        table = SymbolTable(self.symbols[code] for code in codes)
+        table.labels = {i: self.labels[code] for i, code in enumerate(codes) if code in self.labels}
+        return table
+
+def _sector_table() -> SymbolTable:
+    return SymbolTable([MISSING_SECTOR])
+
+def _epoch_days(dates) -> np.ndarray:
+    return pd.to_datetime(pd.Series(dates)).values.astype('datetime64[D]').astype(np.int64)
+
+@dataclass
+class TransactionColumns:
+    """컬럼형 거래 내역
+
+    stock_code/sector는 묶음의 심볼 테이블(따로 주지 않으면 묶음마다 새 테이블) 정수 코드,
+    가격/수량은 고정폭 배열, 날짜는 int64 epoch day로 보관한다. 사용자 코드는 묶음 내
+    users 목록의 위치다.
+    """
+    users: List[str]
+    user_codes: np.ndarray      # int32
+    stock_codes: np.ndarray     # int32
+    sector_codes: np.ndarray    # int32
+    days: np.ndarray            # int64 epoch day
+    is_buy: np.ndarray          # bool
+    shares: np.ndarray          # float64
+    prices: np.ndarray          # float64
+    values: np.ndarray          # float64
+    stock_table: SymbolTable = field(default_factory=SymbolTable, repr=False)
+    sector_table: SymbolTable = field(default_factory=_sector_table, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        """배열 메모리 사용량 (바이트)"""
+        return sum(getattr(self, name).nbytes for name in (
+            'user_codes', 'stock_codes', 'sector_codes', 'days', 'is_buy', 'shares', 'prices', 'values'
+        ))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, stock_table: Optional[SymbolTable] = None,
+                   sector_table: Optional[SymbolTable] = None) -> 'TransactionColumns':
+        """거래 DataFrame(user_id, date, stock_code, type, shares, price[, sector, value, stock_name])에서 생성"""
+        stock_table = SymbolTable() if stock_table is None else stock_table
+        sector_table = _sector_table() if sector_table is None else sector_table
+        n = len(frame)
+        if n == 0:
+            return cls.empty(stock_table, sector_table)
+
+        user_codes, users = pd.factorize(frame['user_id']) if 'user_id' in frame else (
+            np.zeros(n, dtype=np.int64), pd.Index(['demo_user'])
+        )
+        shares = frame['shares'].to_numpy(dtype=np.float64)
+        prices = frame['price'].to_numpy(dtype=np.float64)
+        sectors = frame['sector'].fillna(MISSING_SECTOR) if 'sector' in frame else [MISSING_SECTOR] * n
+
+        return cls(
+            users=[str(u) for u in users],
+            user_codes=user_codes.astype(np.int32),
+            stock_codes=stock_table.intern(frame['stock_code'], frame.get('stock_name')),
+            sector_codes=sector_table.intern(sectors),
+            days=_epoch_days(frame['date']),
+            is_buy=(frame['type'] == 'buy').to_numpy(),
+            shares=shares,
+            prices=prices,
+            values=frame['value'].to_numpy(dtype=np.float64) if 'value' in frame else shares * prices,
+            stock_table=stock_table,
+            sector_table=sector_table
+        )
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], **tables) -> 'TransactionColumns':
+        """거래 dict 목록(TransactionData.transactions 등)에서 생성"""
+        return cls.from_frame(pd.DataFrame(records), **tables)
+
+    @classmethod
+    def empty(cls, stock_table: Optional[SymbolTable] = None,
+              sector_table: Optional[SymbolTable] = None) -> 'TransactionColumns':
+        stock_table = SymbolTable() if stock_table is None else stock_table
+        sector_table = _sector_table() if sector_table is None else sector_table
+        int32 = np.empty(0, dtype=np.int32)
+        float64 = np.empty(0, dtype=np.float64)
+        return cls([], int32, int32, int32, np.empty(0, dtype=np.int64), np.empty(0, dtype=bool),
+                   float64, float64, float64, stock_table, sector_table)
+
+    def take(self, indices: np.ndarray) -> 'TransactionColumns':
+        """행 선택 (사용자 목록은 유지)"""
+        return TransactionColumns(
+            users=self.users,
+            user_codes=self.user_codes[indices],
+            stock_codes=self.stock_codes[indices],
+            sector_codes=self.sector_codes[indices],
+            days=self.days[indices],
+            is_buy=self.is_buy[indices],
+            shares=self.shares[indices],
+            prices=self.prices[indices],
+            values=self.values[indices],
+            stock_table=self.stock_table,
+            sector_table=self.sector_table
+        )
+
+    def compacted(self, prices: Optional['PriceColumns'] = None
+                  ) -> Tuple['TransactionColumns', Optional['PriceColumns']]:
+        """묶음(과 시세)이 참조하는 심볼만 담은 새 테이블로 코드를 다시 매긴 사본
+
+        저장소 전체 테이블처럼 큰 테이블을 분석 프로세스로 보내지 않도록, 작업 전에
+        필요한 심볼만 남긴다. prices는 같은 새 테이블 기준 코드로 바뀐다.
+        """
+        n = len(self)
+        stock_codes = self.stock_codes if prices is None else np.concatenate([self.stock_codes, prices.stock_codes])
+        stocks, stock_index = np.unique(stock_codes, return_inverse=True)
+        sectors, sector_index = np.unique(self.sector_codes, return_inverse=True)
+        columns = replace(
+            self,
+            stock_codes=stock_index[:n].astype(np.int32),
+            sector_codes=sector_index.astype(np.int32),
+            stock_table=self.stock_table.subset(stocks),
+            sector_table=self.sector_table.subset(sectors)
+        )
+        if prices is not None:
+            prices = PriceColumns(stock_index[n:].astype(np.int32), prices.days, prices.closes)
+        return columns, prices
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame으로 변환"""
+        return pd.DataFrame({
+            'user_id': np.asarray(self.users, dtype=object)[self.user_codes] if self.users else [],
+            'date': self.days.astype('datetime64[D]').astype('datetime64[ns]'),
+            'stock_code': self.stock_table.lookup(self.stock_codes),
+            'sector': self.sector_table.lookup(self.sector_codes),
+            'type': np.where(self.is_buy, 'buy', 'sell'),
+            'shares': self.shares,
+            'price': self.prices,
+            'value': self.values
+        })
+
+    def positions(self) -> pd.DataFrame:
+        """종목별 순보유 수량과 마지막 체결가로 현재 보유 종목 구성"""
+        if len(self) == 0:
+            return pd.DataFrame(columns=['stock_code', 'stock_name', 'sector', 'shares',
+                                         'current_price', 'value'])
+
+        n_stocks = int(self.stock_codes.max()) + 1
+        net = np.bincount(self.stock_codes, weights=np.where(self.is_buy, self.shares, -self.shares),
+                          minlength=n_stocks)
+        order = np.lexsort((self.days, self.stock_codes))
+        last = order[np.r_[self.stock_codes[order][1:] != self.stock_codes[order][:-1], True]]
+
+        held = last[net[self.stock_codes[last]] > 0]
+        codes = self.stock_codes[held]
+        shares = net[codes]
+        prices = self.prices[held]
+        return pd.DataFrame({
+            'stock_code': self.stock_table.lookup(codes),
+            'stock_name': [self.stock_table.label(c) for c in codes],
+            'sector': self.sector_table.lookup(self.sector_codes[held]),
+            'shares': shares,
+            'current_price': prices,
+            'value': shares * prices
+        })
+
+@dataclass
+class PriceColumns:
+    """컬럼형 일별 종가 (종목 코드는 함께 쓰는 TransactionColumns의 심볼 테이블 기준)"""
+    stock_codes: np.ndarray     # int32
+    days: np.ndarray            # int64 epoch day
+    closes: np.ndarray          # float64
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, stock_table: SymbolTable) -> 'PriceColumns':
+        """시세 DataFrame(stock_code, date, close)에서 생성 (종목 코드는 stock_table에 추가)"""
+        return cls(
+            stock_codes=stock_table.intern(frame['stock_code']),
+            days=_epoch_days(frame['date']),
+            closes=frame['close'].to_numpy(dtype=np.float64)
+        )
+
+    @classmethod
+    def from_transactions(cls, columns: TransactionColumns) -> 'PriceColumns':
+        """체결가로 종목별 일별 종가(당일 마지막 체결가) 구성"""
+        if len(columns) == 0:
+            return cls(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64), np.empty(0))
+        order = np.lexsort((columns.days, columns.stock_codes))
+        codes = columns.stock_codes[order]
+        days = columns.days[order]
+        last = np.r_[(codes[1:] != codes[:-1]) | (days[1:] != days[:-1]), True]
+        return cls(codes[last], days[last], columns.prices[order][last])
+
+    def merged_over(self, base: 'PriceColumns') -> 'PriceColumns':
+        """base 위에 현재 가격을 덮어쓴 결과 (같은 종목/일자는 현재 값 우선)"""
+        codes = np.concatenate([base.stock_codes, self.stock_codes])
+        days = np.concatenate([base.days, self.days])
+        closes = np.concatenate([base.closes, self.closes])
+        order = np.lexsort((days, codes))
+        codes, days, closes = codes[order], days[order], closes[order]
+        last = np.r_[(codes[1:] != codes[:-1]) | (days[1:] != days[:-1]), True]
+        return PriceColumns(codes[last], days[last], closes[last])
+
+def as_columns(transactions) -> TransactionColumns:
+    """DataFrame이면 컬럼형으로 변환, 이미 컬럼형이면 그대로 반환"""
+    if isinstance(transactions, TransactionColumns):
+        return transactions
+    return TransactionColumns.from_frame(transactions)
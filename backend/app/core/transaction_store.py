@@ -0,0 +1,333 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+from ..config import Config
+from .transaction_columns import MISSING_SECTOR, SymbolTable, TransactionColumns
+
+logger = logging.getLogger(__name__)
+
+# 세그먼트에 저장하는 컬럼 (파일명 = 컬럼명.npy)
+_COLUMNS = ('user_codes', 'stock_codes', 'sector_codes', 'days', 'is_buy', 'shares', 'prices', 'values')
+
+# 크기 계층 병합: 행 수가 같은 4배 구간에 있는 세그먼트가 이만큼 모이면 하나로 병합
+_MERGE_FACTOR = 4
+
+def _write_json(path: str, data):
+    """임시 파일에 쓴 뒤 교체해 부분 기록을 남기지 않는다"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _append_lines(path: str, records: List[dict]):
+    """JSON 줄 로그에 기록 추가 (fsync까지 해 세그먼트보다 먼저 디스크에 남긴다)"""
+    if not records:
+        return
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def _read_lines(path: str) -> Iterator[dict]:
+    """JSON 줄 로그 읽기 (기록 도중 중단된 마지막 줄은 건너뛴다)"""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("심볼 로그의 손상된 줄 무시: %s", path)
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+class _Segment:
+    """읽기 전용 세그먼트 (컬럼별 메모리 맵 + 사용자별 행 구간 인덱스)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in _COLUMNS
+        }
+        # (사용자 코드, 시작 행, 끝 행) - 사용자 코드 오름차순
+        self.index = np.load(os.path.join(path, 'index.npy'))
+
+    def __len__(self) -> int:
+        return len(self.columns['days'])
+
+    def user_range(self, user_code: int) -> Optional[slice]:
+        pos = np.searchsorted(self.index[:, 0], user_code)
+        if pos == len(self.index) or self.index[pos, 0] != user_code:
+            return None
+        return slice(int(self.index[pos, 1]), int(self.index[pos, 2]))
+
+class TransactionStore:
+    """사용자별 거래 내역 추가 전용 컬럼형 저장소
+
+    거래는 세그먼트 단위로 추가되며, 세그먼트는 (사용자, 날짜) 순으로 정렬된
+    컬럼별 .npy 파일과 사용자별 행 구간 인덱스로 이루어진다. 읽기는 np.load의
+    메모리 맵을 그대로 잘라 TransactionColumns로 돌려주므로 파싱이나 행 단위
+    객체 생성이 없고, 한 세그먼트에만 있는 사용자의 이력은 복사 없이 읽힌다.
+
+    append는 새 묶음 크기만큼만 일하고, 세그먼트 수가 상한을 넘으면 백그라운드 스레드가
+    크기 계층 병합(비슷한 크기끼리 병합)을 한다. 병합은 기존 세그먼트를 읽기만 하고 새
+    세그먼트를 다 쓴 뒤 잠금 안에서 목록만 교체하므로 추가/조회를 막지 않는다.
+    compact()는 모든 세그먼트를 하나로 합쳐 사용자 이력을 연속 구간으로 만든다.
+
+    디렉터리 구성:
+        manifest.json   활성 세그먼트 목록 (교체 방식으로 원자적 갱신)
+        symbols.log     사용자/종목/섹터 심볼 추가 로그 (새 심볼만 한 줄씩 추가)
+        seg_000001/     세그먼트 (컬럼별 .npy, index.npy)
+    """
+
+    def __init__(self, root: Optional[str] = None, max_segments: Optional[int] = None):
+        self.root = root or Config.TRANSACTION_STORE_DIR
+        self.max_segments = Config.TRANSACTION_STORE_MAX_SEGMENTS if max_segments is None else max_segments
+        self._lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._merger: Optional[threading.Thread] = None
+
+        # 이전 형식(symbols.json 전체 스냅샷)이 있으면 먼저 읽고 로그를 이어서 반영
+        symbols = _read_json(os.path.join(self.root, 'symbols.json'), {})
+        self.users = SymbolTable(symbols.get('users', []))
+        self.stock_table = SymbolTable(symbols.get('stocks', []))
+        self.stock_table.labels = {int(k): v for k, v in symbols.get('stock_labels', {}).items()}
+        self.sector_table = SymbolTable(symbols.get('sectors', [MISSING_SECTOR]))
+        tables = {'users': self.users, 'stocks': self.stock_table, 'sectors': self.sector_table}
+        for record in _read_lines(os.path.join(self.root, 'symbols.log')):
+            table = tables[record['table']]
+            code = table.intern([record['symbol']])[0]
+            if record.get('label') is not None:
+                table.labels[int(code)] = record['label']
+
+        manifest = _read_json(os.path.join(self.root, 'manifest.json'), {'segments': [], 'next_id': 1})
+        self._next_id = manifest['next_id']
+        self._segments: List[_Segment] = [
+            _Segment(os.path.join(self.root, name)) for name in manifest['segments']
+        ]
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments)
+
+    def append(self, columns: TransactionColumns):
+        """거래 묶음을 새 세그먼트로 추가 (세그먼트 수가 상한을 넘으면 백그라운드 병합 시작)
+
+        파일 기록이 있으므로 이벤트 루프에서는 asyncio.to_thread로 호출한다.
+        """
+        if len(columns) == 0:
+            return
+
+        with self._lock:
+            # 묶음이 실제로 쓰는 코드만 저장소 심볼 테이블 코드로 변환하고, 새 심볼만 로그에 추가
+            records: List[dict] = []
+            user_map = self._intern_used(self.users, 'users', columns.users, columns.user_codes, records)
+            stock_map = self._intern_used(self.stock_table, 'stocks', columns.stock_table.symbols,
+                                          columns.stock_codes, records, columns.stock_table.labels)
+            sector_map = self._intern_used(self.sector_table, 'sectors', columns.sector_table.symbols,
+                                           columns.sector_codes, records)
+            os.makedirs(self.root, exist_ok=True)
+            _append_lines(os.path.join(self.root, 'symbols.log'), records)
+
+            arrays = {
+                'user_codes': user_map[columns.user_codes],
+                'stock_codes': stock_map[columns.stock_codes],
+                'sector_codes': sector_map[columns.sector_codes],
+                'days': columns.days,
+                'is_buy': columns.is_buy,
+                'shares': columns.shares,
+                'prices': columns.prices,
+                'values': columns.values
+            }
+            segment = self._write_segment(arrays, self._allocate_name())
+            self._commit(self._segments + [segment])
+            if self.max_segments and len(self._segments) > self.max_segments and self._merger is None:
+                self._merger = threading.Thread(target=self._merge_until_within_limit,
+                                                name='transaction-store-merge', daemon=True)
+                self._merger.start()
+
+    def read_user(self, user_id: str) -> TransactionColumns:
+        """사용자 거래 이력 조회
+
+        이력이 한 세그먼트에 있으면 메모리 맵의 뷰를 그대로 돌려주고(복사 없음),
+        여러 세그먼트에 걸쳐 있으면 이어 붙인다.
+        """
+        user_code = self.users.code(user_id)
+        segments = self._segments
+        slices = []
+        if user_code is not None:
+            for segment in segments:
+                rows = segment.user_range(user_code)
+                if rows is not None:
+                    slices.append({name: segment.columns[name][rows] for name in _COLUMNS})
+
+        if not slices:
+            return TransactionColumns.empty(self.stock_table, self.sector_table)
+        if len(slices) == 1:
+            data = slices[0]
+        else:
+            data = {name: np.concatenate([s[name] for s in slices]) for name in _COLUMNS}
+
+        n = len(data['days'])
+        return TransactionColumns(
+            users=[user_id],
+            user_codes=np.broadcast_to(np.int32(0), n),
+            stock_codes=data['stock_codes'],
+            sector_codes=data['sector_codes'],
+            days=data['days'],
+            is_buy=data['is_buy'],
+            shares=data['shares'],
+            prices=data['prices'],
+            values=data['values'],
+            stock_table=self.stock_table,
+            sector_table=self.sector_table
+        )
+
+    def scan(self) -> Iterator[TransactionColumns]:
+        """세그먼트 단위로 전체 거래 묶음을 순회 (사용자 코드 = 저장소 사용자 테이블 위치)"""
+        for segment in list(self._segments):
+            data = segment.columns
+            yield TransactionColumns(
+                users=self.users.symbols,
+                stock_table=self.stock_table,
+                sector_table=self.sector_table,
+                **{name: data[name] for name in _COLUMNS}
+            )
+
+    def compact(self):
+        """모든 세그먼트를 하나로 병합 (호출한 스레드에서 실행)"""
+        with self._merge_lock:
+            self._merge(list(self._segments))
+
+    def wait_for_merges(self, timeout: Optional[float] = None):
+        """진행 중인 백그라운드 병합이 끝날 때까지 대기"""
+        merger = self._merger
+        if merger is not None:
+            merger.join(timeout)
+
+    def _merge_until_within_limit(self):
+        """백그라운드 병합 스레드: 상한 이하가 될 때까지 병합
+
+        종료 판단과 _merger 해제를 추가와 같은 잠금 안에서 해, 종료 직전에 추가된
+        세그먼트가 병합 스레드 없이 남지 않게 한다.
+        """
+        with self._merge_lock:
+            while True:
+                with self._lock:
+                    group = self._plan_merge(list(self._segments))
+                    if len(group) < 2:
+                        self._merger = None
+                        return
+                try:
+                    self._merge(group)
+                except Exception as e:
+                    # 다음 추가 때 다시 시도 (기존 세그먼트는 그대로 유효)
+                    logger.warning("거래 저장소 세그먼트 병합 실패: %r", e)
+                    with self._lock:
+                        self._merger = None
+                    return
+
+    def _plan_merge(self, segments: List[_Segment]) -> List[_Segment]:
+        """다음에 병합할 세그먼트 묶음 (상한 이하이면 빈 목록)
+
+        행 수의 4배 구간(계층)이 같은 세그먼트가 _MERGE_FACTOR개 이상이면 가장 작은 계층부터
+        병합해 큰 세그먼트를 반복해서 다시 쓰지 않는다. 그런 계층이 없으면 가장 작은
+        세그먼트들을 상한 이하가 될 만큼 병합한다.
+        """
+        if not self.max_segments or len(segments) <= self.max_segments:
+            return []
+        tiers: Dict[int, List[_Segment]] = {}
+        for segment in segments:
+            tiers.setdefault(int(np.log(max(len(segment), 1)) / np.log(_MERGE_FACTOR)), []).append(segment)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= _MERGE_FACTOR:
+                return tiers[tier]
+        return sorted(segments, key=len)[:len(segments) - self.max_segments + 1]
+
+    def _merge(self, group: List[_Segment]):
+        """세그먼트 묶음을 하나로 병합 (쓰기는 잠금 밖에서, 목록 교체만 잠금 안에서)"""
+        if len(group) < 2:
+            return
+        arrays = {
+            name: np.concatenate([segment.columns[name] for segment in group]) for name in _COLUMNS
+        }
+        with self._lock:
+            name = self._allocate_name()
+        merged = self._write_segment(arrays, name)
+
+        with self._lock:
+            # 병합하는 동안 추가된 세그먼트는 그대로 두고, 병합 대상 자리에 새 세그먼트를 넣는다
+            paths = {segment.path for segment in group}
+            remaining = [segment for segment in self._segments if segment.path not in paths]
+            position = next(i for i, segment in enumerate(self._segments) if segment.path in paths)
+            self._commit(remaining[:position] + [merged] + remaining[position:])
+        for segment in group:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+    def _allocate_name(self) -> str:
+        """새 세그먼트 디렉터리 이름 (잠금 안에서 호출)"""
+        name = f'seg_{self._next_id:06d}'
+        self._next_id += 1
+        return name
+
+    def _write_segment(self, arrays: Dict[str, np.ndarray], name: str) -> _Segment:
+        """(사용자, 날짜) 순으로 정렬해 새 세그먼트 디렉터리 기록"""
+        order = np.lexsort((arrays['days'], arrays['user_codes']))
+        users = np.asarray(arrays['user_codes'])[order]
+        starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        index = np.column_stack([users[starts], starts, np.r_[starts[1:], len(users)]]).astype(np.int64)
+
+        path = os.path.join(self.root, name)
+        tmp = path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for column in _COLUMNS:
+            np.save(os.path.join(tmp, f'{column}.npy'), np.ascontiguousarray(np.asarray(arrays[column])[order]))
+        np.save(os.path.join(tmp, 'index.npy'), index)
+        os.replace(tmp, path)
+        return _Segment(path)
+
+    def _commit(self, segments: List[_Segment]):
+        """매니페스트 교체로 활성 세그먼트 목록 갱신"""
+        _write_json(os.path.join(self.root, 'manifest.json'), {
+            'segments': [os.path.basename(segment.path) for segment in segments],
+            'next_id': self._next_id
+        })
+        self._segments = segments
+
+    def _intern_used(self, table: SymbolTable, name: str, symbols: List[str], codes: np.ndarray,
+                     records: List[dict], labels: Optional[Dict[int, str]] = None) -> np.ndarray:
+        """묶음 코드 -> 저장소 코드 변환 배열 (묶음이 쓰는 코드만 등록, 새 심볼/표시명은 records에 추가)
+
+        묶음 테이블에 있지만 묶음 행이 쓰지 않는 코드는 -1로 둔다. 잠금 안에서 호출한다.
+        """
+        used = np.unique(np.asarray(codes))
+        mapping = np.full(len(symbols), -1, dtype=np.int32)
+        if len(used) == 0:
+            return mapping
+        known = len(table)
+        mapping[used] = table.intern([symbols[code] for code in used])
+        for code, stored in zip(used.tolist(), mapping[used].tolist()):
+            label = (labels or {}).get(code)
+            relabeled = label is not None and table.labels.get(stored) != label
+            if relabeled:
+                table.labels[stored] = label
+            if stored >= known or relabeled:
+                records.append({'table': name, 'symbol': table.symbols[stored], 'label': label})
+        return mapping
+
+# 앱 전역 거래 저장소 (첫 추가 시 디렉터리 생성)
+transaction_store = TransactionStore()
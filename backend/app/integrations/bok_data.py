@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import shutil
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from ..config import Config
+from .http_pool import HttpPool
+from .single_flight import SingleFlight
+
+@dataclass(frozen=True)
+class SeriesSpec:
+    """한국은행 ECOS 통계 항목
+
+    cycle: D(일), M(월). 월 통계는 해당 월 말일에 공표 지연일(publication_lag_days)을
+    더한 날부터 알 수 있는 값으로 보아, 거래일 기준 정렬 시 미래 값을 쓰지 않게 한다.
+    """
+    stat_code: str
+    item_code: str
+    cycle: str = 'D'
+    publication_lag_days: int = 0
+
+SERIES = {
+    'base_rate': SeriesSpec('722Y001', '0101000', 'D'),         # 한국은행 기준금리 (%)
+    'krw_usd': SeriesSpec('731Y001', '0000001', 'D'),           # 원/달러 환율 (매매기준율)
+    'cpi': SeriesSpec('901Y009', '0', 'M', publication_lag_days=5)  # 소비자물가지수 (2020=100)
+}
+
+@dataclass
+class MacroSeries:
+    """거시 지표 시계열 (값을 알 수 있게 된 날짜 오름차순)"""
+    name: str
+    days: np.ndarray        # datetime64[D]
+    values: np.ndarray      # float64
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def asof(self, dates) -> np.ndarray:
+        """각 날짜 시점에 알 수 있던 최신 값 (그 이전 값이 없으면 NaN)"""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        pos = np.searchsorted(self.days, dates, side='right') - 1
+        result = np.full(len(dates), np.nan)
+        found = pos >= 0
+        result[found] = self.values[pos[found]]
+        return result
+
+class MacroFetcher(ABC):
+    """거시 지표 조회 백엔드 인터페이스 (기간 [start, end]의 (날짜, 값) 배열 반환)"""
+
+    @abstractmethod
+    async def fetch(self, name: str, spec: SeriesSpec, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    async def close(self):
+        """연결 자원 정리 (연결을 갖지 않는 백엔드는 할 일 없음)"""
+
+def _period_days(periods: Sequence[str], spec: SeriesSpec) -> np.ndarray:
+    """ECOS 시점(YYYYMMDD, YYYYMM)을 값을 알 수 있는 날짜로 변환"""
+    if spec.cycle == 'M':
+        month_end = pd.to_datetime(list(periods), format='%Y%m') + pd.offsets.MonthEnd(0)
+        days = month_end + pd.Timedelta(days=spec.publication_lag_days)
+    else:
+        days = pd.to_datetime(list(periods), format='%Y%m%d') + pd.Timedelta(days=spec.publication_lag_days)
+    return days.values.astype('datetime64[D]')
+
+class EcosFetcher(MacroFetcher):
+    """한국은행 ECOS 통계 조회 OpenAPI"""
+
+    def __init__(self, transport: Optional[HttpPool] = None, api_key: Optional[str] = None):
+        self.transport = transport or HttpPool('https://ecos.bok.or.kr/api', max_concurrency=4, rate_per_second=5)
+        self.api_key = api_key or Config.BOK_API_KEY
+
+    async def fetch(self, name: str, spec: SeriesSpec, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+        fmt = '%Y%m' if spec.cycle == 'M' else '%Y%m%d'
+        response = await self.transport.request_json(
+            'GET',
+            f'/StatisticSearch/{self.api_key}/json/kr/1/100000/{spec.stat_code}/{spec.cycle}/'
+            f'{start.strftime(fmt)}/{end.strftime(fmt)}/{spec.item_code}'
+        )
+        rows = response.get('StatisticSearch', {}).get('row', [])
+        periods = [row['TIME'] for row in rows]
+        values = np.array([float(row['DATA_VALUE']) for row in rows], dtype=np.float64)
+        return _period_days(periods, spec), values
+
+    async def close(self):
+        await self.transport.close()
+
+class DemoMacroFetcher(MacroFetcher):
+    """데모용 거시 지표 (지표 이름으로 고정한 난수, 같은 시점은 항상 같은 값)"""
+
+    LEVELS = {'base_rate': 3.5, 'krw_usd': 1300.0, 'cpi': 110.0}
+
+    async def fetch(self, name: str, spec: SeriesSpec, start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+        origin = date(2010, 1, 1)
+        if spec.cycle == 'M':
+            periods = pd.period_range(origin, end, freq='M')
+            labels = [p.strftime('%Y%m') for p in periods]
+        else:
+            periods = pd.bdate_range(origin, end)
+            labels = [p.strftime('%Y%m%d') for p in periods]
+        rng = np.random.default_rng(zlib.crc32(name.encode('utf-8')))
+        level = self.LEVELS.get(name, 100.0)
+        values = level * np.cumprod(1 + rng.normal(0, 0.002, len(labels)))
+        if name == 'base_rate':
+            values = np.round(values * 4) / 4     # 0.25%p 단위
+        days = _period_days(labels, spec)
+        # 요청 기간의 시점만 반환 (월 통계는 해당 월 시점 기준)
+        keep = (periods >= pd.Timestamp(start).to_period('M')) if spec.cycle == 'M' else (periods >= pd.Timestamp(start))
+        return days[np.asarray(keep)], values[np.asarray(keep)]
+
+FETCHERS = {
+    'demo': DemoMacroFetcher,
+    'ecos': EcosFetcher
+}
+
+class BOKDataClient:
+    """한국은행 거시 지표 클라이언트
+
+    지표별로 (날짜, 값) 배열을 디렉터리에 .npy로 저장하고, 갱신 시에는 마지막으로 조회한
+    날 이후만 가져와 이어 붙인다. 거래일 배열에 대한 as-of 정렬은 searchsorted 한 번으로 끝난다.
+
+    디렉터리 구성:
+        base_rate/days.npy, values.npy, meta.json (조회 완료일)
+    """
+
+    def __init__(self, root: Optional[str] = None, fetcher: Optional[MacroFetcher] = None,
+                 history_start: date = date(2010, 1, 1), single_flight: Optional[SingleFlight] = None):
+        self.root = root or Config.BOK_CACHE_DIR
+        self.fetcher = fetcher if fetcher is not None else FETCHERS[Config.BOK_FETCHER]()
+        self.history_start = history_start
+        self.single_flight = single_flight if single_flight is not None else SingleFlight('bok')
+        self._loaded: Dict[str, Tuple[MacroSeries, date]] = {}
+        self._lock = threading.Lock()
+
+    async def get_series(self, name: str, through: Optional[date] = None) -> MacroSeries:
+        """지표 시계열 (through까지 조회되어 있지 않으면 빠진 기간만 갱신)"""
+        through = through or date.today() - timedelta(days=1)
+        cached = self._loaded.get(name) or self._load(name)
+        if cached is not None and cached[1] >= through:
+            return cached[0]
+        return await self.single_flight.do((name, through), lambda: self.refresh(name, through))
+
+    async def refresh(self, name: str, through: Optional[date] = None) -> MacroSeries:
+        """마지막 조회일 다음 날부터 through까지 가져와 이어 붙이고 저장"""
+        spec = SERIES[name]
+        through = through or date.today() - timedelta(days=1)
+        cached = self._loaded.get(name) or self._load(name)
+        if cached is None:
+            start = self.history_start
+        else:
+            start = cached[1] + timedelta(days=1)
+            if spec.cycle == 'M':
+                start = start.replace(day=1)     # 월 통계는 진행 중이던 월부터 다시 조회
+        if start > through:
+            return cached[0]
+
+        days, values = await self.fetcher.fetch(name, spec, start, through)
+        if cached is not None:
+            series = cached[0]
+            # 새로 받은 시점이 기존 시점과 겹치면 새 값으로 대체
+            keep = ~np.isin(series.days, days)
+            days = np.concatenate([series.days[keep], days])
+            values = np.concatenate([series.values[keep], values])
+        order = np.argsort(days, kind='stable')
+        series = MacroSeries(name, np.asarray(days, dtype='datetime64[D]')[order],
+                             np.asarray(values, dtype=np.float64)[order])
+        self._save(name, series, through)
+        return series
+
+    async def align(self, trade_dates, names: Optional[Sequence[str]] = None,
+                    through: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """거래일 배열 각각에 그 시점의 최신 지표 값 부착 (지표별 배열, 시점 이전 값이 없으면 NaN)
+
+        trade_dates는 날짜 배열 또는 TransactionColumns.days 같은 epoch day 정수 배열을 받는다.
+        """
+        names = list(names or SERIES)
+        trade_dates = _as_days(trade_dates)
+        series = await asyncio.gather(*[self.get_series(name, through) for name in names])
+        return {name: s.asof(trade_dates) for name, s in zip(names, series)}
+
+    async def close(self):
+        """조회 백엔드의 연결 풀 종료 (앱 종료 시 호출)"""
+        await self.fetcher.close()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _load(self, name: str) -> Optional[Tuple[MacroSeries, date]]:
+        path = self._path(name)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            return None
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        series = MacroSeries(
+            name,
+            np.load(os.path.join(path, 'days.npy')).astype('datetime64[D]'),
+            np.load(os.path.join(path, 'values.npy'))
+        )
+        self._loaded[name] = (series, date.fromisoformat(meta['fetched_through']))
+        return self._loaded[name]
+
+    def _save(self, name: str, series: MacroSeries, fetched_through: date):
+        with self._lock:
+            path = self._path(name)
+            tmp = path + '.tmp'
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            np.save(os.path.join(tmp, 'days.npy'), series.days.astype(np.int64))
+            np.save(os.path.join(tmp, 'values.npy'), series.values)
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({'fetched_through': fetched_through.isoformat(), 'count': len(series)}, f)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+            self._loaded[name] = (series, fetched_through)
+
+def _as_days(dates) -> np.ndarray:
+    dates = np.asarray(dates)
+    if dates.dtype.kind in 'iu':
+        return dates.astype('datetime64[D]')
+    return pd.to_datetime(dates).values.astype('datetime64[D]')
+
+# 앱 전역 한국은행 지표 클라이언트
+bok_client = BOKDataClient()
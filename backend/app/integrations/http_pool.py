@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적 서버 오류)
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+class UpstreamError(Exception):
+    """외부 API 호출 실패 (재시도 후에도 실패하거나 재시도 대상이 아닌 오류)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class TokenBucket:
+    """토큰 버킷 요청 속도 제한
+
+    초당 rate개씩 토큰이 차고 최대 capacity개까지 쌓이므로, 짧은 순간에는
+    capacity만큼 몰아 보내고 길게 보면 rate를 넘지 않는다.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """토큰이 찰 때까지 기다렸다가 차감 (rate가 0 이하이면 제한 없음)"""
+        if self.rate <= 0:
+            return
+        # 잠금 안에서 기다려 먼저 온 요청부터 순서대로 토큰을 받게 함
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+class HttpPool:
+    """외부 API용 공유 HTTP 연결 풀
+
+    앱 수명 주기에 맞춰 aiohttp 세션 하나를 열고 닫아 연결을 재사용하고,
+    동시 요청 수(세마포어)와 초당 요청 수(토큰 버킷)를 공급자 한도에 맞춘다.
+    재시도 대상 오류는 지수 백오프에 전체 지터를 더해 재시도한다.
+    """
+
+    def __init__(self, base_url: str, max_concurrency: int = 8, rate_per_second: float = 5.0,
+                 burst: Optional[float] = None, max_retries: int = 3, backoff_base: float = 0.2,
+                 backoff_max: float = 5.0, timeout: float = 10.0, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.rate_limiter = TokenBucket(rate_per_second, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.retries = 0
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        """세션 생성 (이미 열려 있으면 그대로 사용)"""
+        if self.started:
+            return
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request_json(self, method: str, path: str, **kwargs) -> Any:
+        """요청을 보내 JSON 응답을 반환 (세션이 없으면 먼저 연다)"""
+        if not self.started:
+            await self.start()
+        url = self.base_url + path
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    await self.rate_limiter.acquire()
+                    async with self._session.request(method, url, **kwargs) as response:
+                        if response.status < 400:
+                            return await response.json(content_type=None)
+                        body = await response.text()
+                        if response.status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                            raise UpstreamError(f"{method} {path} 실패 ({response.status}): {body[:200]}",
+                                                response.status)
+                        retry_after = _retry_after(response.headers.get('Retry-After'))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise UpstreamError(f"{method} {path} 실패: {e!r}") from e
+            self.retries += 1
+            delay = self._backoff(attempt) if retry_after is None else retry_after
+            logger.info("%s %s 재시도 %d/%d (%.2f초 후)", method, path, attempt + 1, self.max_retries, delay)
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """지수 백오프 상한 안에서 균등 분포로 뽑은 대기 시간 (동시 재시도 분산)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
@@ -1,16 +1,63 @@
 import aiohttp
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..config import Config
 from ..core.behavior_analyzer import InvestmentBehavior, InvestorType
+from .http_pool import HttpPool
+from .llm_cache import LLMResponseCache, behavior_prompt_fields, llm_cache, prompt_cache_key
+from .single_flight import SingleFlight
+
+# 앱 전역 HyperCLOVA X 연결 풀 (앱 시작/종료 시 열고 닫음)
+hyperclovax_pool = HttpPool(
+    Config.HYPERCLOVAX_API_URL,
+    max_concurrency=Config.HYPERCLOVAX_MAX_CONCURRENCY,
+    rate_per_second=Config.HYPERCLOVAX_RATE_PER_SECOND,
+    burst=Config.HYPERCLOVAX_BURST,
+    max_retries=Config.HYPERCLOVAX_MAX_RETRIES,
+    timeout=Config.HYPERCLOVAX_TIMEOUT,
+    headers={'Authorization': f'Bearer {Config.HYPERCLOVAX_API_KEY}'}
+)
+
+# 같은 프롬프트의 동시 요청 병합
+hyperclovax_flight = SingleFlight('hyperclovax')
 
 class HyperClovaXClient:
-    """HyperCLOVA X API 클라이언트 (데모용)"""
+    """HyperCLOVA X API 클라이언트
+
+    API 주소(HYPERCLOVAX_API_URL)가 설정되어 있으면 공유 연결 풀로 호출하고,
+    없으면 데모용 고정 응답을 돌려준다. API 응답은 (템플릿, 프롬프트 입력) 키로 캐시한다.
+    """
     
-    def __init__(self):
+    def __init__(self, transport: Optional[HttpPool] = None, cache: Optional[LLMResponseCache] = None,
+                 single_flight: Optional[SingleFlight] = None):
         self.api_key = Config.HYPERCLOVAX_API_KEY
+        self.transport = transport if transport is not None else (
+            hyperclovax_pool if Config.HYPERCLOVAX_API_URL else None
+        )
+        self.cache = cache if cache is not None else llm_cache
+        self.single_flight = single_flight if single_flight is not None else hyperclovax_flight
         self.prompt_templates = self._load_prompt_templates()
     
+    async def complete(self, prompt: str, max_tokens: int = 256) -> str:
+        """채팅 완성 API 호출"""
+        response = await self.transport.request_json(
+            'POST', f'/testapp/v1/chat-completions/{Config.HYPERCLOVAX_MODEL}',
+            json={
+                'messages': [{'role': 'user', 'content': prompt}],
+                'maxTokens': max_tokens,
+                'temperature': 0.5
+            }
+        )
+        return response['result']['message']['content']
+    
+    async def _complete_template(self, template_id: str, fields: Dict[str, str], max_tokens: int = 256) -> str:
+        """템플릿 프롬프트 완성 (같은 입력이면 캐시된 응답 사용, 동시 요청은 한 번만 호출)"""
+        prompt = self.prompt_templates[template_id].format(**fields)
+        key = prompt_cache_key(template_id, fields)
+        return await self.single_flight.do(key, lambda: self.cache.get_or_generate(
+            key, lambda: self.complete(prompt, max_tokens)
+        ))
+    
     def _load_prompt_templates(self) -> Dict[str, str]:
         return {
             'behavior_summary': """
@@ -35,7 +82,13 @@ class HyperClovaXClient:
     async def generate_behavior_summary(self, behavior: InvestmentBehavior, 
                                       investor_types: List[InvestorType]) -> str:
         """행동 패턴 요약 생성"""
-        # 데모용 응답 (실제로는 API 호출)
+        if self.transport is not None:
+            # 지표를 구간으로 양자화해 비슷한 사용자끼리 응답을 공유
+            return await self._complete_template(
+                'behavior_summary', behavior_prompt_fields(behavior, investor_types)
+            )
+        
+        # 데모용 응답
         if behavior.avg_holding_period < 7:
             return f"""
 평균 보유기간이 {behavior.avg_holding_period:.1f}일로 너무 짧아요. 
@@ -57,6 +110,12 @@ FOMO(Fear Of Missing Out)는 투자의 적입니다.
     
     async def generate_coaching_message(self, action: Dict) -> str:
         """개인화된 코칭 메시지 생성"""
+        if self.transport is not None:
+            return await self._complete_template('coaching_message', {
+                'situation': action.get('description', action['action_type']),
+                'recommendation': action.get('recommendation', '')
+            }, max_tokens=128)
+        
         # 데모용 응답
         if action['action_type'] == 'warning':
             return "지금은 잠시 숨을 고르는 시간이 필요해요. 감정적 매매는 수익의 적입니다! 🛑"
@@ -1,34 +1,139 @@
 import aiohttp
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import asyncio
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from datetime import date, datetime, timedelta
 from ..config import Config
+from ..core.transaction_columns import PriceColumns, SymbolTable
+from .ohlcv_store import OHLCV_COLUMNS, OHLCVStore, ohlcv_store
+from .price_fetchers import PriceFetcher, create_price_fetcher
+from .reference_data import ReferenceDataCache, reference_data
+from .single_flight import SingleFlight
+
+# 같은 데이터의 동시 요청 병합
+krx_flight = SingleFlight('krx')
+
+@dataclass
+class PriceMatrix:
+    """날짜 정렬 종가 행렬 (일 × 종목)
+
+    closes[i, j]는 dates[i]의 tickers[j] 종가이며, 어느 종목이든 일봉이 있는 날짜가
+    행이 되고 해당 종목 일봉이 없는 칸은 NaN(missing[i, j] = True)이다.
+    """
+    dates: np.ndarray           # datetime64[D]
+    tickers: List[str]
+    closes: np.ndarray          # float64 (일 × 종목)
+    missing: np.ndarray         # bool (일 × 종목)
+    index: Dict[str, int] = field(default_factory=dict, repr=False)
+    
+    def __post_init__(self):
+        if not self.index:
+            self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+    
+    def column(self, ticker: str) -> np.ndarray:
+        return self.closes[:, self.index[ticker]]
+    
+    def to_price_columns(self, stock_table: SymbolTable) -> PriceColumns:
+        """일봉이 있는 칸만 골라 행동 분석용 컬럼형 종가로 변환 (종목 코드는 거래 묶음의 심볼 테이블 기준)"""
+        rows, cols = np.nonzero(~self.missing)
+        codes = stock_table.intern(self.tickers)
+        return PriceColumns(
+            stock_codes=codes[cols],
+            days=self.dates[rows].astype(np.int64),
+            closes=self.closes[rows, cols]
+        )
 
 class KRXDataClient:
     """한국거래소 데이터 클라이언트"""
     
-    def __init__(self):
+    def __init__(self, single_flight: Optional[SingleFlight] = None, store: Optional[OHLCVStore] = None,
+                 fetcher: Optional[PriceFetcher] = None, reference: Optional[ReferenceDataCache] = None):
         self.api_key = Config.KRX_API_KEY
         self.base_url = "http://data-dbg.krx.co.kr/svc/apis"
+        self.single_flight = single_flight if single_flight is not None else krx_flight
+        self.store = store if store is not None else ohlcv_store
+        self.fetcher = fetcher if fetcher is not None else create_price_fetcher()
+        self._fetch_semaphore = asyncio.Semaphore(Config.KRX_FETCH_CONCURRENCY)
+        # 모든 사용자에게 같은 통계는 참조 데이터 캐시에서 제공 (조회 시 KRX 왕복 없음)
+        self.reference = reference if reference is not None else reference_data
+    
+    def register_reference_data(self):
+        """참조 데이터 캐시에 이 클라이언트의 통계 불러오기 함수 등록
+
+        생성자에서 등록하면 인스턴스를 만들 때마다 앱 전역 캐시의 함수가 바뀌므로,
+        앱 전역 클라이언트만 모듈 로드 시 한 번 등록한다.
+        """
+        self.reference.register('investor_stats', lambda: self.single_flight.do('investor_stats', self._fetch_investor_stats))
+        self.reference.register('sector_performance', lambda: self.single_flight.do('sector_performance', self._fetch_sector_performance))
     
-    async def get_market_data(self, stock_code: str, start_date: str, end_date: str) -> Dict:
-        """주식 시세 정보 조회"""
-        # 데모용 데이터 반환
+    async def get_market_data(self, stock_code: str, start_date: Union[str, date], end_date: Union[str, date]) -> Dict:
+        """주식 시세 정보 조회 (저장소에 없는 기간만 가져와 병합한 뒤 저장소에서 읽기)"""
+        start, end = _as_date(start_date), _as_date(end_date)
+        await self._fill_gaps(stock_code, start, end)
+        bars = self.store.read([stock_code], start, end)
         return {
             'stock_code': stock_code,
             'data': [
-                {
-                    'date': '2024-01-15',
-                    'open': 70000,
-                    'high': 72000,
-                    'low': 69500,
-                    'close': 71500,
-                    'volume': 15000000
-                }
+                {'date': day.strftime('%Y-%m-%d'), **{column: getattr(row, column) for column in OHLCV_COLUMNS}}
+                for day, row in zip(bars['date'], bars.itertuples(index=False))
             ]
         }
     
+    async def get_price_matrix(self, tickers: Sequence[str], start_date: Union[str, date],
+                               end_date: Union[str, date]) -> PriceMatrix:
+        """여러 종목의 날짜 정렬 종가 행렬 조회
+
+        저장소에 없는 기간은 종목별로 동시에(최대 KRX_FETCH_CONCURRENCY개) 가져오고,
+        행렬은 저장소 한 번 조회 결과를 날짜/종목 위치로 흩뿌려 만든다.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        start, end = _as_date(start_date), _as_date(end_date)
+        await asyncio.gather(*[self._fill_gaps(ticker, start, end) for ticker in tickers])
+        
+        bars = self.store.read(tickers, start, end)
+        days = bars['date'].to_numpy().astype('datetime64[D]')
+        dates, rows = np.unique(days, return_inverse=True)
+        ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+        cols = bars['ticker'].map(ticker_index).to_numpy(dtype=np.int64)
+        
+        closes = np.full((len(dates), len(tickers)), np.nan)
+        closes[rows, cols] = bars['close'].to_numpy(dtype=np.float64)
+        return PriceMatrix(dates=dates, tickers=tickers, closes=closes,
+                           missing=np.isnan(closes), index=ticker_index)
+    
+    async def get_recent_closes(self, tickers: Sequence[str],
+                                lookback_days: int) -> Optional[Tuple[date, np.ndarray, List[str]]]:
+        """최근 lookback_days일 종가 행렬 (공분산 캐시 갱신용, 일봉이 없으면 None)
+
+        Returns: (마지막 거래일, 종가 행렬, 종목 목록)
+        """
+        end = date.today()
+        matrix = await self.get_price_matrix(tickers, end - timedelta(days=lookback_days), end)
+        if len(matrix.dates) == 0:
+            return None
+        return matrix.dates[-1].astype(date), matrix.closes, matrix.tickers
+    
+    async def _fill_gaps(self, ticker: str, start: date, end: date):
+        """저장소에 없는 기간만 조회해 저장 (같은 기간 동시 조회는 한 번만)"""
+        for gap_start, gap_end in self.store.missing_ranges(ticker, start, end):
+            await self.single_flight.do(
+                ('ohlcv', ticker, gap_start, gap_end),
+                lambda gap_start=gap_start, gap_end=gap_end: self._fetch_gap(ticker, gap_start, gap_end)
+            )
+    
+    async def _fetch_gap(self, ticker: str, start: date, end: date):
+        async with self._fetch_semaphore:
+            bars = await self.fetcher.fetch(ticker, start, end)
+        # 오늘 일봉은 장중에 바뀌므로 저장은 하되 조회 완료 기간은 어제까지만 기록
+        self.store.write(ticker, start, min(end, date.today() - timedelta(days=1)), bars)
+    
     async def get_investor_stats(self) -> Dict:
-        """투자자별 매매 통계"""
+        """투자자별 매매 통계 (참조 데이터 캐시 스냅샷)"""
+        return await self.reference.get('investor_stats')
+    
+    async def _fetch_investor_stats(self) -> Dict:
         # 데모용 통계 데이터
         return {
             'individual': {
@@ -46,7 +151,11 @@ class KRXDataClient:
         }
     
     async def get_sector_performance(self) -> Dict:
-        """섹터별 수익률"""
+        """섹터별 수익률 (참조 데이터 캐시 스냅샷)"""
+        return await self.reference.get('sector_performance')
+    
+    async def _fetch_sector_performance(self) -> Dict:
+        # 데모용 섹터 데이터
         return {
             'IT': {'return': 15.3, 'volatility': 22.5},
             '금융': {'return': 8.7, 'volatility': 15.2},
@@ -54,3 +163,11 @@ class KRXDataClient:
             '소비재': {'return': 6.5, 'volatility': 18.3},
             '산업재': {'return': 11.2, 'volatility': 20.1}
         }
+
+def _as_date(value: Union[str, date]) -> date:
+    """'YYYY-MM-DD', 'YYYYMMDD' 문자열 또는 date를 date로 변환"""
+    return pd.Timestamp(value).date()
+
+# 앱 전역 KRX 클라이언트 (참조 데이터 불러오기 함수 등록은 이 인스턴스만)
+krx_client = KRXDataClient()
+krx_client.register_reference_data()
@@ -0,0 +1,188 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..config import Config
+from ..core.behavior_analyzer import InvestmentBehavior, InvestorType
+
+logger = logging.getLogger(__name__)
+
+# 프롬프트에 넣을 행동 지표 구간 경계
+HOLDING_PERIOD_BUCKETS = (1, 3, 7, 14, 30, 90)      # 일
+TURNOVER_BUCKETS = (10, 20, 30, 50, 100)            # %
+WIN_RATE_BUCKETS = (30, 40, 50, 60, 70)             # %
+
+def bucket_label(value: float, edges: Sequence[float]) -> str:
+    """값이 속한 구간 표기 (예: 3~7, 90 이상)"""
+    i = bisect.bisect_right(edges, value)
+    low = edges[i - 1] if i > 0 else 0
+    return f"{low}~{edges[i]}" if i < len(edges) else f"{low} 이상"
+
+def behavior_prompt_fields(behavior: InvestmentBehavior,
+                           investor_types: List[InvestorType]) -> Dict[str, str]:
+    """행동 요약 프롬프트 입력 (지표는 구간으로 양자화)
+
+    프롬프트 자체를 구간 값으로 만들어야 같은 구간의 사용자에게 캐시된 문장을
+    그대로 보여줘도 수치가 틀리지 않는다.
+    """
+    return {
+        'avg_holding': bucket_label(behavior.avg_holding_period, HOLDING_PERIOD_BUCKETS),
+        'turnover': bucket_label(behavior.turnover_rate, TURNOVER_BUCKETS),
+        'win_rate': bucket_label(behavior.win_rate, WIN_RATE_BUCKETS),
+        'investor_types': ', '.join(sorted(t.value for t in investor_types)) or '없음'
+    }
+
+def prompt_cache_key(template_id: str, fields: Dict[str, str]) -> str:
+    """(템플릿 ID, 프롬프트 입력)의 캐시 키"""
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return f"{template_id}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+class LLMResponseCache:
+    """LLM 응답 캐시 (메모리 LRU + SQLite 디스크 계층)
+
+    메모리에 없으면 디스크에서 찾아 메모리로 올리고, 재시작 후에도 디스크 계층이 남는다.
+    만료된 항목은 stale로 세고 다시 생성하되, 생성에 실패하면 만료된 응답이라도 돌려준다.
+    디스크 계층은 항목 수가 상한을 넘으면 마지막 사용(디스크 조회/저장) 시각이 가장
+    오래된 항목부터 지운다.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 path: Optional[str] = None, disk_max_entries: Optional[int] = None):
+        self.max_entries = Config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = Config.LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.path = Config.LLM_CACHE_PATH if path is None else path
+        self.disk_max_entries = (
+            Config.LLM_CACHE_DISK_MAX_ENTRIES if disk_max_entries is None else disk_max_entries
+        )
+        self._memory: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.stale_served = 0
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        """캐시된 응답을 돌려주고, 없거나 만료되었으면 generate()로 생성해 저장"""
+        cached = self._lookup(key)
+        if cached is not None:
+            value, created_at = cached
+            if created_at + self.ttl_seconds > time.time():
+                self.hits += 1
+                return value
+            self.stale += 1
+        else:
+            self.misses += 1
+
+        try:
+            value = await generate()
+        except Exception:
+            if cached is None:
+                raise
+            logger.warning("LLM 호출 실패로 만료된 캐시 응답 사용: %s", key)
+            self.stale_served += 1
+            return cached[0]
+        self._store(key, value)
+        return value
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self._memory), 'disk_entries': self._disk_entries,
+            'hits': self.hits, 'misses': self.misses,
+            'stale': self.stale, 'stale_served': self.stale_served
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached
+            db = self._connect()
+            if db is None:
+                return None
+            row = db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            self._remember(key, (row[0], row[1]))
+            return row[0], row[1]
+
+    def _store(self, key: str, value: str):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, (value, created_at))
+            db = self._connect()
+            if db is not None:
+                exists = db.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, value, created_at, created_at)
+                )
+                if exists is None:
+                    self._disk_entries += 1
+                    self._evict_disk(db)
+                db.commit()
+
+    def _evict_disk(self, db: sqlite3.Connection):
+        """디스크 항목 수가 상한을 넘은 만큼 가장 오래 쓰이지 않은 항목 삭제"""
+        excess = self._disk_entries - self.disk_max_entries
+        if not self.disk_max_entries or excess <= 0:
+            return
+        db.execute(
+            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._disk_entries -= excess
+
+    def _remember(self, key: str, entry: Tuple[str, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """디스크 계층 연결 (경로가 비어 있으면 메모리만 사용)"""
+        if not self.path:
+            return None
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL DEFAULT 0)"
+            )
+            # last_used 컬럼이 없던 이전 파일은 컬럼을 추가 (기존 항목은 저장 시각을 사용 시각으로)
+            columns = [row[1] for row in db.execute("PRAGMA table_info(llm_cache)")]
+            if 'last_used' not in columns:
+                db.execute("ALTER TABLE llm_cache ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                db.execute("UPDATE llm_cache SET last_used = created_at")
+            db.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+            self._disk_entries = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            self._evict_disk(db)
+            db.commit()
+            self._db = db
+        return self._db
+
+# 앱 전역 LLM 응답 캐시
+llm_cache = LLMResponseCache()
@@ -0,0 +1,58 @@
+"""HyperCLOVA X 채팅 완성 API를 흉내 내는 로컬 스텁 서버 (테스트/부하 측정용)
+
+    python -m app.integrations.llm_stub --port 8100 --latency 0.3 --fail-every 10
+
+으로 띄운 뒤 HYPERCLOVAX_API_URL=http://localhost:8100 으로 연결한다.
+"""
+import argparse
+import asyncio
+from typing import Dict
+from aiohttp import web
+
+# 처리 통계 (요청 수, 주입한 실패 수, 현재/최대 동시 처리 수)
+STATS = web.AppKey('stats', dict)
+
+def create_stub_app(latency: float = 0.0, fail_every: int = 0, fail_status: int = 503) -> web.Application:
+    """스텁 앱 생성
+
+    latency초 뒤 프롬프트 앞부분을 담은 응답을 돌려주고, fail_every가 양수이면
+    그 횟수마다 한 번씩 fail_status로 실패해 재시도 동작을 확인할 수 있다.
+    처리 통계는 app[STATS]에 쌓인다.
+    """
+    app = web.Application()
+    stats: Dict[str, int] = {'requests': 0, 'failures': 0, 'in_flight': 0, 'max_in_flight': 0}
+    app[STATS] = stats
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        stats['requests'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        try:
+            body = await request.json()
+            if latency > 0:
+                await asyncio.sleep(latency)
+            if fail_every > 0 and stats['requests'] % fail_every == 0:
+                stats['failures'] += 1
+                return web.json_response({'status': {'code': str(fail_status)}}, status=fail_status)
+            prompt = body['messages'][-1]['content'].strip()
+            return web.json_response({
+                'status': {'code': '20000', 'message': 'OK'},
+                'result': {
+                    'message': {'role': 'assistant', 'content': f"[stub:{request.match_info['model']}] {prompt[:80]}"},
+                    'inputLength': len(prompt),
+                    'outputLength': 0
+                }
+            })
+        finally:
+            stats['in_flight'] -= 1
+
+    app.router.add_post('/testapp/v1/chat-completions/{model}', chat_completions)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HyperCLOVA X 스텁 서버")
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--fail-every', type=int, default=0)
+    args = parser.parse_args()
+    web.run_app(create_stub_app(args.latency, args.fail_every), port=args.port)
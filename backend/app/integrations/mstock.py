@@ -0,0 +1,306 @@
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from ..config import Config
+from .http_pool import HttpPool, TokenBucket
+
+# 주문 상태
+FILLED = 'filled'
+PARTIAL = 'partial'
+REJECTED = 'rejected'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+PENDING = 'pending'         # 접수되었지만 체결 대기 시간 안에 최종 상태가 되지 않음
+
+# 더 이상 바뀌지 않는 브로커 주문 상태 (그 밖의 상태는 체결 조회로 기다린다)
+FINAL_STATUSES = frozenset({FILLED, REJECTED, FAILED})
+
+@dataclass
+class Order:
+    """리밸런싱 계획의 한 거래에서 만든 시장가 주문"""
+    account_id: str
+    stock_code: str
+    side: str                   # 'buy' 또는 'sell'
+    shares: int
+    reference_price: float      # 계획 시점 가격 (체결가 비교용)
+    plan_id: Optional[str] = None
+    order_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+@dataclass
+class OrderResult:
+    """주문 처리 결과 (체결 수량/평균가, 대기/브로커 응답 지연)"""
+    order_id: str
+    account_id: str
+    stock_code: str
+    side: str
+    requested_shares: int
+    filled_shares: int = 0
+    avg_price: Optional[float] = None
+    status: str = FAILED
+    broker_order_id: Optional[str] = None
+    queued_ms: float = 0.0
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+
+    @classmethod
+    def for_order(cls, order: Order, **kwargs) -> 'OrderResult':
+        return cls(order.order_id, order.account_id, order.stock_code, order.side, order.shares, **kwargs)
+
+class Broker(ABC):
+    """증권사 주문 인터페이스 (시장가 주문을 보내고 체결 결과를 돌려줌)"""
+
+    @abstractmethod
+    async def submit(self, order: Order) -> OrderResult:
+        ...
+
+    async def close(self):
+        """연결 자원 정리 (연결을 갖지 않는 증권사는 할 일 없음)"""
+
+class MStockBroker(Broker):
+    """미래에셋증권 주문 API
+
+    POST /orders {account_id, stock_code, side, quantity, order_type, client_order_id}
+    → {order_id, status, filled_quantity, avg_price}
+    GET /orders/{order_id} → 같은 형식의 현재 주문 상태
+
+    접수 응답이 최종 상태(FINAL_STATUSES)가 아니면 fill_timeout초까지 poll_interval초마다
+    주문 상태를 조회해 최종 체결 수량/평균가로 결과를 만든다. 그 안에 끝나지 않으면
+    지금까지 체결된 수량으로 PARTIAL(체결 없음이면 PENDING)을 돌려준다.
+    """
+
+    def __init__(self, transport: Optional[HttpPool] = None, fill_timeout: Optional[float] = None,
+                 poll_interval: Optional[float] = None):
+        self.transport = transport or HttpPool(
+            Config.M_STOCK_API_URL, max_concurrency=Config.M_STOCK_MAX_PARALLEL, rate_per_second=0,
+            max_retries=0, headers={'Authorization': f'Bearer {Config.M_STOCK_API_KEY}'}
+        )
+        self.fill_timeout = Config.M_STOCK_FILL_TIMEOUT if fill_timeout is None else fill_timeout
+        self.poll_interval = Config.M_STOCK_FILL_POLL_SECONDS if poll_interval is None else poll_interval
+
+    async def submit(self, order: Order) -> OrderResult:
+        # 주문은 중복 체결 위험이 있어 전송 계층에서 재시도하지 않음
+        response = await self.transport.request_json('POST', '/orders', json={
+            'account_id': order.account_id,
+            'stock_code': order.stock_code,
+            'side': order.side,
+            'quantity': order.shares,
+            'order_type': 'market',
+            'client_order_id': order.order_id
+        })
+        response, error = await self._wait_for_fill(response)
+        result = OrderResult.for_order(
+            order,
+            filled_shares=int(response.get('filled_quantity', 0)),
+            avg_price=response.get('avg_price'),
+            status=response.get('status', FAILED),
+            broker_order_id=response.get('order_id')
+        )
+        if result.status not in FINAL_STATUSES:
+            result.status = PARTIAL if result.filled_shares > 0 else PENDING
+            result.error = error or '체결 대기 시간 초과'
+        return result
+
+    async def _wait_for_fill(self, response: Dict) -> Tuple[Dict, Optional[str]]:
+        """최종 상태가 될 때까지 주문 상태 조회 (마지막 응답, 마지막 조회 오류)
+
+        상태 조회는 체결에 영향이 없으므로 실패해도 제한 시간까지 다시 조회한다.
+        """
+        order_id = response.get('order_id')
+        deadline = time.monotonic() + self.fill_timeout
+        error = None
+        while (response.get('status') not in FINAL_STATUSES and order_id
+               and time.monotonic() < deadline):
+            await asyncio.sleep(self.poll_interval)
+            try:
+                response = await self.transport.request_json('GET', f'/orders/{order_id}')
+            except Exception as e:
+                error = repr(e)
+        return response, error
+
+    async def close(self):
+        await self.transport.close()
+
+class MockBroker(Broker):
+    """테스트/부하 측정용 모의 증권사
+
+    latency초 뒤 계획 가격에 slippage_bps만큼 불리하게 전량 체결하고,
+    reject_codes 종목은 거부한다. 받은 주문 순서와 최대 동시 처리 수를 기록한다.
+    """
+
+    def __init__(self, latency: float = 0.0, slippage_bps: float = 0.0,
+                 reject_codes: Sequence[str] = ()):
+        self.latency = latency
+        self.slippage_bps = slippage_bps
+        self.reject_codes = set(reject_codes)
+        self.received: List[Order] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def submit(self, order: Order) -> OrderResult:
+        self.received.append(order)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency > 0:
+                await asyncio.sleep(self.latency)
+            if order.stock_code in self.reject_codes:
+                return OrderResult.for_order(order, status=REJECTED, error='주문 거부')
+            direction = 1 if order.side == 'buy' else -1
+            price = order.reference_price * (1 + direction * self.slippage_bps / 10000)
+            return OrderResult.for_order(order, filled_shares=order.shares, avg_price=price, status=FILLED,
+                                         broker_order_id=f'mock-{len(self.received)}')
+        finally:
+            self.in_flight -= 1
+
+@dataclass
+class ExecutionReport:
+    """계좌별 계획 실행 결과"""
+    account_id: str
+    plan_id: Optional[str]
+    results: List[OrderResult]
+
+    @property
+    def status(self) -> str:
+        statuses = {r.status for r in self.results}
+        if not statuses or statuses == {FILLED}:
+            return 'completed'
+        if FILLED in statuses or PARTIAL in statuses:
+            return 'partial'
+        return 'failed'
+
+    def to_dict(self) -> Dict:
+        latencies = np.array([r.latency_ms for r in self.results if r.status != SKIPPED])
+        filled = [r for r in self.results if r.filled_shares > 0]
+        return {
+            'account_id': self.account_id,
+            'plan_id': self.plan_id,
+            'status': self.status,
+            'orders': [asdict(r) for r in self.results],
+            'filled_value': {
+                side: float(sum(r.filled_shares * r.avg_price for r in filled if r.side == side))
+                for side in ('sell', 'buy')
+            },
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                'p95': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+                'max': float(latencies.max()) if len(latencies) else 0.0
+            }
+        }
+
+def orders_from_plan(plan: Dict, account_id: str) -> Tuple[List[Order], List[Order]]:
+    """계획의 거래 목록을 (매도 주문, 매수 주문)으로 분리"""
+    sells, buys = [], []
+    for trade in plan.get('required_trades', []):
+        if trade['shares'] <= 0:
+            continue
+        order = Order(account_id, trade['stock_code'], trade['action'], int(trade['shares']),
+                      trade['trade_value'] / trade['shares'], plan.get('plan_id'))
+        (sells if order.side == 'sell' else buys).append(order)
+    return sells, buys
+
+class OrderExecutor:
+    """비동기 주문 큐 실행기
+
+    주문은 앱 전체가 공유하는 큐 하나에 넣고, 앱 시작 시 띄운 max_parallel개의 작업자가
+    토큰 버킷 속도 제한 안에서 브로커로 보낸다. 동시 요청이 많아도 증권사로 나가는
+    주문 수는 max_parallel을 넘지 않는다.
+    계좌마다 매도 주문이 모두 끝난 뒤 매수 주문을 넣어 매도 대금으로 매수하고,
+    매도가 하나라도 체결되지 않은 계좌는 매수를 건너뛴다(현금 부족 방지).
+    여러 계좌는 서로 기다리지 않고 같은 큐를 공유한다.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None, max_parallel: Optional[int] = None,
+                 rate_per_second: Optional[float] = None, burst: Optional[float] = None):
+        self.broker = broker if broker is not None else (
+            MStockBroker() if Config.M_STOCK_API_URL else MockBroker()
+        )
+        self.max_parallel = Config.M_STOCK_MAX_PARALLEL if max_parallel is None else max_parallel
+        self.rate_limiter = TokenBucket(
+            Config.M_STOCK_RATE_PER_SECOND if rate_per_second is None else rate_per_second,
+            Config.M_STOCK_BURST if burst is None else burst
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        """현재 이벤트 루프에 공유 큐와 작업자 시작 (이미 이 루프에서 돌고 있으면 그대로 사용)
+
+        앱 시작 시 호출하며, 시작 전에 주문이 들어오면 그때 시작한다.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(self._queue)) for _ in range(max(self.max_parallel, 1))
+        ]
+
+    async def close(self):
+        """작업자를 멈추고 증권사 연결 자원 정리 (앱 종료 시 호출)"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queue = None
+        self._loop = None
+        await self.broker.close()
+
+    async def execute_plan(self, plan: Dict, account_id: str) -> ExecutionReport:
+        """한 계좌의 계획 실행"""
+        return (await self.execute_plans([(account_id, plan)]))[0]
+
+    async def execute_plans(self, plans: Sequence[Tuple[str, Dict]]) -> List[ExecutionReport]:
+        """여러 계좌의 계획을 공유 큐로 실행 (입력 순서대로 결과 반환)"""
+        await self.start()
+        return list(await asyncio.gather(*[
+            self._run_account(account_id, plan) for account_id, plan in plans
+        ]))
+
+    async def _run_account(self, account_id: str, plan: Dict) -> ExecutionReport:
+        sells, buys = orders_from_plan(plan, account_id)
+        results = await self._submit_all(sells)
+        if all(r.status == FILLED for r in results):
+            results += await self._submit_all(buys)
+        else:
+            results += [OrderResult.for_order(order, status=SKIPPED, error='매도 미체결로 매수 생략')
+                        for order in buys]
+        return ExecutionReport(account_id, plan.get('plan_id'), results)
+
+    async def _submit_all(self, orders: List[Order]) -> List[OrderResult]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for order in orders:
+            future = loop.create_future()
+            self._queue.put_nowait((order, future, time.perf_counter()))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            order, future, enqueued = await queue.get()
+            try:
+                # 요청이 취소되어 결과를 기다리는 쪽이 없는 주문은 보내지 않음
+                if future.done():
+                    continue
+                await self.rate_limiter.acquire()
+                started = time.perf_counter()
+                try:
+                    result = await self.broker.submit(order)
+                except Exception as e:
+                    result = OrderResult.for_order(order, status=FAILED, error=repr(e))
+                result.queued_ms = (started - enqueued) * 1000
+                result.latency_ms = (time.perf_counter() - started) * 1000
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                queue.task_done()
+
+# 앱 전역 주문 실행기 (M_STOCK_API_URL이 비어 있으면 모의 증권사 사용)
+order_executor = OrderExecutor()
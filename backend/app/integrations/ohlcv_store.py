@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import List, Optional, Sequence, Tuple
+import pandas as pd
+
+from ..config import Config
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+class OHLCVStore:
+    """종목별 일봉 로컬 저장소 (SQLite)
+
+    일봉은 (종목, 날짜) 기본 키 테이블에 종목별로 모여 저장되고, 조회한 적 있는 기간은
+    coverage 테이블에 구간으로 남긴다. 휴장일처럼 일봉이 없는 날도 조회한 기간이면
+    다시 가져오지 않도록, 빠진 기간은 일봉이 아니라 coverage 기준으로 계산한다.
+    날짜는 ISO 문자열(YYYY-MM-DD)로 저장해 문자열 비교가 날짜 순서와 같다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Config.OHLCV_STORE_PATH if path is None else path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory and self.path != ':memory:':
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL, date TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (ticker, date)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS coverage (
+                    ticker TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL,
+                    PRIMARY KEY (ticker, start)
+                ) WITHOUT ROWID;
+            """)
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def coverage(self, ticker: str) -> List[Tuple[date, date]]:
+        """조회한 기간 구간 목록 (시작일 순, 양 끝 포함)"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT start, end FROM coverage WHERE ticker = ? ORDER BY start", (ticker,)
+            ).fetchall()
+        return [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in rows]
+
+    def missing_ranges(self, ticker: str, start: date, end: date) -> List[Tuple[date, date]]:
+        """[start, end] 중 아직 조회하지 않은 기간 구간 목록"""
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(ticker):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start - timedelta(days=1)))
+            cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def write(self, ticker: str, start: date, end: date, bars: pd.DataFrame):
+        """조회 결과 저장 (기존 일봉은 덮어쓰고 조회 기간 [start, end]는 인접 구간과 병합)
+
+        end < start이면 일봉만 저장하고 조회 기간은 기록하지 않는다(다음에 다시 조회).
+        """
+        rows = [
+            (ticker, pd.Timestamp(row.date).date().isoformat(), *(float(getattr(row, c)) for c in OHLCV_COLUMNS))
+            for row in bars.itertuples(index=False)
+        ]
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close, volume) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                if end < start:
+                    return
+                # 겹치거나 맞닿은 구간을 하나로 병합
+                lo, hi = (start - timedelta(days=1)).isoformat(), (end + timedelta(days=1)).isoformat()
+                overlapping = db.execute(
+                    "SELECT start, end FROM coverage WHERE ticker = ? AND start <= ? AND end >= ?",
+                    (ticker, hi, lo)
+                ).fetchall()
+                merged_start = min([start.isoformat()] + [s for s, _ in overlapping])
+                merged_end = max([end.isoformat()] + [e for _, e in overlapping])
+                db.executemany("DELETE FROM coverage WHERE ticker = ? AND start = ?",
+                               [(ticker, s) for s, _ in overlapping])
+                db.execute("INSERT INTO coverage (ticker, start, end) VALUES (?, ?, ?)",
+                           (ticker, merged_start, merged_end))
+
+    def read(self, tickers: Sequence[str], start: date, end: date) -> pd.DataFrame:
+        """여러 종목의 [start, end] 일봉 (ticker, date 순 정렬, date는 datetime64)"""
+        tickers = list(tickers)
+        if not tickers:
+            return pd.DataFrame(columns=['ticker', 'date'] + OHLCV_COLUMNS)
+        placeholders = ','.join('?' * len(tickers))
+        with self._lock:
+            frame = pd.read_sql_query(
+                f"SELECT ticker, date, {', '.join(OHLCV_COLUMNS)} FROM bars "
+                f"WHERE ticker IN ({placeholders}) AND date BETWEEN ? AND ? ORDER BY ticker, date",
+                self._connect(), params=[*tickers, start.isoformat(), end.isoformat()]
+            )
+        frame['date'] = pd.to_datetime(frame['date'])
+        return frame
+
+# 앱 전역 일봉 저장소
+ohlcv_store = OHLCVStore()
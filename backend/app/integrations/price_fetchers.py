@@ -0,0 +1,90 @@
+import asyncio
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from ..config import Config
+from .ohlcv_store import OHLCV_COLUMNS
+
+class PriceFetcher(ABC):
+    """일봉 조회 백엔드 인터페이스
+
+    fetch는 [start, end] 기간의 일봉을 date, open, high, low, close, volume 컬럼으로 돌려준다.
+    """
+
+    @abstractmethod
+    async def fetch(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        ...
+
+def _empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(columns=['date'] + OHLCV_COLUMNS)
+
+class DemoPriceFetcher(PriceFetcher):
+    """데모용 일봉 (종목 코드로 고정한 난수의 영업일 랜덤워크, 같은 날짜는 항상 같은 값)"""
+
+    def __init__(self, origin: date = date(2015, 1, 1)):
+        self.origin = origin
+
+    async def fetch(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        days = pd.bdate_range(self.origin, end)
+        if len(days) == 0 or start > end:
+            return _empty_bars()
+        rng = np.random.default_rng(zlib.crc32(ticker.encode('utf-8')))
+        base = 10000 * (1 + rng.random() * 9)
+        closes = base * np.cumprod(1 + rng.normal(0.0003, 0.018, len(days)))
+        spread = np.abs(rng.normal(0, 0.01, len(days)))
+        frame = pd.DataFrame({
+            'date': days,
+            'open': closes * (1 + rng.normal(0, 0.005, len(days))),
+            'high': closes * (1 + spread),
+            'low': closes * (1 - spread),
+            'close': closes,
+            'volume': rng.integers(100000, 5000000, len(days)).astype(float)
+        })
+        return frame[frame['date'] >= pd.Timestamp(start)].reset_index(drop=True)
+
+class FixturePriceFetcher(PriceFetcher):
+    """고정 데이터 일봉 (테스트용, 요청 기간을 calls에 기록)"""
+
+    def __init__(self, bars: Dict[str, pd.DataFrame]):
+        self.bars = {ticker: frame.assign(date=pd.to_datetime(frame['date'])) for ticker, frame in bars.items()}
+        self.calls: List[Tuple[str, date, date]] = []
+
+    async def fetch(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        self.calls.append((ticker, start, end))
+        frame = self.bars.get(ticker)
+        if frame is None:
+            return _empty_bars()
+        in_range = (frame['date'] >= pd.Timestamp(start)) & (frame['date'] <= pd.Timestamp(end))
+        return frame.loc[in_range, ['date'] + OHLCV_COLUMNS].reset_index(drop=True)
+
+class PykrxPriceFetcher(PriceFetcher):
+    """pykrx 기반 일봉 (KRX 정보데이터시스템 조회, 동기 라이브러리라 스레드에서 실행)"""
+
+    async def fetch(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        from pykrx import stock
+
+        code = ticker[1:] if ticker.startswith('A') else ticker
+        frame = await asyncio.to_thread(
+            stock.get_market_ohlcv, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'), code
+        )
+        if frame is None or len(frame) == 0:
+            return _empty_bars()
+        frame = frame.rename(columns={'시가': 'open', '고가': 'high', '저가': 'low', '종가': 'close', '거래량': 'volume'})
+        frame = frame.rename_axis('date').reset_index()
+        return frame[['date'] + OHLCV_COLUMNS]
+
+FETCHERS = {
+    'demo': DemoPriceFetcher,
+    'pykrx': PykrxPriceFetcher
+}
+
+def create_price_fetcher(name: Optional[str] = None) -> PriceFetcher:
+    """설정 이름으로 일봉 조회 백엔드 생성"""
+    name = name or Config.OHLCV_FETCHER
+    if name not in FETCHERS:
+        raise ValueError(f"지원하지 않는 일봉 조회 백엔드입니다: {name}")
+    return FETCHERS[name]()
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Snapshot:
+    value: Any
+    fetched_at: float
+
+class ReferenceDataCache:
+    """모든 사용자에게 같은 참조 데이터(투자자별 통계, 섹터 수익률 등) 캐시
+
+    조회는 항상 보관 중인 스냅샷을 바로 돌려주고, 스냅샷이 refresh_seconds보다 오래되면
+    백그라운드에서 갱신한다(갱신 중이거나 갱신에 실패해도 기존 스냅샷을 계속 제공).
+    스냅샷은 이름별 JSON 파일로 저장해 재시작한 워커도 디스크에서 바로 시작하며,
+    스냅샷이 전혀 없을 때만 조회 요청이 직접 불러오기를 기다린다.
+    """
+
+    def __init__(self, path: Optional[str] = None, refresh_seconds: Optional[float] = None):
+        self.path = Config.REFERENCE_DATA_DIR if path is None else path
+        self.refresh_seconds = Config.REFERENCE_DATA_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self._loaders: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._errors: Dict[str, str] = {}
+        self._refreshing: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, loader: Callable[[], Awaitable[Any]]):
+        """참조 데이터 불러오기 함수 등록"""
+        self._loaders[name] = loader
+
+    async def get(self, name: str) -> Any:
+        """스냅샷 값 (없으면 디스크 → 불러오기 순으로 채움, 오래되었으면 백그라운드 갱신)"""
+        snapshot = self._snapshots.get(name) or self._load_snapshot(name)
+        if snapshot is None:
+            return await self.refresh(name)
+        if self.age(name) >= self.refresh_seconds:
+            self._refresh_in_background(name)
+        return snapshot.value
+
+    def age(self, name: str) -> Optional[float]:
+        """스냅샷 경과 시간 (초, 스냅샷이 없으면 None)"""
+        snapshot = self._snapshots.get(name)
+        return None if snapshot is None else max(time.time() - snapshot.fetched_at, 0.0)
+
+    async def refresh(self, name: str) -> Any:
+        """등록된 함수로 다시 불러와 스냅샷 교체 및 저장"""
+        self._refreshing.add(name)
+        try:
+            value = await self._loaders[name]()
+        except Exception as e:
+            self._errors[name] = repr(e)
+            raise
+        finally:
+            self._refreshing.discard(name)
+        self._errors.pop(name, None)
+        self._snapshots[name] = Snapshot(value, time.time())
+        self._save_snapshot(name)
+        return value
+
+    async def start(self):
+        """앱 시작 시 호출: 디스크 스냅샷을 읽고, 없거나 오래된 항목을 채운 뒤 주기 갱신 시작"""
+        for name in self._loaders:
+            if self._snapshots.get(name) or self._load_snapshot(name):
+                if self.age(name) >= self.refresh_seconds:
+                    self._refresh_in_background(name)
+                continue
+            try:
+                await self.refresh(name)
+            except Exception as e:
+                logger.warning("참조 데이터 %s 초기 불러오기 실패: %r", name, e)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        tasks = [t for t in [self._task, *self._background] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            name: {
+                'age_seconds': self.age(name),
+                'refreshing': name in self._refreshing,
+                'last_error': self._errors.get(name)
+            }
+            for name in sorted(set(self._loaders) | set(self._snapshots))
+        }
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(max(self.refresh_seconds, 1.0))
+            for name in list(self._loaders):
+                self._refresh_in_background(name)
+
+    def _refresh_in_background(self, name: str):
+        if name in self._refreshing or name not in self._loaders:
+            return
+        task = asyncio.create_task(self._refresh_quietly(name))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _refresh_quietly(self, name: str):
+        try:
+            await self.refresh(name)
+        except Exception as e:
+            logger.warning("참조 데이터 %s 갱신 실패, 기존 스냅샷 유지: %r", name, e)
+
+    def _snapshot_path(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.json')
+
+    def _load_snapshot(self, name: str) -> Optional[Snapshot]:
+        if not self.path or not os.path.exists(self._snapshot_path(name)):
+            return None
+        with open(self._snapshot_path(name), encoding='utf-8') as f:
+            stored = json.load(f)
+        self._snapshots[name] = Snapshot(stored['value'], stored['fetched_at'])
+        return self._snapshots[name]
+
+    def _save_snapshot(self, name: str):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        snapshot = self._snapshots[name]
+        tmp = self._snapshot_path(name) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'value': snapshot.value, 'fetched_at': snapshot.fetched_at}, f, ensure_ascii=False)
+        os.replace(tmp, self._snapshot_path(name))
+
+# 앱 전역 참조 데이터 캐시
+reference_data = ReferenceDataCache()
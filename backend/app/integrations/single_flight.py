@@ -0,0 +1,56 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+class SingleFlight:
+    """동일 요청 병합 (single-flight)
+
+    같은 키로 동시에 들어온 요청은 진행 중인 한 번의 호출 결과(또는 예외)를 함께 기다린다.
+    호출은 별도 작업으로 돌아 일부 호출자가 취소되어도 나머지는 결과를 받고,
+    기다리는 호출자가 모두 취소되면 호출을 취소하고 키도 바로 비워, 취소가 끝나기 전에
+    들어온 요청이 취소 중인 호출에 합류하지 않게 한다. 호출이 끝나면 키를 비워
+    다음 요청은 새로 호출한다(오류도 다음 요청에 남지 않음).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """key로 진행 중인 호출이 있으면 그 결과를, 없으면 func()를 호출해 결과 반환"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task, key=key: self._finish(key, task))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    self._flights.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._flights)}
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        flight = self._flights.get(key)
+        if flight is not None and flight.task is task:
+            del self._flights[key]
+        # 기다리는 호출자가 없어도 '처리되지 않은 예외' 경고가 나지 않도록 예외를 회수
+        if not task.cancelled():
+            task.exception()
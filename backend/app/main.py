@@ -1,15 +1,49 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from .api.v1 import analysis, portfolio, gamification
 from .config import Config
+from .core.analysis_executor import analysis_executor
+from .core.behavior_state import behavior_state_store
+from .core.covariance_cache import covariance_cache
+from .core.report_cache import report_cache
+from .integrations.bok_data import bok_client
+from .integrations.hyperclovax import hyperclovax_flight, hyperclovax_pool
+from .integrations.krx_data import krx_client, krx_flight
+from .integrations.llm_cache import llm_cache
+from .integrations.mstock import order_executor
+from .integrations.reference_data import reference_data
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 분석 프로세스 풀, 외부 API 연결 풀, 주문 작업자, 참조 데이터/공분산 갱신 작업 시작/종료
+    # (참조 데이터 불러오기 함수는 krx_data 모듈의 전역 KRX 클라이언트가 한 번 등록)
+    analysis_executor.start()
+    if Config.HYPERCLOVAX_API_URL:
+        await hyperclovax_pool.start()
+    await reference_data.start()
+    await order_executor.start()
+    covariance_cache.start(
+        lambda: krx_client.get_recent_closes(Config.COVARIANCE_UNIVERSE, Config.COVARIANCE_LOOKBACK_DAYS)
+    )
+    yield
+    await covariance_cache.stop()
+    await reference_data.stop()
+    await hyperclovax_pool.close()
+    await bok_client.close()
+    await order_executor.close()
+    llm_cache.close()
+    behavior_state_store.close()
+    analysis_executor.shutdown()
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="AI 투자주치의 API",
     description="투자 습관을 진단하고 올바른 행동을 설계하는 AI 코치",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -38,5 +72,15 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """캐시 적중/미적중, 요청 병합 통계"""
+    return {
+        "report_cache": report_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "single_flight": {flight.name: flight.stats() for flight in (hyperclovax_flight, krx_flight)},
+        "reference_data": reference_data.stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
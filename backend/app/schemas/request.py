@@ -7,13 +7,17 @@ class TransactionData(BaseModel):
     transactions: List[Dict[str, Any]] = Field(..., description="거래 내역")
     include_market_data: bool = Field(False, description="시장 데이터 포함 여부")
 
+class BatchAnalysisRequest(BaseModel):
+    user_ids: List[str] = Field(default_factory=list, description="분석 대상 사용자 ID (거래 내역 미제공 시 데모 데이터 사용)")
+    transactions: Optional[List[Dict[str, Any]]] = Field(None, description="여러 사용자의 거래 내역 (각 항목에 user_id 포함)")
+
 class PortfolioAnalysisRequest(BaseModel):
     user_id: str
     include_rebalancing: bool = True
     
 class RebalancingExecuteRequest(BaseModel):
     user_id: str
-    plan_id: str
+    plan_id: Optional[str] = Field(None, description="저장된 계획 ID (없으면 현재 포트폴리오로 생성)")
     execute_immediately: bool = False
 
 class UserPreferences(BaseModel):
@@ -22,14 +22,21 @@ class BehaviorAnalysisResponse(BaseModel):
     investor_types: List[str]
     behavior_summary: str
 
+class BatchAnalysisResponse(BaseModel):
+    analysis_date: str
+    user_count: int
+    results: List[Dict]
+
 class RebalancingPlanResponse(BaseModel):
     plan_id: str
     created_at: str
+    demo: bool = False              # 데모 데이터로 만든 계획 (주문 실행 불가)
     current_portfolio: Dict
     target_portfolio: Dict
     required_trades: List[Dict]
     expected_results: Dict
     estimated_cost: Dict
+    execution: Optional[Dict] = None
 
 class ComprehensiveReportResponse(BaseModel):
     report_id: str
@@ -44,3 +51,4 @@ class ComprehensiveReportResponse(BaseModel):
     market_comparison: Dict
     improvement_goals: Dict
     next_review_date: str
+    degraded_stages: List[str] = []
@@ -7,7 +7,11 @@ import random
 from ..core.behavior_analyzer import InvestmentBehavior
 
 def generate_demo_transactions(user_id: str) -> pd.DataFrame:
-    """데모용 거래 데이터 생성"""
+    """데모용 거래 데이터 생성
+
+    같은 사용자는 같은 날 같은 거래 내역을 받도록 (사용자, 날짜)로 난수를 고정해
+    대시보드 새로고침이 리포트 캐시에 적중하게 한다.
+    """
     stocks = [
         {'code': 'A005930', 'name': '삼성전자', 'sector': 'IT'},
         {'code': 'A035720', 'name': '카카오', 'sector': 'IT'},
@@ -17,11 +21,13 @@ def generate_demo_transactions(user_id: str) -> pd.DataFrame:
     ]
     
     transactions = []
-    base_date = datetime.now() - timedelta(days=90)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    base_date = today - timedelta(days=90)
+    rng = random.Random(f"{user_id}:{today.date().isoformat()}")
     
     for i in range(50):
-        stock = random.choice(stocks)
-        date = base_date + timedelta(days=random.randint(0, 90))
+        stock = rng.choice(stocks)
+        date = base_date + timedelta(days=rng.randint(0, 90))
         
         transaction = {
             'user_id': user_id,
@@ -29,9 +35,9 @@ def generate_demo_transactions(user_id: str) -> pd.DataFrame:
             'stock_code': stock['code'],
             'stock_name': stock['name'],
             'sector': stock['sector'],
-            'type': random.choice(['buy', 'sell']),
-            'shares': random.randint(10, 100),
-            'price': random.randint(50000, 150000),
+            'type': rng.choice(['buy', 'sell']),
+            'shares': rng.randint(10, 100),
+            'price': rng.randint(50000, 150000),
             'value': 0
         }
         transaction['value'] = transaction['shares'] * transaction['price']
@@ -0,0 +1,22 @@
+import os
+import shutil
+import tempfile
+
+# 앱 모듈의 전역 저장소/캐시는 import 시점의 Config 값으로 만들어지므로, 앱을 import하기 전에
+# 테스트 세션 전용 임시 디렉터리를 환경 변수로 지정해 backend/data/에 상태가 남지 않게 한다
+_DATA_DIR = tempfile.mkdtemp(prefix='backend-tests-')
+_DATA_PATHS = {
+    'TRANSACTION_STORE_DIR': 'transactions',
+    'BEHAVIOR_STATE_PATH': 'behavior_state.sqlite3',
+    'OHLCV_STORE_PATH': 'ohlcv.sqlite3',
+    'REFERENCE_DATA_DIR': 'reference',
+    'LLM_CACHE_PATH': 'llm_cache.sqlite3',
+    'COVARIANCE_CACHE_DIR': 'covariance',
+    'BOK_CACHE_DIR': 'bok',
+}
+for name, relative in _DATA_PATHS.items():
+    os.environ[name] = os.path.join(_DATA_DIR, relative)
+os.environ['PLAN_STORE_PATH'] = ''
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
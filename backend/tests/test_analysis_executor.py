@@ -0,0 +1,21 @@
+import pytest
+from app.core.analysis_executor import AnalysisExecutor
+from app.core.behavior_analyzer import BehaviorAnalyzer
+from app.utils.demo_data import generate_demo_transactions
+
+@pytest.mark.asyncio
+async def test_process_pool_matches_in_process():
+    """워커 프로세스 실행 결과가 현재 프로세스 실행과 같은지 테스트"""
+    transactions = generate_demo_transactions('test_user')
+    executor = AnalysisExecutor(max_workers=1)
+    executor.start()
+    try:
+        pooled = await BehaviorAnalyzer(executor).analyze_behavior(transactions)
+    finally:
+        executor.shutdown()
+    local = await BehaviorAnalyzer(AnalysisExecutor(max_workers=0)).analyze_behavior(transactions)
+
+    pooled_dict, local_dict = pooled.to_dict(), local.to_dict()
+    pooled_dict.pop('analysis_date')
+    local_dict.pop('analysis_date')
+    assert pooled_dict == local_dict
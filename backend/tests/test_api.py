@@ -0,0 +1,112 @@
+import asyncio
+import json
+import uuid
+import pandas as pd
+from fastapi.testclient import TestClient
+from app.api.v1.analysis import orchestrator
+from app.api.v1.portfolio import order_executor, rebalancing_engine
+from app.main import app
+
+client = TestClient(app)
+
+def test_health_check():
+    """헬스 체크 테스트"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy"}
+
+def test_analyze_batch(monkeypatch):
+    """일괄 분석 API 테스트 (묶음 전체 종목 종가를 한 번 조회해 분석에 전달)"""
+    market_data = orchestrator.market_data
+    requested = []
+
+    async def spy(columns):
+        prices = await market_data(columns)
+        requested.append((sorted(columns.users), prices))
+        return prices
+
+    monkeypatch.setattr(orchestrator, 'market_data', spy)
+    response = client.post("/api/v1/analysis/batch", json={'user_ids': ['user_a', 'user_b']})
+    assert response.status_code == 200
+    assert len(requested) == 1
+    assert requested[0][0] == ['user_a', 'user_b'] and len(requested[0][1]) > 0
+
+    data = response.json()
+    assert data['user_count'] == 2
+    assert [r['user_id'] for r in data['results']] == ['user_a', 'user_b']
+    assert all(r['investor_types'] for r in data['results'])
+
+def test_rebalance_reuses_stored_plan():
+    """같은 포트폴리오는 저장된 계획을 재사용하고 plan_id로 조회되는지 테스트"""
+    first = client.post("/api/v1/portfolio/rebalance", json={'user_id': 'user_a'}).json()
+    second = client.post("/api/v1/portfolio/rebalance", json={'user_id': 'user_a'}).json()
+    assert first['plan_id'] == second['plan_id']
+    assert client.post("/api/v1/portfolio/rebalance",
+                       json={'user_id': 'user_a', 'plan_id': first['plan_id']}).json() == first
+
+    missing = client.post("/api/v1/portfolio/rebalance", json={'user_id': 'user_a', 'plan_id': 'unknown'})
+    assert missing.status_code == 404
+
+def test_rebalance_executes_only_owned_real_plans():
+    """실행은 plan_id가 필요하고, 데모 계획과 다른 사용자의 계획은 실행하지 않는지 테스트"""
+    no_plan = client.post("/api/v1/portfolio/rebalance", json={'user_id': 'user_a', 'execute_immediately': True})
+    assert no_plan.status_code == 400
+
+    demo = client.post("/api/v1/portfolio/rebalance", json={'user_id': 'user_a'}).json()
+    assert demo['demo']
+    rejected = client.post("/api/v1/portfolio/rebalance",
+                           json={'user_id': 'user_a', 'plan_id': demo['plan_id'], 'execute_immediately': True})
+    assert rejected.status_code == 400
+
+    portfolio = pd.DataFrame({
+        'stock_code': ['A005930', 'A000660'], 'stock_name': ['삼성전자', 'SK하이닉스'], 'sector': ['IT', 'IT'],
+        'shares': [80, 5], 'current_price': [70000.0, 100000.0]
+    })
+    owner = f'owner_{uuid.uuid4().hex[:8]}'
+    plan = asyncio.run(rebalancing_engine.generate_rebalancing_plan(portfolio, cash=1000000, user_id=owner))
+    request = {'plan_id': plan['plan_id'], 'execute_immediately': True}
+
+    other = client.post("/api/v1/portfolio/rebalance", json={**request, 'user_id': 'user_a'})
+    assert other.status_code == 404
+    executed = client.post("/api/v1/portfolio/rebalance", json={**request, 'user_id': owner}).json()
+    assert executed['plan_id'] == plan['plan_id'] and not executed['demo']
+    assert executed['execution']['account_id'] == owner
+    assert executed['execution']['status'] == 'completed'
+
+    # 재시도는 주문을 다시 보내지 않고 이전 실행 결과와 함께 409
+    sent = len(order_executor.broker.received)
+    repeated = client.post("/api/v1/portfolio/rebalance", json={**request, 'user_id': owner})
+    assert repeated.status_code == 409
+    assert repeated.json()['detail']['execution'] == executed['execution']
+    assert len(order_executor.broker.received) == sent
+
+def test_stream_comprehensive_ndjson():
+    """종합 분석 스트리밍이 항목별 NDJSON 줄로 전송되는지 테스트"""
+    response = client.post("/api/v1/analysis/comprehensive/stream", json={'user_id': 'user_stream'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    sections = [event['section'] for event in events]
+    assert sections[0] == 'report_id' and sections[-1] == 'complete'
+    assert {'behavior_analysis', 'coaching_actions', 'rebalancing_plan', 'gamification',
+            'market_comparison', 'behavior_summary'} <= set(sections)
+
+def test_ingest_updates_behavior_incrementally():
+    """거래 저장 시 응답의 행동 지표가 누적 반영되는지 테스트"""
+    user_id = f'ingest_{uuid.uuid4().hex[:8]}'
+    trade = {'stock_code': 'A005930', 'sector': 'IT', 'shares': 10}
+    first = client.post("/api/v1/analysis/transactions", json={'user_id': user_id, 'transactions': [
+        {**trade, 'date': '2024-01-02', 'type': 'buy', 'price': 70000}
+    ]}).json()
+    second = client.post("/api/v1/analysis/transactions", json={'user_id': user_id, 'transactions': [
+        {**trade, 'date': '2024-01-12', 'type': 'sell', 'price': 77000}
+    ]}).json()
+
+    assert first['behavior']['total_trades'] == 1
+    assert second['behavior']['total_trades'] == 2
+    assert second['behavior']['avg_holding_period'] == 10
+    assert second['behavior']['win_rate'] == 100
+    # 보유기간이 7일 이상이 되어 단타 경고가 재평가로 해제된다
+    assert '단타 패턴 개선' in [a['title'] for a in first['coaching_actions']]
+    assert '단타 패턴 개선' not in [a['title'] for a in second['coaching_actions']]
@@ -63,3 +63,49 @@ async def test_classify_investor_type():
     types = analyzer.classify_investor_type(short_term_behavior)
     assert InvestorType.SHORT_TERM_TRADER in types
     assert InvestorType.FOMO_PRONE in types
+
+@pytest.mark.asyncio
+async def test_analyze_many_matches_single_user(sample_transactions):
+    """일괄 분석 결과가 사용자별 개별 분석과 일치하는지 테스트"""
+    analyzer = BehaviorAnalyzer()
+    other = sample_transactions.copy()
+    other['user_id'] = 'other_user'
+    other['type'] = ['buy', 'buy', 'sell', 'sell', 'buy', 'sell', 'buy', 'buy', 'sell', 'sell']
+    combined = pd.concat([sample_transactions, other], ignore_index=True)
+
+    behaviors = await analyzer.analyze_many(combined)
+
+    assert [b.user_id for b in behaviors] == ['test_user', 'other_user']
+    for behavior, frame in zip(behaviors, [sample_transactions, other]):
+        single = await analyzer._calculate_basic_metrics(frame)
+        assert behavior.avg_holding_period == pytest.approx(single['avg_holding_period'])
+        assert behavior.turnover_rate == pytest.approx(single['turnover_rate'])
+        assert behavior.win_rate == pytest.approx(single['win_rate'])
+        assert behavior.total_trades == single['total_trades']
+
+@pytest.mark.asyncio
+async def test_behavioral_biases_from_market_data():
+    """시장 데이터 as-of 조인 기반 FOMO/손실 확정 지연 테스트"""
+    dates = pd.bdate_range('2024-01-01', periods=20)
+    closes = [100.0] * 10 + [100.0, 102.0, 104.0, 106.0, 108.0, 110.0, 110.0, 110.0, 110.0, 110.0]
+    market_data = pd.DataFrame({'stock_code': 'A005930', 'date': dates, 'close': closes})
+
+    def trade(day, side, price):
+        return {'user_id': 'u1', 'date': dates[day], 'stock_code': 'A005930',
+                'type': side, 'shares': 10, 'price': price}
+
+    transactions = pd.DataFrame([
+        trade(2, 'buy', 100.0),    # 횡보 후 매수
+        trade(3, 'sell', 101.0),   # 짧게 보유한 이익
+        trade(4, 'buy', 100.0),
+        trade(8, 'sell', 95.0),    # 오래 보유한 손실
+        trade(16, 'buy', 110.0),   # 직전 5거래일 +10% 급등 후 매수
+    ])
+
+    biases = await BehaviorAnalyzer()._analyze_behavioral_biases(transactions, market_data)
+
+    assert set(biases) == {'fomo_count', 'loss_delay_rate'}
+    assert biases['fomo_count'] == 1
+    win_days = (dates[3] - dates[2]).days
+    loss_days = (dates[8] - dates[4]).days
+    assert biases['loss_delay_rate'] == pytest.approx(1 - win_days / loss_days)
@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from app.core.behavior_analyzer import BehaviorAnalyzer
+from app.core.behavior_state import BehaviorState, BehaviorStateStore
+from app.core.transaction_columns import PriceColumns, TransactionColumns
+
+@pytest.fixture
+def round_trip_transactions():
+    """매도 시점마다 보유 물량이 있는 거래 데이터"""
+    base = datetime(2024, 1, 1)
+    rows = [
+        ('A005930', 'IT', 0, 'buy', 10, 70000),
+        ('A035720', 'IT', 1, 'buy', 20, 50000),
+        ('A005930', 'IT', 3, 'buy', 5, 72000),
+        ('A005930', 'IT', 8, 'sell', 12, 75000),
+        ('A035720', 'IT', 9, 'sell', 20, 45000),
+        ('A105560', '금융', 12, 'buy', 30, 60000),
+        ('A005930', 'IT', 40, 'sell', 3, 69000),
+    ]
+    return pd.DataFrame([
+        {'user_id': 'test_user', 'date': base + timedelta(days=d), 'stock_code': code,
+         'sector': sector, 'type': side, 'shares': shares, 'price': price, 'value': shares * price}
+        for code, sector, d, side, shares, price in rows
+    ])
+
+@pytest.mark.asyncio
+async def test_incremental_state_matches_full_recompute(round_trip_transactions):
+    """증분 상태의 기본 지표가 전체 재계산과 일치하는지 테스트"""
+    state = BehaviorState.from_transactions('test_user', round_trip_transactions)
+    behavior = state.to_behavior()
+    metrics = await BehaviorAnalyzer()._calculate_basic_metrics(round_trip_transactions)
+
+    for key in ('avg_holding_period', 'turnover_rate', 'win_loss_ratio', 'win_rate',
+                'total_trades', 'avg_trade_size'):
+        assert getattr(behavior, key) == pytest.approx(metrics[key])
+    assert behavior.sector_concentration == {'금융': pytest.approx(1.0)}
+
+def test_state_round_trips_through_bytes(round_trip_transactions):
+    """상태 직렬화/복원 테스트"""
+    state = BehaviorState.from_transactions('test_user', round_trip_transactions.iloc[:4])
+    restored = BehaviorState.from_bytes(state.to_bytes())
+
+    # 복원 후 이어서 거래를 반영해도 결과가 같아야 한다
+    for target in (state, restored):
+        for row in round_trip_transactions.iloc[4:].itertuples(index=False):
+            target.apply_trade(row.stock_code, row.date, row.type, row.shares, row.price,
+                               sector=row.sector, value=row.value)
+
+    analysis_date = datetime(2024, 3, 1)
+    assert restored.to_behavior(analysis_date) == state.to_behavior(analysis_date)
+
+@pytest.mark.asyncio
+async def test_state_store_applies_batches_incrementally(round_trip_transactions):
+    """저장소가 새 묶음만 반영하고, 날짜가 거꾸로 된 묶음이면 전체 이력으로 다시 만드는지 테스트"""
+    store = BehaviorStateStore(path='')
+    batches = [TransactionColumns.from_frame(round_trip_transactions.iloc[i:i + 2]) for i in range(0, 7, 2)]
+    history_calls = []
+
+    def history_until(end):
+        def history():
+            history_calls.append(end)
+            return TransactionColumns.from_frame(round_trip_transactions.iloc[:end])
+        return history
+
+    for i, batch in enumerate(batches):
+        state = await store.apply('test_user', batch, history_until(2 * i + 2))
+
+    analysis_date = datetime(2024, 3, 1)
+    expected = BehaviorState.from_transactions('test_user', round_trip_transactions).to_behavior(analysis_date)
+    assert state.to_behavior(analysis_date) == expected
+    assert len(history_calls) == 1      # 첫 묶음(상태 없음)에서만 재구성
+
+    await store.apply('test_user', batches[0], history_until(7))
+    assert len(history_calls) == 2
+
+@pytest.mark.asyncio
+async def test_state_store_counts_fomo_from_prices(round_trip_transactions):
+    """시세 함수가 주어지면 증분 반영에서도 급등 직후 매수를 FOMO로 세는지 테스트"""
+    store = BehaviorStateStore(path='')
+    requested = []
+
+    async def prices(columns):
+        # 모든 종목이 매 거래일 2%씩 오르는 종가
+        requested.append(len(columns))
+        codes = np.unique(columns.stock_codes)
+        days = np.arange(int(columns.days.min()) - 10, int(columns.days.max()) + 1)
+        return PriceColumns(
+            stock_codes=np.repeat(codes, len(days)).astype(np.int32),
+            days=np.tile(days, len(codes)).astype(np.int64),
+            closes=np.tile(1.02 ** np.arange(len(days)), len(codes))
+        )
+
+    first, second = round_trip_transactions.iloc[:3], round_trip_transactions.iloc[3:]
+    await store.apply('test_user', TransactionColumns.from_frame(first),
+                      lambda: TransactionColumns.from_frame(first), prices)
+    state = await store.apply('test_user', TransactionColumns.from_frame(second),
+                              lambda: TransactionColumns.from_frame(round_trip_transactions), prices)
+
+    assert requested == [3, 4]
+    assert state.fomo_count == int((round_trip_transactions['type'] == 'buy').sum())
+
+@pytest.mark.asyncio
+async def test_state_store_serializes_same_user_updates(round_trip_transactions):
+    """같은 사용자 묶음이 동시에 들어와도 서로의 반영을 덮어쓰지 않는지 테스트"""
+    store = BehaviorStateStore(path='')
+    await store.apply('test_user', TransactionColumns.from_frame(round_trip_transactions.iloc[:1]),
+                      lambda: TransactionColumns.from_frame(round_trip_transactions.iloc[:1]))
+
+    async def slow_prices(columns):
+        await asyncio.sleep(0.01)
+        return None
+
+    batches = [TransactionColumns.from_frame(round_trip_transactions.iloc[i:i + 1]) for i in range(1, 7)]
+    await asyncio.gather(*[
+        store.apply('test_user', batch, lambda: pytest.fail('재구성 불필요'), slow_prices) for batch in batches
+    ])
+
+    assert store.get('test_user').trade_count == 7
+    assert store._user_locks == {}
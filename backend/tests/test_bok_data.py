@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from datetime import date
+from app.integrations.bok_data import (
+    SERIES, BOKDataClient, DemoMacroFetcher, EcosFetcher, MacroFetcher, _period_days
+)
+
+class RecordingFetcher(MacroFetcher):
+    def __init__(self):
+        self.calls = []
+        self.demo = DemoMacroFetcher()
+
+    async def fetch(self, name, spec, start, end):
+        self.calls.append((name, start, end))
+        return await self.demo.fetch(name, spec, start, end)
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_and_restart(tmp_path):
+    """조회 완료일 이후만 가져와 이어 붙이고 재시작 후 디스크에서 읽는지 테스트"""
+    fetcher = RecordingFetcher()
+    client = BOKDataClient(str(tmp_path), fetcher, history_start=date(2023, 1, 1))
+    first = await client.get_series('krw_usd', through=date(2023, 6, 30))
+    await client.get_series('krw_usd', through=date(2023, 6, 30))
+    extended = await client.get_series('krw_usd', through=date(2023, 9, 30))
+
+    assert fetcher.calls == [('krw_usd', date(2023, 1, 1), date(2023, 6, 30)),
+                             ('krw_usd', date(2023, 7, 1), date(2023, 9, 30))]
+    assert np.array_equal(extended.values[:len(first)], first.values)
+    full = await DemoMacroFetcher().fetch('krw_usd', SERIES['krw_usd'], date(2023, 1, 1), date(2023, 9, 30))
+    assert np.array_equal(extended.days, full[0]) and np.allclose(extended.values, full[1])
+
+    restarted = BOKDataClient(str(tmp_path), fetcher)
+    assert len(await restarted.get_series('krw_usd', through=date(2023, 9, 30))) == len(extended)
+    assert len(fetcher.calls) == 2
+
+@pytest.mark.asyncio
+async def test_asof_alignment_avoids_lookahead(tmp_path):
+    """거래일 기준 최신 값 정렬과 월 통계 공표 지연 반영 테스트"""
+    client = BOKDataClient(str(tmp_path), RecordingFetcher(), history_start=date(2023, 1, 1))
+    trade_days = np.array(['2022-12-30', '2023-03-03', '2023-03-04', '2023-03-06'], dtype='datetime64[D]')
+    aligned = await client.align(trade_days.astype(np.int64), names=['krw_usd', 'cpi'], through=date(2023, 3, 31))
+
+    krw = client._loaded['krw_usd'][0]
+    assert np.isnan(aligned['krw_usd'][0])
+    # 토요일(03-04)은 금요일(03-03) 값
+    assert aligned['krw_usd'][2] == aligned['krw_usd'][1] == krw.values[krw.days == np.datetime64('2023-03-03')][0]
+    # 2월 CPI는 2월 말일 + 5일(03-05)부터 사용
+    assert _period_days(['202302'], SERIES['cpi'])[0] == np.datetime64('2023-03-05')
+    cpi = client._loaded['cpi'][0]
+    assert aligned['cpi'][2] == cpi.values[0]
+    assert aligned['cpi'][3] == cpi.values[1]
+
+@pytest.mark.asyncio
+async def test_close_releases_ecos_pool(tmp_path):
+    """클라이언트 종료 시 ECOS 조회 백엔드의 연결 풀 세션이 닫히는지 테스트"""
+    fetcher = EcosFetcher(api_key='test')
+    await fetcher.transport.start()
+    client = BOKDataClient(str(tmp_path), fetcher)
+
+    await client.close()
+    assert not fetcher.transport.started
+    await BOKDataClient(str(tmp_path), DemoMacroFetcher()).close()
@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from app.core.behavior_analyzer import BehaviorAnalyzer
+from app.core.covariance_cache import CovarianceCache, daily_returns, ewma_covariance, ledoit_wolf
+from app.core.rebalancing_engine import RebalancingEngine
+
+def random_closes(n_days: int = 250, n_tickers: int = 30, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, (n_days, 1))
+    returns = market + rng.normal(0, 0.015, (n_days, n_tickers))
+    return 10000 * np.cumprod(1 + returns, axis=0)
+
+def test_estimators():
+    """축소/지수가중 공분산 추정 테스트"""
+    returns = daily_returns(random_closes())
+    covariance, shrinkage = ledoit_wolf(returns)
+
+    assert 0 <= shrinkage <= 1
+    assert np.allclose(covariance, covariance.T)
+    assert np.linalg.eigvalsh(covariance).min() > 0
+    # 반감기가 매우 길면 표본 공분산(1/N 정규화)과 같다
+    assert np.allclose(ewma_covariance(returns, 1e9), np.cov(returns, rowvar=False, bias=True))
+
+@pytest.mark.asyncio
+async def test_daily_cache_is_shared_and_used_by_rebalancing(tmp_path):
+    """거래일당 한 번 계산/저장하고 리밸런싱의 목표 변동성에 쓰이는지 테스트"""
+    tickers = [f'A{i:06d}' for i in range(30)]
+    calls = []
+
+    def loader(as_of):
+        calls.append(as_of)
+        return random_closes(), tickers
+
+    CovarianceCache(str(tmp_path)).refresh(date(2024, 1, 15), loader)
+    cache = CovarianceCache(str(tmp_path))
+    matrix = cache.refresh(date(2024, 1, 15), loader)
+
+    assert len(calls) == 1
+    assert isinstance(matrix.covariance, np.memmap)
+    assert cache.latest().as_of == '20240115'
+    assert matrix.correlated_pairs(tickers[:3], 0.99) == []
+
+    portfolio = pd.DataFrame({
+        'stock_code': tickers[:10], 'stock_name': tickers[:10], 'sector': [f'S{i}' for i in range(10)],
+        'shares': 9, 'current_price': 10000.0
+    })
+    engine = RebalancingEngine()
+    engine.risk_limits['target_volatility'] = 0.05
+    plan = await engine.generate_rebalancing_plan(portfolio, cash=100000, covariance=matrix)
+
+    assert plan['expected_results']['before']['volatility'] > 0.05
+    assert plan['expected_results']['after']['volatility'] <= 0.05
+
+@pytest.mark.asyncio
+async def test_refresh_latest_feeds_behavior_volatility(tmp_path):
+    """비동기 종가 불러오기로 최신 거래일 행렬을 한 번만 만들고 행동 분석 예상 변동성에 쓰이는지 테스트"""
+    tickers = [f'A{i:06d}' for i in range(30)]
+    calls = []
+
+    async def load_closes():
+        calls.append(1)
+        return date(2024, 1, 15), random_closes(), tickers
+
+    cache = CovarianceCache(str(tmp_path))
+    await cache.refresh_latest(load_closes)
+    matrix = await cache.refresh_latest(load_closes)
+
+    assert len(calls) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['20240115']
+    assert cache.latest().as_of == '20240115'
+
+    trades = pd.DataFrame([
+        {'user_id': user, 'date': pd.Timestamp('2024-01-10'), 'stock_code': code, 'stock_name': code,
+         'sector': 'IT', 'type': 'buy', 'shares': shares, 'price': 10000.0, 'value': shares * 10000.0}
+        for user, code, shares in [('a', tickers[0], 10), ('a', tickers[1], 30), ('b', tickers[2], 5)]
+    ])
+    behaviors = await BehaviorAnalyzer().analyze_many(trades, covariance=matrix)
+
+    for behavior, held, shares in zip(behaviors, [tickers[:2], tickers[2:3]], [[10, 30], [5]]):
+        weights = np.array(shares) / sum(shares) * (1 - behavior.cash_ratio)
+        assert behavior.expected_volatility == pytest.approx(matrix.portfolio_volatility(held, weights) * 100)
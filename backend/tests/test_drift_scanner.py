@@ -0,0 +1,30 @@
+import pytest
+import numpy as np
+from app.core.drift_scanner import DriftScanner
+
+@pytest.mark.asyncio
+async def test_scan_plans_only_breaching_accounts():
+    """허용폭/한도를 벗어난 계좌만 심각도 순으로 계획을 만드는지 테스트"""
+    stock_codes = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
+    sectors = ['IT', 'IT', 'IT', '금융', '금융', '화학', '화학', '바이오', '바이오', '유통']
+    targets = np.full(10, 0.09)
+    weights = np.vstack([
+        targets,                                                    # 목표와 동일
+        targets + np.r_[-0.02, 0.01, np.zeros(8)],                  # 허용폭 이내
+        np.r_[0.1, 0.1, 0.09, 0.05, 0.05, 0.09, 0.09, 0.09, 0.09, 0.09],  # 한도 이내, 이탈 소폭
+        np.r_[0.2, 0.1, 0.1, np.full(7, 0.05)]                      # 단일 종목/섹터 한도 위반
+    ])
+    prices = np.full(10, 10000.0)
+
+    scanner = DriftScanner()
+    report = scanner.measure(weights, targets, np.array([0, 0, 0, 1, 1, 2, 2, 3, 3, 4]))
+    assert report.breaching.tolist() == [3]
+    assert report.max_sector_concentration[3] == pytest.approx(0.4)
+
+    work = await scanner.scan(['a0', 'a1', 'a2', 'a3'], weights, targets,
+                              np.full(4, 100000000.0), prices, stock_codes, sectors)
+
+    assert [item['account_id'] for item in work] == ['a3']
+    plan = work[0]['plan']
+    assert work[0]['expected_cost'] == pytest.approx(sum(plan['estimated_cost'].values()))
+    assert plan['expected_results']['after']['max_sector_concentration'] <= 0.3
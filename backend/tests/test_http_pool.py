@@ -0,0 +1,42 @@
+import asyncio
+import time
+import pytest
+from aiohttp.test_utils import TestServer
+from app.integrations.http_pool import HttpPool, TokenBucket, UpstreamError
+from app.integrations.hyperclovax import HyperClovaXClient
+from app.integrations.llm_cache import LLMResponseCache
+from app.integrations.llm_stub import STATS, create_stub_app
+
+@pytest.mark.asyncio
+async def test_pool_limits_concurrency_and_retries():
+    """동시 요청 상한과 일시 오류 재시도, 재시도 소진 시 오류 테스트"""
+    stub = create_stub_app(latency=0.05, fail_every=4)
+    async with TestServer(stub) as server:
+        pool = HttpPool(str(server.make_url('')), max_concurrency=3, rate_per_second=0,
+                        max_retries=3, backoff_base=0.01)
+        client = HyperClovaXClient(pool, LLMResponseCache(path=''))
+        try:
+            summaries = await asyncio.gather(*[client.complete(f'prompt {i}') for i in range(12)])
+        finally:
+            await pool.close()
+
+        assert all(summary.startswith('[stub:HCX-003]') for summary in summaries)
+        assert stub[STATS]['max_in_flight'] <= 3
+        assert pool.retries == stub[STATS]['failures'] > 0
+
+    async with TestServer(create_stub_app(fail_every=1)) as server:
+        pool = HttpPool(str(server.make_url('')), max_retries=1, backoff_base=0.01)
+        with pytest.raises(UpstreamError) as error:
+            await HyperClovaXClient(pool, LLMResponseCache(path='')).complete('hello')
+        await pool.close()
+        assert error.value.status == 503
+
+@pytest.mark.asyncio
+async def test_token_bucket_rate():
+    """버킷 용량만큼은 바로 통과하고 이후에는 초당 rate개로 제한되는지 테스트"""
+    bucket = TokenBucket(rate=50, capacity=5)
+    started = time.perf_counter()
+    for _ in range(15):
+        await bucket.acquire()
+    elapsed = time.perf_counter() - started
+    assert 0.18 <= elapsed < 0.5
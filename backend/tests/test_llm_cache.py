@@ -0,0 +1,77 @@
+import pytest
+from dataclasses import replace
+from aiohttp.test_utils import TestServer
+from app.core.behavior_analyzer import InvestorType
+from app.integrations.http_pool import HttpPool
+from app.integrations.hyperclovax import HyperClovaXClient
+from app.integrations.llm_cache import LLMResponseCache
+from app.integrations.llm_stub import STATS, create_stub_app
+from app.utils.demo_data import get_demo_behavior
+
+@pytest.mark.asyncio
+async def test_similar_behaviors_share_summary_across_restart(tmp_path):
+    """지표 구간이 같은 사용자는 응답을 공유하고 재시작 후에도 디스크에서 읽는지 테스트"""
+    path = str(tmp_path / 'llm.sqlite3')
+    behavior = get_demo_behavior('user_a')
+    similar = replace(behavior, win_rate=behavior.win_rate + 0.5)
+    types = [InvestorType.SHORT_TERM_TRADER]
+
+    stub = create_stub_app()
+    async with TestServer(stub) as server:
+        pool = HttpPool(str(server.make_url('')), rate_per_second=0)
+        try:
+            cache = LLMResponseCache(path=path)
+            client = HyperClovaXClient(pool, cache)
+            first = await client.generate_behavior_summary(behavior, types)
+            assert await client.generate_behavior_summary(similar, types) == first
+            await client.generate_behavior_summary(behavior, [InvestorType.BALANCED])
+            assert cache.stats() == {'entries': 2, 'disk_entries': 2, 'hits': 1, 'misses': 2, 'stale': 0, 'stale_served': 0}
+            cache.close()
+
+            restarted = LLMResponseCache(path=path)
+            assert await HyperClovaXClient(pool, restarted).generate_behavior_summary(behavior, types) == first
+            assert restarted.hits == 1
+            restarted.close()
+        finally:
+            await pool.close()
+    assert stub[STATS]['requests'] == 2
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_when_upstream_fails():
+    """만료된 항목은 다시 생성하고, 생성 실패 시 만료된 응답을 돌려주는지 테스트"""
+    cache = LLMResponseCache(ttl_seconds=0, path='')
+
+    async def ok():
+        return 'old'
+
+    async def fail():
+        raise RuntimeError('upstream down')
+
+    assert await cache.get_or_generate('k', ok) == 'old'
+    assert await cache.get_or_generate('k', fail) == 'old'
+    assert (cache.misses, cache.stale, cache.stale_served) == (1, 1, 1)
+    with pytest.raises(RuntimeError):
+        await cache.get_or_generate('other', fail)
+
+@pytest.mark.asyncio
+async def test_disk_tier_evicts_least_recently_used(tmp_path):
+    """디스크 항목 수가 상한을 넘으면 가장 오래 쓰이지 않은 항목부터 지우는지 테스트"""
+    path = str(tmp_path / 'llm.sqlite3')
+    cache = LLMResponseCache(max_entries=1, path=path, disk_max_entries=2)
+
+    async def generate():
+        return 'v'
+
+    await cache.get_or_generate('a', generate)
+    await cache.get_or_generate('b', generate)
+    await cache.get_or_generate('a', generate)   # 메모리에 없어 디스크에서 읽으며 사용 시각 갱신
+    await cache.get_or_generate('c', generate)
+    cache.close()
+
+    restarted = LLMResponseCache(max_entries=1, path=path, disk_max_entries=1)
+    await restarted.get_or_generate('c', generate)
+    assert (restarted.hits, restarted.stats()['disk_entries']) == (1, 1)
+    await restarted.get_or_generate('a', generate)
+    await restarted.get_or_generate('b', generate)
+    assert restarted.misses == 2
+    restarted.close()
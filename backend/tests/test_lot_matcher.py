@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from app.core.lot_matcher import match_fifo, match_fifo_frame
+from app.core.behavior_analyzer import BehaviorAnalyzer
+
+def test_match_fifo_partial_lots():
+    """부분 체결 FIFO 매칭 테스트"""
+    codes = np.array([0, 0, 0, 0, 1])
+    days = np.array([0, 1, 5, 9, 2])
+    is_buy = np.array([True, True, False, False, False])
+    shares = np.array([10, 5, 12, 3, 4])
+    prices = np.array([100.0, 110.0, 120.0, 90.0, 50.0])
+
+    lots = match_fifo(codes, days, is_buy, shares, prices)
+
+    assert lots.buy_index.tolist() == [0, 1, 1]
+    assert lots.sell_index.tolist() == [2, 2, 3]
+    assert lots.quantity.tolist() == [10, 2, 3]
+    assert lots.holding_days.tolist() == [5, 4, 8]
+    assert lots.pnl.tolist() == [200, 20, -60]
+
+def test_match_fifo_sells_pre_history_holdings_first():
+    """거래 내역 이전 보유분 매도는 매칭에서 제외"""
+    codes = np.zeros(3, dtype=int)
+    days = np.array([0, 1, 2])
+    is_buy = np.array([True, False, False])
+    shares = np.array([5, 5, 5])
+    prices = np.array([100.0, 120.0, 130.0])
+
+    lots = match_fifo(codes, days, is_buy, shares, prices)
+
+    # 기초 보유분이 가장 오래된 로트이므로 첫 매도가 먼저 소진한다
+    assert lots.sell_index.tolist() == [2]
+    assert lots.quantity.tolist() == [5]
+
+@pytest.mark.asyncio
+async def test_basic_metrics_from_round_trips():
+    """왕복 거래 기반 기본 지표 계산 테스트"""
+    base = datetime(2024, 1, 1)
+    rows = [
+        ('A005930', 0, 'buy', 10, 70000),
+        ('A005930', 10, 'sell', 10, 77000),
+        ('A035720', 2, 'buy', 10, 50000),
+        ('A035720', 4, 'sell', 10, 45000),
+    ]
+    transactions = pd.DataFrame([
+        {'user_id': 'u1', 'date': base + timedelta(days=d), 'stock_code': code,
+         'type': side, 'shares': shares, 'price': price, 'value': shares * price}
+        for code, d, side, shares, price in rows
+    ])
+
+    lots = match_fifo_frame(transactions)
+    metrics = await BehaviorAnalyzer()._calculate_basic_metrics(transactions)
+
+    assert len(lots) == 2
+    assert metrics['avg_holding_period'] == pytest.approx(6.0)
+    assert metrics['win_rate'] == pytest.approx(50.0)
+    assert metrics['win_loss_ratio'] == pytest.approx(70000 / 50000)
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from app.integrations.mstock import (
+    FILLED, PENDING, REJECTED, SKIPPED, MockBroker, MStockBroker, OrderExecutor
+)
+
+def make_plan(plan_id, sells, buys):
+    trades = [{'stock_code': code, 'action': 'sell', 'shares': 10, 'trade_value': 100000.0} for code in sells]
+    trades += [{'stock_code': code, 'action': 'buy', 'shares': 5, 'trade_value': 50000.0} for code in buys]
+    return {'plan_id': plan_id, 'required_trades': trades}
+
+@pytest.mark.asyncio
+async def test_sells_before_buys_within_parallel_limit():
+    """계좌마다 매도가 모두 끝난 뒤 매수가 나가고, 동시 주문 수가 제한을 넘지 않는지 테스트"""
+    broker = MockBroker(latency=0.01, slippage_bps=10)
+    executor = OrderExecutor(broker, max_parallel=3, rate_per_second=1000, burst=1000)
+    plans = [(f'acct{i}', make_plan(f'plan{i}', ['A005930', 'A000660'], ['A035420', 'A051910']))
+             for i in range(5)]
+
+    reports = await executor.execute_plans(plans)
+
+    assert [r.account_id for r in reports] == [f'acct{i}' for i in range(5)]
+    assert all(r.status == 'completed' for r in reports)
+    assert broker.max_in_flight <= 3
+    for i in range(5):
+        sides = [o.side for o in broker.received if o.account_id == f'acct{i}']
+        assert sides == ['sell', 'sell', 'buy', 'buy']
+
+    report = reports[0].to_dict()
+    assert report['filled_value']['sell'] == pytest.approx(200000 * 0.999)
+    assert report['latency_ms']['p50'] > 0
+
+@pytest.mark.asyncio
+async def test_rejected_sell_skips_buys():
+    """매도가 거부된 계좌는 매수를 보내지 않고 건너뛰는지 테스트"""
+    broker = MockBroker(reject_codes=['A000660'])
+    executor = OrderExecutor(broker, max_parallel=4, rate_per_second=1000, burst=1000)
+
+    report = await executor.execute_plan(make_plan('plan', ['A005930', 'A000660'], ['A035420']), 'acct')
+
+    statuses = {r.stock_code: r.status for r in report.results}
+    assert statuses == {'A005930': FILLED, 'A000660': REJECTED, 'A035420': SKIPPED}
+    assert all(o.side == 'sell' for o in broker.received)
+    assert report.status == 'partial'
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_worker_pool():
+    """동시 요청이 모두 같은 작업자 풀을 써서 전체 동시 주문 수가 제한을 넘지 않는지 테스트"""
+    class ClosingBroker(MockBroker):
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    broker = ClosingBroker(latency=0.01)
+    executor = OrderExecutor(broker, max_parallel=2, rate_per_second=1000, burst=1000)
+    await executor.start()
+    workers = list(executor._workers)
+
+    reports = await asyncio.gather(*[
+        executor.execute_plan(make_plan(f'plan{i}', ['A005930', 'A000660'], ['A035420']), f'acct{i}')
+        for i in range(4)
+    ])
+
+    assert all(r.status == 'completed' for r in reports)
+    assert broker.max_in_flight <= 2
+    assert executor._workers == workers
+
+    await executor.close()
+    assert broker.closed and all(worker.done() for worker in workers)
+
+class PollingTransport:
+    """접수 후 fills_after번째 상태 조회에서 전량 체결되는 모의 주문 API (fills_after가 None이면 체결 없음)"""
+
+    def __init__(self, fills_after=2):
+        self.fills_after = fills_after
+        self.orders = {}
+        self.polls = 0
+
+    async def request_json(self, method, path, **kwargs):
+        if method == 'POST':
+            order = kwargs['json']
+            order_id = f"m-{len(self.orders)}"
+            self.orders[order_id] = [order, 0]
+            return {'order_id': order_id, 'status': 'accepted', 'filled_quantity': 0, 'avg_price': None}
+        self.polls += 1
+        order_id = path.rsplit('/', 1)[1]
+        state = self.orders[order_id]
+        state[1] += 1
+        if self.fills_after is not None and state[1] >= self.fills_after:
+            return {'order_id': order_id, 'status': FILLED, 'filled_quantity': state[0]['quantity'],
+                    'avg_price': 10000.0}
+        return {'order_id': order_id, 'status': 'accepted', 'filled_quantity': 0, 'avg_price': None}
+
+    async def close(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_accepted_orders_are_polled_until_filled():
+    """접수만 된 매도 주문은 체결될 때까지 상태를 조회한 뒤 매수를 보내는지 테스트"""
+    transport = PollingTransport(fills_after=2)
+    broker = MStockBroker(transport, fill_timeout=1, poll_interval=0)
+    executor = OrderExecutor(broker, max_parallel=2, rate_per_second=1000, burst=1000)
+
+    report = await executor.execute_plan(make_plan('plan', ['A005930'], ['A035420']), 'acct')
+
+    assert [(r.side, r.status, r.filled_shares, r.avg_price) for r in report.results] == [
+        ('sell', FILLED, 10, 10000.0), ('buy', FILLED, 5, 10000.0)
+    ]
+    assert transport.polls == 4
+
+@pytest.mark.asyncio
+async def test_unfilled_orders_time_out_as_pending():
+    """제한 시간 안에 체결되지 않은 매도는 PENDING이 되고 매수는 건너뛰는지 테스트"""
+    transport = PollingTransport(fills_after=None)
+    broker = MStockBroker(transport, fill_timeout=0.05, poll_interval=0.01)
+    executor = OrderExecutor(broker, max_parallel=2, rate_per_second=1000, burst=1000)
+
+    report = await executor.execute_plan(make_plan('plan', ['A005930'], ['A035420']), 'acct')
+
+    assert [r.status for r in report.results] == [PENDING, SKIPPED]
+    assert report.results[0].error == '체결 대기 시간 초과'
+    assert len(transport.orders) == 1 and transport.polls >= 1
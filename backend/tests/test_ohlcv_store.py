@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from app.core.transaction_columns import SymbolTable
+from app.integrations.krx_data import KRXDataClient
+from app.integrations.ohlcv_store import OHLCVStore
+from app.integrations.price_fetchers import FixturePriceFetcher
+from app.integrations.single_flight import SingleFlight
+
+def fixture_bars(start: str, end: str) -> pd.DataFrame:
+    days = pd.bdate_range(start, end)
+    closes = np.linspace(70000, 80000, len(days))
+    return pd.DataFrame({'date': days, 'open': closes, 'high': closes, 'low': closes,
+                         'close': closes, 'volume': 1000.0})
+
+def test_missing_ranges_merge_coverage(tmp_path):
+    """조회 기간 병합과 빠진 기간 계산 테스트"""
+    store = OHLCVStore(str(tmp_path / 'ohlcv.sqlite3'))
+    store.write('A', date(2024, 1, 1), date(2024, 1, 10), fixture_bars('2024-01-01', '2024-01-10'))
+    store.write('A', date(2024, 1, 20), date(2024, 1, 31), fixture_bars('2024-01-20', '2024-01-31'))
+    assert store.missing_ranges('A', date(2024, 1, 5), date(2024, 2, 5)) == [
+        (date(2024, 1, 11), date(2024, 1, 19)), (date(2024, 2, 1), date(2024, 2, 5))
+    ]
+
+    store.write('A', date(2024, 1, 11), date(2024, 1, 19), fixture_bars('2024-01-11', '2024-01-19'))
+    assert store.coverage('A') == [(date(2024, 1, 1), date(2024, 1, 31))]
+    assert len(store.read(['A'], date(2024, 1, 1), date(2024, 1, 31))) == 23
+
+@pytest.mark.asyncio
+async def test_client_fetches_only_gaps_and_reads_from_disk(tmp_path):
+    """저장된 기간은 다시 가져오지 않고 재시작 후에도 디스크에서 읽는지 테스트"""
+    path = str(tmp_path / 'ohlcv.sqlite3')
+    fetcher = FixturePriceFetcher({'A005930': fixture_bars('2023-01-02', '2023-12-29')})
+    client = KRXDataClient(SingleFlight('test'), OHLCVStore(path), fetcher)
+
+    first = await client.get_market_data('A005930', '2023-03-01', '2023-06-30')
+    again = await client.get_market_data('A005930', '20230301', '20230630')
+    wider = await client.get_market_data('A005930', '2023-01-01', '2023-06-30')
+    assert again == first
+    assert fetcher.calls == [('A005930', date(2023, 3, 1), date(2023, 6, 30)),
+                             ('A005930', date(2023, 1, 1), date(2023, 2, 28))]
+    assert wider['data'][0]['date'] == '2023-01-02'
+    assert wider['data'][-1]['close'] == first['data'][-1]['close']
+
+    restarted = KRXDataClient(SingleFlight('test'), OHLCVStore(path), fetcher)
+    await restarted.get_market_data('A005930', '2023-01-01', '2023-06-30')
+    assert len(fetcher.calls) == 2
+
+@pytest.mark.asyncio
+async def test_price_matrix_aligns_dates_and_caps_fetches(tmp_path, monkeypatch):
+    """날짜 정렬/결측 마스크와 동시 조회 상한 테스트"""
+    monkeypatch.setattr('app.config.Config.KRX_FETCH_CONCURRENCY', 2)
+    bars = {f'T{i}': fixture_bars('2024-01-01', '2024-01-31') for i in range(6)}
+    bars['T0'] = bars['T0'].iloc[::2]
+
+    class SlowFetcher(FixturePriceFetcher):
+        active = peak = 0
+
+        async def fetch(self, ticker, start, end):
+            SlowFetcher.active += 1
+            SlowFetcher.peak = max(SlowFetcher.peak, SlowFetcher.active)
+            await asyncio.sleep(0.02)
+            SlowFetcher.active -= 1
+            return await super().fetch(ticker, start, end)
+
+    client = KRXDataClient(SingleFlight('test'), OHLCVStore(str(tmp_path / 'ohlcv.sqlite3')), SlowFetcher(bars))
+    matrix = await client.get_price_matrix(list(bars) + ['UNKNOWN'], '2024-01-01', '2024-01-31')
+
+    assert SlowFetcher.peak == 2
+    assert matrix.closes.shape == (23, 7)
+    assert matrix.missing[:, matrix.index['UNKNOWN']].all()
+    assert matrix.missing[:, 0].sum() == 11 and not matrix.missing[:, 1:6].any()
+    assert matrix.column('T1')[-1] == 80000
+    assert str(matrix.dates[0]) == '2024-01-01'
+
+    stocks = SymbolTable()
+    prices = matrix.to_price_columns(stocks)
+    assert len(prices) == (~matrix.missing).sum()
+    assert set(stocks.lookup(prices.stock_codes)) == set(bars)
@@ -0,0 +1,76 @@
+import time
+import pandas as pd
+from app.core.plan_store import EXECUTION_IN_PROGRESS, PlanStore, plan_fingerprint
+
+def make_positions(shares):
+    return pd.DataFrame({
+        'stock_code': ['A005930', 'A035720'],
+        'sector': ['IT', 'IT'],
+        'shares': shares,
+        'current_price': [70000.0, 41000.0]
+    })
+
+def test_fingerprint_and_lru_eviction(tmp_path):
+    """입력 해시 조회, 순서 무관 해시, LRU 제거 및 파일 복원 테스트"""
+    positions = make_positions([50, 60])
+    key = plan_fingerprint(positions, 100000, {'max_single_stock': 0.1})
+    assert key == plan_fingerprint(positions.iloc[::-1], 100000, {'max_single_stock': 0.1})
+    assert key != plan_fingerprint(make_positions([50, 61]), 100000, {'max_single_stock': 0.1})
+    assert key != plan_fingerprint(positions, 100000, {'max_single_stock': 0.2})
+
+    path = str(tmp_path / 'plans.json')
+    store = PlanStore(max_entries=2, ttl_seconds=60, path=path)
+    store.put({'plan_id': 'p1'}, key, 'u1')
+    store.put({'plan_id': 'p2'}, 'h2', 'u1')
+    assert store.get_by_hash(key, 'u1') == {'plan_id': 'p1'}   # p1을 최근 사용으로 갱신
+    store.put({'plan_id': 'p3'}, 'h3', 'u1')
+
+    assert store.get('p2', 'u1') is None
+    restored = PlanStore(max_entries=2, ttl_seconds=60, path=path)
+    assert restored.get('p1', 'u1') == {'plan_id': 'p1'}
+    assert restored.get_by_hash('h3', 'u1') == {'plan_id': 'p3'}
+    assert restored.get('p1', 'u2') is None
+
+def test_ttl_expiry():
+    """만료된 계획은 조회되지 않는지 테스트"""
+    store = PlanStore(max_entries=10, ttl_seconds=0.01, path='')
+    store.put({'plan_id': 'p1'}, 'h1', 'u1')
+    time.sleep(0.02)
+
+    assert store.get('p1', 'u1') is None
+    assert store.get_by_hash('h1', 'u1') is None
+    assert len(store) == 0
+
+def test_plans_are_scoped_to_owner():
+    """보유 내역이 같아도 사용자별로 다른 계획이 되고 다른 사용자는 조회할 수 없는지 테스트"""
+    positions = make_positions([50, 60])
+    key_a = plan_fingerprint(positions, 100000, {}, 'user_a')
+    key_b = plan_fingerprint(positions, 100000, {}, 'user_b')
+    assert key_a != key_b
+
+    store = PlanStore(max_entries=10, ttl_seconds=60, path='')
+    store.put({'plan_id': 'pa'}, key_a, 'user_a')
+    store.put({'plan_id': 'pb'}, key_b, 'user_b')
+
+    assert len(store) == 2
+    assert store.get('pa', 'user_a') == {'plan_id': 'pa'}
+    assert store.get('pa', 'user_b') is None
+    assert store.get_by_hash(key_a, 'user_b') is None
+
+def test_execution_is_claimed_once(tmp_path):
+    """계획 실행은 한 번만 선점되고, 실행된 계획은 해시 조회에서 빠지며 재시작 후에도 유지되는지 테스트"""
+    path = str(tmp_path / 'plans.json')
+    store = PlanStore(max_entries=10, ttl_seconds=60, path=path)
+    store.put({'plan_id': 'p1'}, 'h1', 'owner')
+
+    assert store.claim_execution('p1', 'other') == (None, None)
+    assert store.claim_execution('p1', 'owner') == ({'plan_id': 'p1'}, None)
+    assert store.claim_execution('p1', 'owner') == ({'plan_id': 'p1'}, EXECUTION_IN_PROGRESS)
+    store.record_execution('p1', {'status': 'completed'})
+    assert store.get_by_hash('h1', 'owner') is None
+
+    # 같은 입력으로 새 계획을 만들어도 실행된 계획과 결과는 남는다
+    store.put({'plan_id': 'p2'}, 'h1', 'owner')
+    restarted = PlanStore(max_entries=10, ttl_seconds=60, path=path)
+    assert restarted.get_by_hash('h1', 'owner') == {'plan_id': 'p2'}
+    assert restarted.claim_execution('p1', 'owner') == ({'plan_id': 'p1'}, {'status': 'completed'})
@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+import pandas as pd
+from app.core.rebalancing_engine import RebalancingEngine
+from app.core.rebalancing_solver import solve_rebalance
+from app.utils.demo_data import get_demo_behavior, get_demo_portfolio
+
+def test_solution_satisfies_risk_limits():
+    """정수 수량 해가 단일 종목/섹터/현금 한도를 만족하는지 테스트"""
+    rng = np.random.default_rng(0)
+    n = 2000
+    shares = rng.integers(1, 500, n).astype(float)
+    shares[:20] *= 200
+    prices = rng.uniform(1000, 500000, n)
+    sectors = rng.integers(0, 3, n)
+
+    solution = solve_rebalance(shares, prices, sectors, cash=0.0,
+                               max_single_stock=0.1, max_sector_concentration=0.3, min_cash_ratio=0.1,
+                               commission_rate=0.0008, tax_rate=0.0023)
+
+    weights = solution.target_shares * prices / solution.total_value
+    assert np.all(solution.target_shares == np.floor(solution.target_shares))
+    assert weights.max() <= 0.1
+    assert np.bincount(sectors, weights=weights).max() <= 0.3 + 1e-12
+    assert solution.cash_after >= 0.1 * solution.total_value - 1e-6
+    assert solution.commission == pytest.approx(solution.trade_values.sum() * 0.0008)
+
+def test_no_trades_within_limits():
+    """한도 안의 포트폴리오는 거래하지 않는지 테스트"""
+    shares = np.array([10.0, 10.0, 10.0, 10.0])
+    prices = np.array([1000.0, 1000.0, 1000.0, 1000.0])
+
+    solution = solve_rebalance(shares, prices, np.array([0, 1, 2, 3]), cash=160000.0,
+                               max_single_stock=0.1, max_sector_concentration=0.3, min_cash_ratio=0.1,
+                               commission_rate=0.0008, tax_rate=0.0023)
+
+    assert not solution.trade_shares.any()
+    assert solution.commission == solution.tax == 0
+
+@pytest.mark.asyncio
+async def test_plan_follows_model_weights():
+    """모델 목표 비중 추종 및 매도 우선 거래 목록 테스트"""
+    portfolio = pd.DataFrame(get_demo_portfolio('test_user'))
+    portfolio = pd.concat([portfolio, pd.DataFrame([{
+        'stock_code': 'A105560', 'stock_name': 'KB금융', 'sector': '금융', 'shares': 0, 'current_price': 50000
+    }])], ignore_index=True)
+
+    plan = await RebalancingEngine().generate_rebalancing_plan(
+        portfolio, get_demo_behavior('test_user'),
+        target_weights={'A105560': 0.1}, cash=2000000
+    )
+
+    trades = plan['required_trades']
+    assert [t['action'] for t in trades] == sorted(t['action'] for t in trades)[::-1]
+    assert trades[-1]['stock_code'] == 'A105560' and trades[-1]['action'] == 'buy'
+    assert 0.09 <= plan['target_portfolio']['A105560']['target_weight'] <= 0.1
+    assert plan['expected_results']['after']['max_single_stock'] <= 0.1
+
+def test_cash_floor_restored_by_sells_or_reported():
+    """매수가 없을 때도 매도로 최소 현금을 맞추고, 불가능하면 부족액을 알리는지 테스트"""
+    shares = np.array([100.0, 100.0])
+    prices = np.array([10000.0, 10000.0])
+    limits = dict(max_single_stock=1.0, max_sector_concentration=1.0,
+                  commission_rate=0.0008, tax_rate=0.0023)
+
+    # 현금 0에서 시작: 목표 비중 축소분을 팔고 비용까지 매도로 충당
+    solution = solve_rebalance(shares, prices, np.array([0, 1]), cash=0.0, min_cash_ratio=0.1, **limits)
+    assert not (solution.trade_shares > 0).any()
+    assert solution.cash_after >= 0.1 * solution.total_value
+    assert solution.cash_shortfall == 0
+
+    # 전량 현금이 목표면 비용만큼은 맞출 수 없으므로 부족액으로 보고
+    solution = solve_rebalance(shares, prices, np.array([0, 1]), cash=0.0, min_cash_ratio=1.0, **limits)
+    assert not solution.target_shares.any()
+    assert solution.cash_shortfall == pytest.approx(solution.commission + solution.tax)
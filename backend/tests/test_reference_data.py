@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from app.integrations.krx_data import KRXDataClient
+from app.integrations.reference_data import ReferenceDataCache, reference_data
+
+@pytest.mark.asyncio
+async def test_serves_stale_while_refreshing_and_starts_warm(tmp_path):
+    """오래된 스냅샷을 바로 돌려주며 백그라운드 갱신하고, 재시작 시 디스크에서 시작하는지 테스트"""
+    version = {'n': 0}
+    release = asyncio.Event()
+
+    async def load():
+        version['n'] += 1
+        if version['n'] > 1:
+            await release.wait()
+        return {'version': version['n']}
+
+    cache = ReferenceDataCache(str(tmp_path), refresh_seconds=3600)
+    cache.register('stats', load)
+    await cache.start()
+    assert await cache.get('stats') == {'version': 1}
+    assert cache.age('stats') < 1
+
+    # 갱신 주기가 지나면 기존 값을 바로 돌려주고 갱신은 백그라운드에서
+    cache.refresh_seconds = 0
+    assert await cache.get('stats') == {'version': 1}
+    await asyncio.sleep(0)
+    assert cache.stats()['stats']['refreshing']
+    release.set()
+    await asyncio.sleep(0.01)
+    assert await cache.get('stats') == {'version': 2}
+    await cache.stop()
+
+    async def unavailable():
+        raise RuntimeError('KRX down')
+
+    restarted = ReferenceDataCache(str(tmp_path), refresh_seconds=3600)
+    restarted.register('stats', unavailable)
+    await restarted.start()
+    assert await restarted.get('stats') == {'version': 2}
+    assert restarted.stats()['stats']['last_error'] is None
+    await restarted.stop()
+
+def test_new_krx_clients_do_not_replace_app_loaders():
+    """KRX 클라이언트를 새로 만들어도 앱 전역 참조 데이터 함수가 바뀌지 않는지 테스트"""
+    loaders = dict(reference_data._loaders)
+    KRXDataClient()
+    assert reference_data._loaders == loaders
+    assert {'investor_stats', 'sector_performance'} <= set(loaders)
@@ -0,0 +1,45 @@
+import pytest
+from app.core.coaching_orchestrator import CoachingOrchestrator
+from app.core.report_cache import ReportCache
+from app.utils.demo_data import generate_demo_transactions
+
+def test_lru_ttl_and_memory_budget():
+    """항목 수/메모리 상한과 만료, 사용자별 무효화 테스트"""
+    report = {'summary': 'x' * 100}
+    cache = ReportCache(max_entries=2, ttl_seconds=60, max_bytes=0)
+    cache.put('a', 'f1', report)
+    cache.put('b', 'f1', report)
+    cache.get('a', 'f1')
+    cache.put('c', 'f1', report)
+    assert cache.get('b', 'f1') is None
+    assert cache.get('a', 'f1') is report
+
+    assert cache.invalidate('a') == 1
+    assert cache.get('a', 'f1') is None
+
+    budget = ReportCache(max_entries=10, ttl_seconds=60, max_bytes=250)
+    for user_id in ['a', 'b', 'c']:
+        budget.put(user_id, 'f1', report)
+    assert len(budget) == 2 and budget.nbytes <= 250
+
+    expired = ReportCache(max_entries=10, ttl_seconds=0, max_bytes=0)
+    expired.put('a', 'f1', report)
+    assert expired.get('a', 'f1') is None
+
+@pytest.mark.asyncio
+async def test_orchestrator_reuses_report_until_trades_change():
+    """같은 이력 버전은 같은 리포트를 돌려주고 버전이 바뀌거나 없으면 다시 계산하는지 테스트"""
+    orchestrator = CoachingOrchestrator()
+    orchestrator.report_cache = ReportCache(max_entries=10, ttl_seconds=60, max_bytes=0)
+    frame = generate_demo_transactions('user_a')
+
+    first = await orchestrator.generate_comprehensive_report('user_a', frame, version='store:10')
+    again = await orchestrator.generate_comprehensive_report('user_a', frame, version='store:10')
+    assert again['report_id'] == first['report_id']
+    assert orchestrator.report_cache.hits == 1
+
+    updated = await orchestrator.generate_comprehensive_report('user_a', frame, version='store:11')
+    assert updated['report_id'] != first['report_id']
+    uncached = await orchestrator.generate_comprehensive_report('user_a', frame)
+    assert uncached['report_id'] not in (first['report_id'], updated['report_id'])
+    assert len(orchestrator.report_cache) == 2
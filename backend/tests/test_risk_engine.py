@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+import pandas as pd
+from app.core import risk_engine
+from app.core.behavior_analyzer import BehaviorAnalyzer
+
+def test_holdings_and_cash_matrix():
+    """보유 수량/현금 시계열 구성 테스트"""
+    day_index = np.array([0, 1, 3])
+    ticker_index = np.array([0, 1, 0])
+    signed_shares = np.array([10.0, 5.0, -4.0])
+    cash_flows = np.array([-1000.0, -500.0, 480.0])
+
+    holdings = risk_engine.holdings_matrix(day_index, ticker_index, signed_shares, 5, 2)
+    cash = risk_engine.cash_matrix(day_index, np.array([0, 1, 0]), cash_flows, 5, 2)
+
+    assert holdings[:, 0].tolist() == [10, 10, 10, 6, 6]
+    assert holdings[:, 1].tolist() == [0, 5, 5, 5, 5]
+    assert cash[:, 0].tolist() == [0, 0, 0, 480, 480]
+    assert cash[:, 1].tolist() == [500, 0, 0, 0, 0]
+
+@pytest.mark.asyncio
+async def test_portfolio_risk_from_price_series():
+    """종가 시계열 기반 포트폴리오 리스크 분석 테스트"""
+    dates = pd.bdate_range('2024-01-01', periods=4)
+    market_data = pd.DataFrame({
+        'stock_code': ['A005930'] * 4 + ['A105560'] * 4,
+        'date': list(dates) * 2,
+        'close': [100.0, 110.0, 88.0, 99.0, 50.0, 50.0, 50.0, 50.0]
+    })
+    transactions = pd.DataFrame([
+        {'user_id': 'u1', 'date': dates[0], 'stock_code': 'A005930', 'sector': 'IT',
+         'type': 'buy', 'shares': 10, 'price': 100.0},
+        {'user_id': 'u1', 'date': dates[0], 'stock_code': 'A105560', 'sector': '금융',
+         'type': 'buy', 'shares': 20, 'price': 50.0},
+    ])
+
+    risk = await BehaviorAnalyzer()._analyze_portfolio_risk(transactions, market_data)
+
+    # 평가금액: 2000 -> 2100 -> 1880 -> 1990
+    assert risk['max_drawdown'] == pytest.approx((2100 - 1880) / 2100 * 100)
+    assert risk['cash_ratio'] == pytest.approx(0.0)
+    assert risk['sector_concentration'] == {
+        'IT': pytest.approx(990 / 1990), '금융': pytest.approx(1000 / 1990)
+    }
+    assert risk['volatility'] > 0
+
+@pytest.mark.asyncio
+async def test_grouped_risk_matches_single_user():
+    """일괄 분석의 사용자별 리스크가 사용자 단독 분석과 일치하는지 테스트"""
+    dates = pd.bdate_range('2024-01-01', periods=30)
+    rng = np.random.default_rng(1)
+    market_data = pd.DataFrame({
+        'stock_code': ['A005930'] * 30 + ['A105560'] * 30,
+        'date': list(dates) * 2,
+        'close': np.r_[100 * np.cumprod(1 + rng.normal(0, 0.02, 30)),
+                       50 * np.cumprod(1 + rng.normal(0, 0.02, 30))]
+    })
+
+    def trade(user, day, code, sector, side, shares, price):
+        return {'user_id': user, 'date': dates[day], 'stock_code': code, 'sector': sector,
+                'type': side, 'shares': shares, 'price': price}
+
+    transactions = pd.DataFrame([
+        trade('u1', 0, 'A005930', 'IT', 'buy', 10, 100.0),
+        trade('u1', 5, 'A105560', '금융', 'buy', 20, 50.0),
+        trade('u1', 20, 'A005930', 'IT', 'sell', 4, 105.0),
+        trade('u2', 12, 'A105560', '금융', 'buy', 30, 52.0),
+        trade('u2', 25, 'A105560', '금융', 'sell', 40, 55.0),
+    ])
+
+    analyzer = BehaviorAnalyzer()
+    behaviors = await analyzer.analyze_many(transactions, market_data)
+
+    # 기준값: 사용자 한 명의 보유 종목/거래일 구간만 잘라 평가금액 시계열로 직접 계산
+    closes = market_data.pivot(index='date', columns='stock_code', values='close')
+    for behavior in behaviors:
+        user = transactions[transactions['user_id'] == behavior.user_id]
+        tickers, ticker_index = np.unique(user['stock_code'], return_inverse=True)
+        first = dates.get_loc(user['date'].min())
+        day_index = np.searchsorted(dates, user['date']) - first
+        signed = np.where(user['type'] == 'buy', user['shares'], -user['shares']).astype(float)
+        amounts = (user['shares'] * user['price']).to_numpy()
+        holdings = risk_engine.holdings_matrix(day_index, ticker_index, signed, 30 - first, len(tickers))
+        cash = np.cumsum(np.bincount(day_index, weights=np.where(user['type'] == 'buy', -amounts, amounts),
+                                     minlength=30 - first))
+        cash -= min(cash.min(), 0.0)
+        positions = holdings * closes[tickers].to_numpy()[first:]
+        equity = positions.sum(axis=1) + cash
+        returns = np.diff(equity) / equity[:-1]
+        peak = np.maximum.accumulate(equity)
+
+        assert behavior.portfolio_volatility == pytest.approx(returns.std(ddof=1) * np.sqrt(252) * 100)
+        assert behavior.max_drawdown == pytest.approx(((peak - equity) / peak).max() * 100)
+        assert behavior.cash_ratio == pytest.approx(cash[-1] / equity[-1])
+        invested = positions[-1].sum()
+        assert sum(behavior.sector_concentration.values()) == pytest.approx(1.0 if invested > 0 else 0.0)
@@ -0,0 +1,96 @@
+import pytest
+from datetime import datetime
+from app.core.behavior_analyzer import InvestmentBehavior
+from app.core.rule_engine import RuleEngine
+
+def make_behavior(user_id: str, turnover_rate: float, avg_holding_period: float,
+                  fomo_purchase_count: int) -> InvestmentBehavior:
+    """테스트용 행동 패턴"""
+    return InvestmentBehavior(
+        user_id=user_id,
+        analysis_date=datetime.now(),
+        avg_holding_period=avg_holding_period,
+        turnover_rate=turnover_rate,
+        win_loss_ratio=1.0,
+        win_rate=50,
+        loss_delay_rate=0.1,
+        fomo_purchase_count=fomo_purchase_count,
+        portfolio_volatility=15,
+        sector_concentration={'IT': 0.5},
+        total_trades=40,
+        avg_trade_size=1000000,
+        max_drawdown=10,
+        cash_ratio=0.1
+    )
+
+@pytest.fixture
+def behaviors():
+    return [
+        make_behavior('active', 80, 3, 12),
+        make_behavior('calm', 20, 30, 0),
+        make_behavior('fomo', 30, 10, 15)
+    ]
+
+@pytest.mark.asyncio
+async def test_batch_matches_single_evaluation(behaviors):
+    """일괄 평가 결과가 사용자별 평가와 같은지 테스트"""
+    engine = RuleEngine()
+    hits = engine.evaluate_rules_batch(behaviors)
+
+    for behavior in behaviors:
+        actions = await engine.evaluate_rules(behavior)
+        expected = [action.action_id.split('_')[0] for action in actions]
+        assert hits.rules_for(behavior.user_id) == expected
+
+    assert hits.hit_counts() == {'R-001': 1, 'R-002': 1, 'R-003': 2, 'R-004': 0}
+    assert hits.to_dense().sum() == len(hits) == 4
+
+@pytest.mark.asyncio
+async def test_build_actions_only_for_requested_users(behaviors):
+    """요청한 사용자에 대해서만 코칭 액션을 만드는지 테스트"""
+    engine = RuleEngine()
+    hits = engine.evaluate_rules_batch(behaviors)
+
+    actions = await engine.build_actions(hits, behaviors, user_ids=['active'])
+
+    assert list(actions) == ['active']
+    assert [a.title for a in actions['active']] == ['과도한 회전율 경고', '단타 패턴 개선', 'FOMO 매수 억제']
+    assert actions['active'][0].description == "회전율이 80%로 너무 높습니다. 잠시 숨을 고르세요."
+
+@pytest.mark.asyncio
+async def test_evaluate_changed_reevaluates_dependent_rules_only(behaviors):
+    """변경 필드를 읽는 룰만 재평가하는지 테스트"""
+    engine = RuleEngine()
+    active = behaviors[0]
+    await engine.evaluate_rules(active, {'expected_volatility': 25.0})
+    assert engine.user_states['active'].history == {'R-001': True, 'R-002': True, 'R-003': True, 'R-004': True}
+
+    updated = make_behavior('active', 40, 3, 12)
+    changed = engine.changed_fields(active, updated)
+    assert changed == ['turnover_rate']
+    assert [engine.rules[i]['id'] for i in engine.rules_for_fields(changed)] == ['R-001']
+
+    # 재평가하지 않는 룰은 이전 결과를 유지
+    engine.user_states['active'].history['R-002'] = False
+    actions = await engine.evaluate_changed(updated, changed)
+
+    assert [a.title for a in actions] == ['FOMO 매수 억제', '포트폴리오 변동성 과다']
+    assert actions[1].description == "보유 종목의 예상 변동성이 25.0%로 목표보다 높습니다."
+    assert engine.user_states['active'].history['R-001'] is False
+
+@pytest.mark.asyncio
+async def test_evaluate_changed_diffs_last_behavior_and_bounds_users(behaviors):
+    """변경 필드를 생략하면 마지막 평가와 비교하고, 평가 기록은 최근 사용자만 남는지 테스트"""
+    engine = RuleEngine(max_users=2)
+    for behavior in behaviors:
+        await engine.evaluate_rules(behavior)
+    assert list(engine.user_states) == [b.user_id for b in behaviors[-2:]]
+
+    latest = behaviors[-1]
+    engine.user_states[latest.user_id].history['R-002'] = True
+    updated = make_behavior(latest.user_id, 80, 10, 0)
+    actions = await engine.evaluate_changed(updated)
+
+    # 회전율/FOMO 룰만 재평가되고, 바뀌지 않은 보유기간 룰은 이전 기록 유지
+    assert [a.title for a in actions] == ['과도한 회전율 경고', '단타 패턴 개선']
+    assert engine.user_states[latest.user_id].behavior is updated
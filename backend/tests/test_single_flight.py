@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from app.integrations.krx_data import KRXDataClient
+from app.integrations.reference_data import ReferenceDataCache
+from app.integrations.single_flight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result_or_error():
+    """같은 키의 동시 호출은 한 번만 실행되고 결과/예외를 공유하는지 테스트"""
+    flight = SingleFlight('test')
+    calls = []
+
+    async def fetch(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        if value is None:
+            raise RuntimeError('upstream down')
+        return value
+
+    results = await asyncio.gather(*[flight.do('k', lambda: fetch(1)) for _ in range(10)])
+    assert results == [1] * 10 and calls == [1]
+    assert flight.stats() == {'calls': 1, 'coalesced': 9, 'in_flight': 0}
+
+    errors = await asyncio.gather(*[flight.do('k', lambda: fetch(None)) for _ in range(3)],
+                                  return_exceptions=True)
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    # 실패한 호출은 남지 않고 다음 요청이 새로 호출
+    assert await flight.do('k', lambda: fetch(2)) == 2
+
+    client = KRXDataClient(SingleFlight('krx_test'), reference=ReferenceDataCache(path=''))
+    client.register_reference_data()
+    stats = await asyncio.gather(*[client.get_investor_stats() for _ in range(5)])
+    assert all(s is stats[0] for s in stats) and client.single_flight.coalesced == 4
+
+@pytest.mark.asyncio
+async def test_cancellation():
+    """일부 호출자가 취소돼도 나머지는 결과를 받고, 모두 취소되면 호출도 취소되는지 테스트"""
+    flight = SingleFlight('test')
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.1)
+        return 'done'
+
+    first = asyncio.create_task(flight.do('k', slow))
+    second = asyncio.create_task(flight.do('k', slow))
+    await started.wait()
+    first.cancel()
+    assert await second == 'done'
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    async def slow_to_cancel():
+        started.set()
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)   # 정리 작업 중
+            raise
+
+    started.clear()
+    only = asyncio.create_task(flight.do('k', slow_to_cancel))
+    await started.wait()
+    shared = flight._flights['k'].task
+    only.cancel()
+    await asyncio.gather(only, return_exceptions=True)
+    # 취소된 호출이 끝나기 전에도 키는 비어 있어 새 요청은 새로 호출한다
+    assert not shared.done() and flight.stats()['in_flight'] == 0
+    assert await flight.do('k', slow) == 'done'
+    assert shared.cancelled() and flight.calls == 3
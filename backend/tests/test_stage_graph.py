@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+import pandas as pd
+from app.core.coaching_orchestrator import CoachingOrchestrator, FALLBACK_BEHAVIOR_SUMMARY
+from app.core.report_cache import ReportCache
+from app.core.stage_graph import Stage, run_stages
+from app.integrations.krx_data import KRXDataClient
+from app.integrations.ohlcv_store import OHLCVStore
+from app.integrations.price_fetchers import FixturePriceFetcher
+from app.integrations.single_flight import SingleFlight
+from app.utils.demo_data import generate_demo_transactions
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently_and_fall_back():
+    """독립 단계는 동시에 실행되고 제한 시간을 넘긴 단계만 대체값을 쓰는지 테스트"""
+    async def sleep(value, seconds):
+        await asyncio.sleep(seconds)
+        return value
+
+    started = time.perf_counter()
+    results = await run_stages([
+        Stage('a', lambda: sleep(1, 0.2)),
+        Stage('b', lambda: sleep(2, 0.2)),
+        Stage('slow', lambda: sleep(3, 5), timeout=0.1, fallback=-1),
+        Stage('total', lambda a, b, slow: a + b + slow, ('a', 'b', 'slow'))
+    ])
+
+    assert time.perf_counter() - started < 1
+    assert results['total'] == 2
+    assert results.degraded == ['slow']
+
+    # 대체값이 없는 단계의 실패는 그대로 올라온다
+    with pytest.raises(ZeroDivisionError):
+        await run_stages([Stage('a', lambda: 1), Stage('b', lambda a: a / 0, ('a',))])
+
+@pytest.mark.asyncio
+async def test_slow_llm_does_not_block_report(monkeypatch):
+    """LLM 응답이 늦어도 대체 요약으로 리포트를 완성하는지 테스트"""
+    monkeypatch.setattr('app.config.Config.LLM_STAGE_TIMEOUT', 0.1)
+    orchestrator = CoachingOrchestrator()
+    orchestrator.report_cache = ReportCache()
+
+    async def slow_summary(behavior, investor_types):
+        await asyncio.sleep(5)
+        return '늦은 요약'
+
+    monkeypatch.setattr(orchestrator.llm_client, 'generate_behavior_summary', slow_summary)
+    started = time.perf_counter()
+    report = await orchestrator.generate_comprehensive_report(
+        'user_a', generate_demo_transactions('user_a'), version='v1'
+    )
+
+    assert time.perf_counter() - started < 5
+    assert report['behavior_summary'] == FALLBACK_BEHAVIOR_SUMMARY
+    assert report['degraded_stages'] == ['behavior_summary']
+    assert report['market_comparison']['market_average']['win_rate'] is not None
+    # 대체값이 섞인 리포트는 캐시하지 않음
+    assert len(orchestrator.report_cache) == 0
+
+@pytest.mark.asyncio
+async def test_stream_emits_metrics_before_summary(monkeypatch):
+    """스트리밍 시 LLM 요약보다 행동 지표 항목이 먼저 나오는지 테스트"""
+    orchestrator = CoachingOrchestrator()
+    orchestrator.report_cache = ReportCache()
+    original = orchestrator.llm_client.generate_behavior_summary
+
+    async def delayed_summary(behavior, investor_types):
+        await asyncio.sleep(0.3)
+        return await original(behavior, investor_types)
+
+    monkeypatch.setattr(orchestrator.llm_client, 'generate_behavior_summary', delayed_summary)
+    sections = [section async for section, _ in
+                orchestrator.stream_comprehensive_report('user_a', generate_demo_transactions('user_a'))]
+
+    assert sections.index('behavior_analysis') < sections.index('behavior_summary')
+    assert sections.index('market_comparison') < sections.index('behavior_summary')
+    assert sections[-1] == 'degraded_stages'
+
+@pytest.mark.asyncio
+async def test_behavior_stage_uses_market_closes(tmp_path):
+    """행동 분석 단계가 거래 종목 일별 종가로 FOMO 매수를 판정하는지 테스트"""
+    dates = pd.bdate_range('2024-01-01', periods=20)
+    closes = [100.0] * 10 + [100.0, 102.0, 104.0, 106.0, 108.0, 110.0, 110.0, 110.0, 110.0, 110.0]
+    bars = pd.DataFrame({'date': dates, 'open': closes, 'high': closes, 'low': closes,
+                         'close': closes, 'volume': 1000.0})
+    fetcher = FixturePriceFetcher({'A005930': bars})
+    orchestrator = CoachingOrchestrator()
+    orchestrator.report_cache = ReportCache()
+    orchestrator.krx_client = KRXDataClient(SingleFlight('test'), OHLCVStore(str(tmp_path / 'ohlcv.sqlite3')),
+                                            fetcher, reference=orchestrator.krx_client.reference)
+
+    # 체결가만으로는 직전 5거래일 이력이 없지만 시세로는 +10% 급등 직후 매수
+    transactions = pd.DataFrame([
+        {'user_id': 'u1', 'date': dates[day], 'stock_code': 'A005930', 'sector': 'IT',
+         'type': side, 'shares': 10, 'price': price}
+        for day, side, price in [(2, 'buy', 100.0), (3, 'sell', 101.0), (16, 'buy', 110.0)]
+    ])
+    report = await orchestrator.generate_comprehensive_report('u1', transactions, include_rebalancing=False)
+
+    assert fetcher.calls and fetcher.calls[0][0] == 'A005930'
+    assert report['behavior_analysis']['fomo_purchase_count'] == 1
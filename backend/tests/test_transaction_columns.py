@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from app.core.transaction_columns import PriceColumns, SymbolTable, TransactionColumns
+from app.utils.demo_data import generate_demo_transactions
+
+def test_columns_round_trip():
+    """DataFrame <-> 컬럼형 변환 왕복 테스트"""
+    frame = generate_demo_transactions('test_user').reset_index(drop=True)
+    frame.loc[0, 'sector'] = None
+    stocks, sectors = SymbolTable(), SymbolTable(['기타'])
+
+    columns = TransactionColumns.from_frame(frame, stocks, sectors)
+    restored = columns.to_frame()
+
+    assert columns.users == ['test_user']
+    assert columns.stock_codes.dtype == np.int32
+    assert restored['sector'].iloc[0] == '기타'
+    assert (restored['stock_code'] == frame['stock_code']).all()
+    assert (restored['type'] == frame['type']).all()
+    assert (restored['date'] == frame['date'].dt.normalize()).all()
+    assert np.allclose(restored['value'], frame['value'])
+    # 문자열 컬럼을 정수 코드로 바꿔 DataFrame보다 작게 보관한다
+    assert columns.nbytes < frame.memory_usage(deep=True).sum()
+
+def test_positions_from_columns():
+    """순보유 수량과 마지막 체결가로 보유 종목 구성 테스트"""
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']),
+        'stock_code': ['A', 'A', 'B', 'B'],
+        'stock_name': ['에이', '에이', '비', '비'],
+        'type': ['buy', 'sell', 'buy', 'buy'],
+        'shares': [10, 4, 5, 5],
+        'price': [100.0, 110.0, 50.0, 60.0]
+    })
+
+    positions = TransactionColumns.from_frame(frame, SymbolTable(), SymbolTable(['기타'])).positions()
+    positions = positions.set_index('stock_code')
+
+    assert positions.loc['A', 'shares'] == 6
+    assert positions.loc['A', 'current_price'] == 110.0
+    assert positions.loc['B', 'value'] == 600.0
+    assert positions.loc['B', 'stock_name'] == '비'
+
+def test_compacted_keeps_only_referenced_symbols():
+    """묶음마다 새 테이블을 쓰고, 분석 프로세스로 보낼 사본은 참조하는 심볼만 담는지 테스트"""
+    frame = generate_demo_transactions('test_user').reset_index(drop=True)
+    assert TransactionColumns.from_frame(frame).stock_table is not TransactionColumns.from_frame(frame).stock_table
+
+    stocks = SymbolTable([f'X{i}' for i in range(1000)])
+    columns = TransactionColumns.from_frame(frame, stocks, SymbolTable(['기타']))
+    prices = PriceColumns.from_frame(
+        pd.DataFrame({'stock_code': ['Z999'], 'date': [frame['date'].iloc[0]], 'close': [1.0]}), stocks
+    )
+
+    compact, compact_prices = columns.compacted(prices)
+
+    assert len(compact.stock_table) == frame['stock_code'].nunique() + 1
+    assert compact.to_frame().equals(columns.to_frame())
+    assert compact.stock_table.lookup(compact_prices.stock_codes).tolist() == ['Z999']
+    assert compact.positions().equals(columns.positions())
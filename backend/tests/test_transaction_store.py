@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from app.core.transaction_columns import TransactionColumns
+from app.core.transaction_store import TransactionStore
+from app.utils.demo_data import generate_demo_transactions
+
+def test_append_read_and_reopen(tmp_path):
+    """세그먼트 추가 후 사용자 이력 조회 및 재시작 후 복원 테스트"""
+    store = TransactionStore(str(tmp_path), max_segments=0)
+    first = generate_demo_transactions('user_a')
+    second = pd.concat([generate_demo_transactions('user_b'), generate_demo_transactions('user_a')])
+    store.append(TransactionColumns.from_frame(first))
+    store.append(TransactionColumns.from_frame(second))
+
+    reopened = TransactionStore(str(tmp_path))
+    assert reopened.segment_count == 2
+    assert len(reopened) == len(first) + len(second)
+
+    history = reopened.read_user('user_a').to_frame()
+    expected = pd.concat([first, second[second['user_id'] == 'user_a']])
+    assert len(history) == len(expected)
+    assert sorted(history['stock_code']) == sorted(expected['stock_code'])
+    assert np.isclose(history['value'].sum(), expected['value'].sum())
+    assert len(reopened.read_user('unknown')) == 0
+
+def test_compact_yields_zero_copy_slices(tmp_path):
+    """병합 후 사용자 이력이 메모리 맵 뷰로 조회되는지 테스트"""
+    store = TransactionStore(str(tmp_path), max_segments=2)
+    for user_id in ['user_a', 'user_b', 'user_a']:
+        store.append(TransactionColumns.from_frame(generate_demo_transactions(user_id)))
+
+    # 세 번째 추가에서 상한을 넘어 백그라운드 병합, 이후 명시적으로 전체 병합
+    store.wait_for_merges()
+    assert store.segment_count == 2
+    store.compact()
+    assert store.segment_count == 1
+    assert len(list(tmp_path.glob('seg_*'))) == 1
+
+    history = store.read_user('user_a')
+    assert len(history) == 100
+    assert isinstance(history.shares.base, np.memmap) or isinstance(history.shares, np.memmap)
+    assert np.all(np.diff(history.days) >= 0)
+
+def test_background_merge_is_size_tiered(tmp_path):
+    """상한을 넘으면 비슷한 크기 세그먼트끼리 백그라운드에서 병합되는지 테스트"""
+    store = TransactionStore(str(tmp_path), max_segments=4)
+    frames = [generate_demo_transactions(f'user_{i % 3}') for i in range(9)]
+    for frame in frames:
+        store.append(TransactionColumns.from_frame(frame))
+    store.wait_for_merges()
+
+    assert store.segment_count <= 4
+    assert len(store) == sum(len(frame) for frame in frames)
+    # 같은 크기 계층 4개가 먼저 한 세그먼트로 병합된다
+    assert sorted(len(segment) for segment in store._segments)[-1] >= 200
+    assert len(TransactionStore(str(tmp_path)).read_user('user_0')) == 150
+
+def test_append_logs_only_new_used_symbols(tmp_path):
+    """묶음이 쓰는 심볼만 등록하고, 새 심볼만 로그에 추가되는지 테스트"""
+    store = TransactionStore(str(tmp_path), max_segments=0)
+    frame = generate_demo_transactions('user_a')
+    columns = TransactionColumns.from_frame(frame)
+    columns.stock_table.intern(['999999'])
+    store.append(columns)
+    assert store.stock_table.code('999999') is None
+
+    log = tmp_path / 'symbols.log'
+    lines = log.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1 + frame['stock_code'].nunique() + frame['sector'].nunique()
+    # 같은 심볼만 쓰는 묶음은 로그를 늘리지 않는다
+    store.append(TransactionColumns.from_frame(frame))
+    assert log.read_text(encoding='utf-8').splitlines() == lines
+
+    reopened = TransactionStore(str(tmp_path))
+    assert reopened.stock_table.symbols == store.stock_table.symbols
+    assert reopened.stock_table.labels == store.stock_table.labels
+    assert len(reopened.read_user('user_a')) == 2 * len(frame)